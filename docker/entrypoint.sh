@@ -15,6 +15,11 @@ case "${RUN_MODE:-cron}" in
     echo "🔄 单次执行"
     exec /usr/local/bin/python main.py
     ;;
+"daemon")
+    # 常驻进程内调度，避免每次执行的冷启动；CRON_SCHEDULE/IMMEDIATE_RUN 由程序读取
+    echo "⏰ 守护进程模式: ${CRON_SCHEDULE:-*/30 * * * *}"
+    exec /usr/local/bin/python main.py --daemon
+    ;;
 "cron")
     # 生成 crontab
     echo "${CRON_SCHEDULE:-*/30 * * * *} cd /app && /usr/local/bin/python main.py" > /tmp/crontab
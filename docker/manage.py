@@ -37,6 +37,23 @@ def manual_run():
         print(f"❌ 执行出错: {e}")
 
 
+def rebuild_aggregate():
+    """从原始批次重建当日汇总"""
+    date = sys.argv[2] if len(sys.argv) > 2 else None
+    print("🔄 重建当日汇总...")
+    cmd = ["python", "-m", "scripts.storage", "--rebuild"]
+    if date:
+        cmd += ["--date", date]
+    try:
+        result = subprocess.run(cmd, cwd="/app", capture_output=False, text=True)
+        if result.returncode == 0:
+            print("✅ 重建完成")
+        else:
+            print(f"❌ 重建失败，退出码: {result.returncode}")
+    except Exception as e:
+        print(f"❌ 执行出错: {e}")
+
+
 def parse_cron_schedule(cron_expr):
     """解析cron表达式并返回人类可读的描述"""
     if not cron_expr or cron_expr == "未设置":
@@ -133,8 +150,11 @@ def show_status():
         if "supercronic" in pid1_cmdline.lower():
             print("  ✅ supercronic 正确运行为 PID 1")
             supercronic_is_pid1 = True
+        elif "main.py" in pid1_cmdline and "--daemon" in pid1_cmdline:
+            print("  ✅ 守护进程 (main.py --daemon) 正确运行为 PID 1")
+            supercronic_is_pid1 = True
         else:
-            print("  ❌ PID 1 不是 supercronic")
+            print("  ❌ PID 1 不是 supercronic 或守护进程")
             print(f"  📋 实际的 PID 1: {pid1_cmdline}")
     except Exception as e:
         print(f"  ❌ 无法读取 PID 1 信息: {e}")
@@ -229,7 +249,7 @@ def show_status():
     # 状态总结和建议
     print("  📊 状态总结:")
     if supercronic_is_pid1:
-        print("    ✅ supercronic 正确运行为 PID 1")
+        print(f"    ✅ 调度进程正确运行为 PID 1 ({run_mode})")
         print("    ✅ 定时任务应该正常工作")
         
         # 显示当前的调度信息
@@ -249,7 +269,7 @@ def show_status():
         print("       • 时区设置是否正确")
         print("       • 应用程序是否有错误")
     else:
-        print("    ❌ supercronic 状态异常")
+        print("    ❌ 调度进程状态异常")
         if pid1_cmdline:
             print(f"    📋 当前 PID 1: {pid1_cmdline}")
         print("    💡 建议操作:")
@@ -385,6 +405,10 @@ def restart_supercronic():
             print("  ✅ PID 1 是 supercronic")
             print("  💡 要重启 supercronic，需要重启整个容器:")
             print("    docker restart trend-radar")
+        elif "--daemon" in pid1_cmdline:
+            print("  ✅ PID 1 是守护进程 (main.py --daemon)")
+            print("  💡 重启容器会等待当前一轮执行完成后再退出:")
+            print("    docker restart trend-radar")
         else:
             print("  ❌ PID 1 不是 supercronic，这是异常状态")
             print("  💡 建议重启容器以修复问题:")
@@ -406,6 +430,7 @@ def show_help():
   files       - 显示输出文件
   logs        - 实时查看日志
   restart     - 重启说明
+  rebuild     - 重建当日汇总（可指定日期，如 rebuild 2025年01月01日）
   help        - 显示此帮助
 
 📖 使用示例:
@@ -419,9 +444,14 @@ def show_help():
   docker exec -it trend-radar python manage.py status
   docker logs trend-radar
 
+⚙️ 运行模式 (RUN_MODE):
+  cron        - supercronic 按 CRON_SCHEDULE 定时启动新进程（默认）
+  daemon      - 常驻进程，在进程内按 CRON_SCHEDULE 调度，复用连接和已加载的规则
+  once        - 单次执行后退出
+
 💡 常用操作指南:
   1. 检查运行状态: status
-     - 查看 supercronic 是否为 PID 1
+     - 查看 supercronic（或 daemon 模式的守护进程）是否为 PID 1
      - 检查配置文件和关键文件
      - 查看 cron 调度设置
   
@@ -434,7 +464,7 @@ def show_help():
      - 也可使用: docker logs trend-radar
   
   4. 重启服务: restart
-     - 由于 supercronic 是 PID 1，需要重启整个容器
+     - 由于 supercronic / 守护进程是 PID 1，需要重启整个容器
      - 使用: docker restart trend-radar
 """
     print(help_text)
@@ -453,6 +483,7 @@ def main():
         "files": show_files,
         "logs": show_logs,
         "restart": restart_supercronic,
+        "rebuild": rebuild_aggregate,
         "help": show_help,
     }
 
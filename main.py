@@ -1,9 +1,28 @@
+import argparse
+
 from scripts.analyzer import NewsAnalyzer
+from scripts.scheduler import run_daemon, run_lock
 
 def main():
+    parser = argparse.ArgumentParser(description="TrendRadar 热点新闻分析")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="常驻运行，按 CRON_SCHEDULE 在进程内定时执行",
+    )
+    args = parser.parse_args()
+
     try:
-        analyzer = NewsAnalyzer()
-        analyzer.run()
+        if args.daemon:
+            run_daemon()
+            return
+
+        with run_lock() as acquired:
+            if not acquired:
+                print("另一个执行仍在进行，跳过本次执行")
+                return
+            analyzer = NewsAnalyzer()
+            analyzer.run()
     except FileNotFoundError as e:
         print(f"❌ 配置文件错误: {e}")
         print("\n请确保以下文件存在:")
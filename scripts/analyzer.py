@@ -4,13 +4,19 @@ import subprocess
 import time
 import webbrowser
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, Optional, Tuple
 from .config_loader import CONFIG
 from .utils import VERSION, get_beijing_time, format_date_folder, is_first_crawl_today, check_version_update, \
     ensure_directory_exists
 from .data_fetcher import DataFetcher
-from .data_processor import save_titles_to_file, read_all_today_titles, detect_latest_new_titles, \
-    prepare_report_data, load_frequency_words, count_word_frequency
+from .http_pool import HttpSessionPool
+from .models import TitleStats
+from .data_processor import save_crawl_results, read_all_today_titles, detect_latest_new_titles, \
+    prepare_report_data, load_frequency_words, count_word_frequency, TitleClassification, get_title_classification
+from .history import get_history
+from .velocity import get_velocity_engine
+from .polling import get_poll_scheduler
+from .storage import prepare_title_rows
 from .report_generator import generate_html_report
 from .notifier import send_to_webhooks
 
@@ -50,21 +56,54 @@ class NewsAnalyzer:
     }
 
     def __init__(self):
-        self.request_interval = CONFIG["REQUEST_INTERVAL"]
-        self.request_min_interval = CONFIG["REQUEST_MIN_INTERVAL"]
-        self.request_max_interval = CONFIG["REQUEST_MAX_INTERVAL"]
-        self.report_mode = CONFIG["REPORT_MODE"]
-        self.rank_threshold = CONFIG["RANK_THRESHOLD"]
+        self._apply_settings()
         self.is_github_actions = os.environ.get("GITHUB_ACTIONS") == "true"
         self.is_docker_container = self._detect_docker_environment()
         self.update_info = None
         self.proxy_url = None
         self._setup_proxy()
-        self.data_fetcher = DataFetcher(self.proxy_url)
+        self.session_pool = HttpSessionPool.from_config(self.proxy_url)
+        self.data_fetcher = DataFetcher(self.proxy_url, session_pool=self.session_pool)
+        self.title_classification: Optional[TitleClassification] = None
+        self._classification_date: Optional[str] = None
+        self.rising_signals: Optional[Dict] = None
 
         if self.is_github_actions:
             self._check_version_update()
 
+    def _apply_settings(self) -> None:
+        self.request_interval = CONFIG["REQUEST_INTERVAL"]
+        self.request_min_interval = CONFIG["REQUEST_MIN_INTERVAL"]
+        self.request_max_interval = CONFIG["REQUEST_MAX_INTERVAL"]
+        self.report_mode = CONFIG["REPORT_MODE"]
+        self.rank_threshold = CONFIG["RANK_THRESHOLD"]
+
+    def reload_config(self, previous: Mapping) -> None:
+        """配置热更新后刷新实例上缓存的配置项（previous 为更新前的配置快照）
+
+        连接池、限流器和 HTTP 缓存只在对应配置变化时重建，已建立的连接和标题分类结果保留。
+        """
+        self._apply_settings()
+
+        previous_proxy_url = self.proxy_url
+        self.proxy_url = None
+        self._setup_proxy()
+        if self.proxy_url != previous_proxy_url or CONFIG["HTTP_POOL"] != previous["HTTP_POOL"]:
+            self.session_pool.close()
+            self.session_pool = HttpSessionPool.from_config(self.proxy_url)
+
+        fetcher = self.data_fetcher
+        self.data_fetcher = DataFetcher(
+            self.proxy_url,
+            rate_limiter=(
+                fetcher.rate_limiter if CONFIG["RATE_LIMIT"] == previous["RATE_LIMIT"] else None
+            ),
+            session_pool=self.session_pool,
+            http_cache=(
+                fetcher.http_cache if CONFIG["HTTP_CACHE"] == previous["HTTP_CACHE"] else None
+            ),
+        )
+
     def _detect_docker_environment(self) -> bool:
         """检测是否运行在 Docker 容器中"""
         try:
@@ -188,16 +227,52 @@ class NewsAnalyzer:
                 url = title_data.get("url", "")
                 mobile_url = title_data.get("mobileUrl", "")
 
-                title_info[source_id][title] = {
-                    "first_time": time_info,
-                    "last_time": time_info,
-                    "count": 1,
-                    "ranks": ranks,
-                    "url": url,
-                    "mobileUrl": mobile_url,
-                }
+                title_info[source_id][title] = TitleStats(
+                    first_time=time_info,
+                    last_time=time_info,
+                    count=1,
+                    ranks=ranks,
+                    url=url,
+                    mobile_url=mobile_url,
+                )
         return title_info
 
+    def _attach_history_trends(
+        self, stats: List[Dict], word_groups: List[Dict], filter_words: List[str]
+    ) -> None:
+        """压缩今天的历史摘要，并为每个词组附加环比 trend = (本期条数, 上期条数)"""
+        if not CONFIG["HISTORY"]["ENABLED"]:
+            return
+        try:
+            history = get_history()
+            history.compact_all()
+            trends = history.week_over_week(word_groups, filter_words)
+        except Exception as e:
+            print(f"趋势历史更新失败: {e}")
+            return
+        for stat in stats:
+            if stat["word"] in trends:
+                stat["trend"] = trends[stat["word"]]
+
+    def _update_velocity_signals(
+        self, word_groups: List[Dict], filter_words: List[str]
+    ) -> Optional[Dict]:
+        """把新批次纳入热度速度引擎，返回最新快照的突发词组和标题"""
+        if not CONFIG["VELOCITY"]["ENABLED"]:
+            return None
+        try:
+            engine = get_velocity_engine()
+            engine.update(word_groups, filter_words, self.title_classification)
+            rising = engine.rising()
+        except Exception as e:
+            print(f"热度速度引擎更新失败: {e}")
+            return None
+        if rising["groups"] or rising["stories"]:
+            print(
+                f"检测到突发：{len(rising['groups'])} 个词组，{len(rising['stories'])} 条标题"
+            )
+        return rising
+
     def _run_analysis_pipeline(
         self,
         data_source: Dict,
@@ -212,6 +287,11 @@ class NewsAnalyzer:
     ) -> Tuple[List[Dict], str]:
         """统一的分析流水线：数据处理 → 统计计算 → HTML生成"""
 
+        # 标题分类：本次运行的实时、汇总、HTML和通知共用同一份结果
+        self.title_classification = get_title_classification(
+            word_groups, filter_words, self.title_classification
+        )
+
         # 统计计算
         stats, total_titles = count_word_frequency(
             data_source,
@@ -222,8 +302,12 @@ class NewsAnalyzer:
             self.rank_threshold,
             new_titles,
             mode=mode,
+            classification=self.title_classification,
         )
 
+        self._attach_history_trends(stats, word_groups, filter_words)
+        self.rising_signals = self._update_velocity_signals(word_groups, filter_words)
+
         # HTML生成
         html_file = generate_html_report(
             stats,
@@ -233,6 +317,8 @@ class NewsAnalyzer:
             id_to_name=id_to_name,
             mode=mode,
             is_daily_summary=is_daily_summary,
+            classification=self.title_classification,
+            rising=self.rising_signals,
         )
 
         return stats, html_file
@@ -254,6 +340,16 @@ class NewsAnalyzer:
             and has_webhook
             and self._has_valid_content(stats, new_titles)
         ):
+            rising = self.rising_signals
+            if (
+                rising
+                and CONFIG["VELOCITY"]["ALERT"]
+                and (rising["groups"] or rising["stories"])
+            ):
+                rising = {
+                    **rising,
+                    "alert": get_velocity_engine().claim_alert(rising["seq"]),
+                }
             send_to_webhooks(
                 stats,
                 failed_ids or [],
@@ -263,6 +359,9 @@ class NewsAnalyzer:
                 self.update_info,
                 self.proxy_url,
                 mode=mode,
+                session_pool=self.session_pool,
+                classification=self.title_classification,
+                rising=rising,
             )
             return True
         elif CONFIG["ENABLE_NOTIFICATION"] and not has_webhook:
@@ -377,7 +476,7 @@ class NewsAnalyzer:
         print(f"报告模式: {self.report_mode}")
         print(f"运行模式: {mode_strategy['description']}")
 
-    def _crawl_data(self) -> Tuple[Dict, Dict, List]:
+    def _crawl_data(self) -> Tuple[Dict, Dict, List, str]:
         """执行数据爬取"""
 
         print(
@@ -389,21 +488,118 @@ class NewsAnalyzer:
         results, id_to_name, failed_ids = self.data_fetcher.crawl_websites(
             CONFIG["PLATFORMS"], self.request_interval
         )
+        self._observe_polling(results, failed_ids)
 
-        title_file = save_titles_to_file(results, id_to_name, failed_ids)
-        print(f"标题已保存到: {title_file}")
+        time_info = save_crawl_results(results, id_to_name, failed_ids)
 
-        return results, id_to_name, failed_ids
+        return results, id_to_name, failed_ids, time_info
+
+    def _observe_polling(self, results: Dict, failed_ids: List) -> None:
+        """完整抓取同样计入各平台的轮询状态（需在保存批次之前调用）"""
+        if not CONFIG["POLLING"]["ENABLED"]:
+            return
+        try:
+            get_poll_scheduler().observe(CONFIG["PLATFORMS"], results, failed_ids)
+        except Exception as e:
+            print(f"轮询状态更新失败: {e}")
+
+    def poll(self) -> int:
+        """轮询到期的平台并保存为部分批次（不生成报告），返回抓取的平台数
+
+        daemon 模式在两次完整执行之间调用，新增标题在下一次完整执行时一并判定。
+        """
+        platforms = get_poll_scheduler().due_platforms(CONFIG["PLATFORMS"])
+        if not platforms:
+            return 0
+
+        print(f"轮询平台: {[p.get('name', p['id']) for p in platforms]}")
+        results, id_to_name, failed_ids = self.data_fetcher.crawl_websites(
+            platforms, self.request_interval
+        )
+        self._observe_polling(results, failed_ids)
+        save_crawl_results(results, id_to_name, failed_ids, partial=True)
+        return len(platforms)
+
+    def _stage_platform(
+        self, prepared_rows: Dict, source_id: str, platform_results: Dict
+    ) -> None:
+        """单个平台到达后即可完成的下游工作：生成待写入的标题行，预先完成标题分类"""
+        prepared_rows[source_id] = prepare_title_rows(source_id, platform_results)
+        self.title_classification.classify_results({source_id: platform_results})
+
+    async def _run_async_pipeline(self, mode_strategy: Dict) -> Optional[str]:
+        """异步流水线：抓取 → 解析 → 持久化 → 分析 → 通知
+
+        各平台结果经队列逐个交给下游，到达后立即生成持久化所需的行并完成标题分类，
+        慢的数据源只推迟最后的批次写入、汇总和通知，不再拖住其他平台的处理。
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        print(
+            f"配置的监控平台: {[p.get('name', p['id']) for p in CONFIG['PLATFORMS']]}"
+        )
+        print("开始异步爬取数据，各平台结果到达后立即进入持久化和分类")
+        ensure_directory_exists("output")
+
+        word_groups, filter_words = load_frequency_words()
+        self.title_classification = get_title_classification(
+            word_groups, filter_words, self.title_classification
+        )
+        prepared_rows: Dict = {}
+        queue: "asyncio.Queue" = asyncio.Queue()
+
+        async def consume() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                source_id, platform_results = item
+                if platform_results is not None:
+                    await loop.run_in_executor(
+                        None, self._stage_platform, prepared_rows, source_id, platform_results
+                    )
+
+        consumer = asyncio.ensure_future(consume())
+        try:
+            results, id_to_name, failed_ids = await self.data_fetcher.crawl_websites_async(
+                CONFIG["PLATFORMS"], queue
+            )
+        finally:
+            await consumer
+        await loop.run_in_executor(None, self._observe_polling, results, failed_ids)
+
+        time_info = await loop.run_in_executor(
+            None,
+            lambda: save_crawl_results(
+                results, id_to_name, failed_ids, prepared_rows=prepared_rows
+            ),
+        )
+
+        return await loop.run_in_executor(
+            None,
+            self._execute_mode_strategy,
+            mode_strategy,
+            results,
+            id_to_name,
+            failed_ids,
+            time_info,
+        )
 
     def _execute_mode_strategy(
-        self, mode_strategy: Dict, results: Dict, id_to_name: Dict, failed_ids: List
+        self,
+        mode_strategy: Dict,
+        results: Dict,
+        id_to_name: Dict,
+        failed_ids: List,
+        time_info: str,
     ) -> Optional[str]:
         """执行模式特定逻辑"""
         # 获取当前监控平台ID列表
         current_platform_ids = [platform["id"] for platform in CONFIG["PLATFORMS"]]
 
         new_titles = detect_latest_new_titles(current_platform_ids)
-        time_info = Path(save_titles_to_file(results, id_to_name, failed_ids)).stem
         word_groups, filter_words = load_frequency_words()
 
         # current模式下，实时推送需要使用完整的历史数据来保证统计信息的完整性
@@ -574,16 +770,43 @@ class NewsAnalyzer:
         print(f"无法自动打开浏览器，请手动打开文件: {file_path}")
         print(f"文件绝对路径: {Path(file_path).resolve()}")
 
+    def _report_connection_stats(self) -> None:
+        """输出HTTP连接复用统计"""
+        stats = self.session_pool.get_stats()
+        print(
+            f"HTTP连接统计: {stats['hosts']} 个主机，{stats['requests']} 次请求，"
+            f"新建连接 {stats['opened']}，复用连接 {stats['reused']}"
+        )
+
     def run(self) -> None:
-        """执行分析流程"""
+        """执行分析流程
+
+        守护进程模式下同一实例会被反复调用：HTTP 连接池和当天的标题分类结果跨轮复用，
+        本轮的上升信号在开始时清空。
+        """
+        self.rising_signals = None
+        # 跨天后丢弃前一天的分类结果，常驻进程中缓存只保留当天出现过的标题
+        today = format_date_folder()
+        if today != self._classification_date:
+            self.title_classification = None
+            self._classification_date = today
         try:
             self._initialize_and_check_config()
 
             mode_strategy = self._get_mode_strategy()
 
-            results, id_to_name, failed_ids = self._crawl_data()
+            if CONFIG["ASYNC_PIPELINE"]:
+                import asyncio
+
+                asyncio.run(self._run_async_pipeline(mode_strategy))
+            else:
+                results, id_to_name, failed_ids, time_info = self._crawl_data()
+
+                self._execute_mode_strategy(
+                    mode_strategy, results, id_to_name, failed_ids, time_info
+                )
 
-            self._execute_mode_strategy(mode_strategy, results, id_to_name, failed_ids)
+            self._report_connection_stats()
 
         except Exception as e:
             print(f"分析流程执行出错: {e}")
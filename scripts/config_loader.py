@@ -1,19 +1,37 @@
-﻿import os
-import yaml
+﻿import hashlib
+import os
+import pickle
+import threading
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, Optional
 
 
-def load_config():
-    config_path = os.environ.get("CONFIG_PATH", "config/config.yaml")
+CONFIG_CACHE_DIR = Path("output/.cache/config")
+# 缓存格式变化时递增；缓存键同时包含本模块源码的哈希，解析逻辑变化时旧缓存自动失效
+CONFIG_CACHE_VERSION = 1
 
-    if not Path(config_path).exists():
-        raise FileNotFoundError(f"配置文件 {config_path} 不存在")
+# 可由环境变量覆盖的 Webhook 配置：配置键 -> (环境变量, 配置文件中的键)
+WEBHOOK_ENV_OVERRIDES = {
+    "FEISHU_WEBHOOK_URL": ("FEISHU_WEBHOOK_URL", "feishu_url"),
+    "DINGTALK_WEBHOOK_URL": ("DINGTALK_WEBHOOK_URL", "dingtalk_url"),
+    "WEWORK_WEBHOOK_URL": ("WEWORK_WEBHOOK_URL", "wework_url"),
+    "TELEGRAM_BOT_TOKEN": ("TELEGRAM_BOT_TOKEN", "telegram_bot_token"),
+    "TELEGRAM_CHAT_ID": ("TELEGRAM_CHAT_ID", "telegram_chat_id"),
+}
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        config_data = yaml.safe_load(f)
 
-    print(f"配置文件加载成功: {config_path}")
+def parse_config_file(content: bytes) -> Dict:
+    """解析 YAML 配置，安装了 libyaml 时使用 C 实现的 CSafeLoader"""
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content.decode("utf-8"), Loader=loader)
+
 
+def build_config(config_data: Dict) -> Dict:
+    """校验并规范化配置文件内容（不读取环境变量、不修改 config_data）"""
     # 检查模式
     mode = config_data["platforms"].get("mode", "realtime")
     if mode not in ["realtime", "hot"]:
@@ -41,10 +59,15 @@ def load_config():
         headers = source_config.get(headers_key, {})
         source_headers[source] = headers
 
-        # 为每个平台添加数据源类型
+        # 为每个平台添加数据源类型（复制，不修改解析结果）
         for platform in platforms_list:
-            platform["source"] = source
-            all_platforms.append(platform)
+            all_platforms.append({**platform, "source": source})
+
+    # 请求限流配置（未配置时按 request_interval 推算每秒请求数）
+    rate_limit = config_data["crawler"].get("rate_limit") or {}
+    http_pool = config_data["crawler"].get("http_pool") or {}
+    http_cache = config_data["crawler"].get("http_cache") or {}
+    request_interval = config_data["crawler"]["request_interval"]
 
     # 构建配置
     config = {
@@ -54,14 +77,46 @@ def load_config():
         "REQUEST_MIN_INTERVAL": config_data["crawler"]["request_min_interval"],
         "REQUEST_MAX_INTERVAL": config_data["crawler"]["request_max_interval"],
         "RECENT_DAYS": config_data["crawler"]["recent_days"],
+        "CONCURRENT_CRAWL": config_data["crawler"].get("concurrent_crawl", False),
+        "MAX_WORKERS": config_data["crawler"].get("max_workers", 3),
+        "PAGE_CONCURRENCY": config_data["crawler"].get("page_concurrency", 3),
+        "ASYNC_PIPELINE": config_data["crawler"].get("async_pipeline", False),
+        "HTML_PARSER": config_data["crawler"].get("html_parser", "auto"),
+        "RATE_LIMIT": {
+            "REQUESTS_PER_SECOND": rate_limit.get(
+                "requests_per_second", 1000 / max(1, request_interval)
+            ),
+            "BURST": rate_limit.get("burst", 1),
+            "JITTER": rate_limit.get("jitter", 0),
+            "HOSTS": rate_limit.get("hosts") or {},
+        },
+        "HTTP_POOL": {
+            "POOL_SIZE": http_pool.get("pool_size", 4),
+            "HOSTS": http_pool.get("hosts") or {},
+        },
+        "HTTP_CACHE": {
+            "ENABLED": http_cache.get("enabled", False),
+            "PATH": http_cache.get("path", "output/.cache/http"),
+            "MAX_SIZE_MB": http_cache.get("max_size_mb", 20),
+        },
         "REPORT_MODE": config_data["report"]["mode"],
         "RANK_THRESHOLD": config_data["report"]["rank_threshold"],
+        "DEDUP": {
+            "ENABLED": config_data["report"].get("dedup", {}).get("enabled", False),
+            "THRESHOLD": config_data["report"].get("dedup", {}).get(
+                "similarity_threshold", 0.6
+            ),
+            "NGRAM": config_data["report"].get("dedup", {}).get("ngram", 2),
+        },
         "USE_PROXY": config_data["crawler"]["use_proxy"],
         "DEFAULT_PROXY": config_data["crawler"]["default_proxy"],
         "ENABLE_CRAWLER": config_data["crawler"]["enable_crawler"],
         "ENABLE_NOTIFICATION": config_data["notification"]["enable_notification"],
         "MESSAGE_BATCH_SIZE": config_data["notification"]["message_batch_size"],
         "BATCH_SEND_INTERVAL": config_data["notification"]["batch_send_interval"],
+        "MAX_TITLES_PER_GROUP": config_data["notification"].get(
+            "max_titles_per_group", 0
+        ),
         "FEISHU_MESSAGE_SEPARATOR": config_data["notification"][
             "feishu_message_separator"
         ],
@@ -70,47 +125,73 @@ def load_config():
             "FREQUENCY_WEIGHT": config_data["weight"]["frequency_weight"],
             "HOTNESS_WEIGHT": config_data["weight"]["hotness_weight"],
         },
+        "STORAGE": {
+            "PATH": config_data.get("storage", {}).get("path", "output/trendradar.db"),
+            "TXT_EXPORT": config_data.get("storage", {}).get("txt_export", False),
+            "NEW_TITLE_WINDOW_DAYS": config_data.get("storage", {}).get(
+                "new_title_window_days", 1
+            ),
+        },
+        "HISTORY": {
+            "ENABLED": config_data.get("history", {}).get("enabled", False),
+            "RETENTION_DAYS": config_data.get("history", {}).get("retention_days", 180),
+            "TREND_WINDOW_DAYS": config_data.get("history", {}).get(
+                "trend_window_days", 7
+            ),
+        },
+        "VELOCITY": {
+            "ENABLED": config_data.get("velocity", {}).get("enabled", False),
+            "EWMA_ALPHA": config_data.get("velocity", {}).get("ewma_alpha", 0.3),
+            "Z_THRESHOLD": config_data.get("velocity", {}).get("z_threshold", 3.0),
+            "MIN_SAMPLES": config_data.get("velocity", {}).get("min_samples", 6),
+            "MIN_VALUE": config_data.get("velocity", {}).get("min_value", 3),
+            "MIN_STD": config_data.get("velocity", {}).get("min_std", 1.0),
+            "ALERT": config_data.get("velocity", {}).get("alert", False),
+            "BURST_ONLY_PUSH": config_data.get("velocity", {}).get(
+                "burst_only_push", False
+            ),
+        },
+        "POLLING": {
+            "ENABLED": config_data.get("polling", {}).get("enabled", False),
+            "MIN_INTERVAL": config_data.get("polling", {}).get("min_interval", 5),
+            "MAX_INTERVAL": config_data.get("polling", {}).get("max_interval", 120),
+            "BASE_INTERVAL": config_data.get("polling", {}).get("base_interval", 30),
+            "CHURN_ALPHA": config_data.get("polling", {}).get("churn_alpha", 0.3),
+        },
         "PLATFORMS": all_platforms,
         "SOURCE_HEADERS": source_headers,
     }
 
-    # Webhook配置（环境变量优先）
-    notification = config_data.get("notification", {})
-    webhooks = notification.get("webhooks", {})
-
-    config["FEISHU_WEBHOOK_URL"] = os.environ.get(
-        "FEISHU_WEBHOOK_URL", ""
-    ).strip() or webhooks.get("feishu_url", "")
-    config["DINGTALK_WEBHOOK_URL"] = os.environ.get(
-        "DINGTALK_WEBHOOK_URL", ""
-    ).strip() or webhooks.get("dingtalk_url", "")
-    config["WEWORK_WEBHOOK_URL"] = os.environ.get(
-        "WEWORK_WEBHOOK_URL", ""
-    ).strip() or webhooks.get("wework_url", "")
-    config["TELEGRAM_BOT_TOKEN"] = os.environ.get(
-        "TELEGRAM_BOT_TOKEN", ""
-    ).strip() or webhooks.get("telegram_bot_token", "")
-    config["TELEGRAM_CHAT_ID"] = os.environ.get(
-        "TELEGRAM_CHAT_ID", ""
-    ).strip() or webhooks.get("telegram_chat_id", "")
+    # Webhook配置（配置文件中的值，环境变量在 apply_env_overrides 中覆盖）
+    webhooks = config_data.get("notification", {}).get("webhooks", {})
+    for key, (_, file_key) in WEBHOOK_ENV_OVERRIDES.items():
+        config[key] = webhooks.get(file_key, "")
+
+    return config
+
+
+def apply_env_overrides(config: Dict) -> Dict:
+    """用环境变量覆盖 Webhook 配置（环境变量优先），返回新的配置字典"""
+    config = dict(config)
+    sources = {}
+    for key, (env_name, _) in WEBHOOK_ENV_OVERRIDES.items():
+        env_value = os.environ.get(env_name, "").strip()
+        if env_value:
+            config[key] = env_value
+        sources[key] = "环境变量" if os.environ.get(env_name) else "配置文件"
 
     # 输出配置来源信息
     webhook_sources = []
     if config["FEISHU_WEBHOOK_URL"]:
-        source = "环境变量" if os.environ.get("FEISHU_WEBHOOK_URL") else "配置文件"
-        webhook_sources.append(f"飞书({source})")
+        webhook_sources.append(f"飞书({sources['FEISHU_WEBHOOK_URL']})")
     if config["DINGTALK_WEBHOOK_URL"]:
-        source = "环境变量" if os.environ.get("DINGTALK_WEBHOOK_URL") else "配置文件"
-        webhook_sources.append(f"钉钉({source})")
+        webhook_sources.append(f"钉钉({sources['DINGTALK_WEBHOOK_URL']})")
     if config["WEWORK_WEBHOOK_URL"]:
-        source = "环境变量" if os.environ.get("WEWORK_WEBHOOK_URL") else "配置文件"
-        webhook_sources.append(f"企业微信({source})")
+        webhook_sources.append(f"企业微信({sources['WEWORK_WEBHOOK_URL']})")
     if config["TELEGRAM_BOT_TOKEN"] and config["TELEGRAM_CHAT_ID"]:
-        token_source = (
-            "环境变量" if os.environ.get("TELEGRAM_BOT_TOKEN") else "配置文件"
+        webhook_sources.append(
+            f"Telegram({sources['TELEGRAM_BOT_TOKEN']}/{sources['TELEGRAM_CHAT_ID']})"
         )
-        chat_source = "环境变量" if os.environ.get("TELEGRAM_CHAT_ID") else "配置文件"
-        webhook_sources.append(f"Telegram({token_source}/{chat_source})")
 
     if webhook_sources:
         print(f"Webhook 配置来源: {', '.join(webhook_sources)}")
@@ -120,7 +201,127 @@ def load_config():
     return config
 
 
-# 全局配置变量
-print("正在加载配置...")
-CONFIG = load_config()
-print(f"监控平台数量: {len(CONFIG['PLATFORMS'])}")
\ No newline at end of file
+def _config_cache_key(content: bytes) -> str:
+    digest = hashlib.sha256(content)
+    digest.update(Path(__file__).read_bytes())
+    return f"{digest.hexdigest()}.v{CONFIG_CACHE_VERSION}"
+
+
+def _load_cached_config(cache_key: str) -> Optional[Dict]:
+    cache_path = CONFIG_CACHE_DIR / f"{cache_key}.pickle"
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            config = pickle.load(f)
+    except Exception as e:
+        print(f"配置缓存读取失败，将重新解析: {e}")
+        return None
+    return config if isinstance(config, dict) else None
+
+
+def _store_cached_config(cache_key: str, config: Dict) -> None:
+    cache_path = CONFIG_CACHE_DIR / f"{cache_key}.pickle"
+    try:
+        CONFIG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"配置缓存写入失败: {e}")
+
+
+def load_config():
+    """加载配置：按 文件内容哈希 复用已校验、规范化的缓存，未命中时解析 YAML
+
+    校验失败的配置不会写入缓存，错误与直接解析时一致；环境变量每次加载时覆盖。
+    """
+    config_path = os.environ.get("CONFIG_PATH", "config/config.yaml")
+
+    if not Path(config_path).exists():
+        raise FileNotFoundError(f"配置文件 {config_path} 不存在")
+
+    content = Path(config_path).read_bytes()
+    cache_key = _config_cache_key(content)
+    config = _load_cached_config(cache_key)
+    if config is None:
+        config = build_config(parse_config_file(content))
+        _store_cached_config(cache_key, config)
+
+    print(f"配置文件加载成功: {config_path}")
+
+    return apply_env_overrides(config)
+
+
+def freeze(value: Any) -> Any:
+    """递归转换为只读结构：dict → MappingProxyType，list → tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class LazyConfig(Mapping):
+    """只读的全局配置，首次访问时才读取配置文件
+
+    导入模块不再触发配置解析；需要修改配置时应修改配置文件或环境变量，
+    常驻进程通过 reload() 整体替换为新配置（单次引用赋值，读取方不会看到半更新的配置）。
+    """
+
+    def __init__(self, loader: Callable[[], Dict]):
+        self._loader = loader
+        self._data: Optional[Mapping] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Mapping:
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    print("正在加载配置...")
+                    self._data = freeze(self._loader())
+                    print(f"监控平台数量: {len(self._data['PLATFORMS'])}")
+                data = self._data
+        return data
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def snapshot(self) -> Mapping:
+        """当前配置的只读快照，多个配置项需要保持一致时使用"""
+        return self._load()
+
+    def reload(self) -> bool:
+        """重新加载配置并原子替换，返回配置是否变化；加载失败时保留当前配置"""
+        try:
+            data = freeze(self._loader())
+        except Exception as e:
+            print(f"配置重新加载失败，继续使用当前配置: {e}")
+            return False
+        with self._lock:
+            changed = data != self._data
+            self._data = data
+        if changed:
+            print(f"配置已重新加载，监控平台数量: {len(data['PLATFORMS'])}")
+        return changed
+
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        if self._data is None:
+            return "LazyConfig(<未加载>)"
+        return f"LazyConfig({dict(self._data)!r})"
+
+
+# 全局配置变量（首次访问时加载）
+CONFIG = LazyConfig(load_config)
\ No newline at end of file
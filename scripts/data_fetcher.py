@@ -1,20 +1,99 @@
-﻿import json
-import time
+﻿import time
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 from .config_loader import CONFIG
+from .html_parser import parse_tophub_items, parse_zqrb_items, resolve_parser_backend
+from .http_cache import HttpCache
+from .http_pool import HttpSessionPool
+from .models import TitleRecord, intern_text
+from .rate_limiter import HostRateLimiter
 from .utils import clean_title
 
+if TYPE_CHECKING:
+    import asyncio
+
+    import requests
+
+
+# 各数据源对应的主机，用于并发爬取时按主机分组
+SOURCE_HOSTS = {
+    "newsnow": "newsnow.busiyi.world",
+    "tophub": "tophub.today",
+    "zqrb": "search.zqrb.cn",
+}
+
 
 class DataFetcher:
-    def __init__(self, proxy_url: Optional[str] = None):
+    def __init__(
+            self,
+            proxy_url: Optional[str] = None,
+            rate_limiter: Optional[HostRateLimiter] = None,
+            session_pool: Optional[HttpSessionPool] = None,
+            http_cache: Optional[HttpCache] = None,
+    ):
         self.proxy_url = proxy_url
+        self.rate_limiter = rate_limiter or HostRateLimiter.from_config(
+            CONFIG["RATE_LIMIT"]
+        )
+        self.session_pool = session_pool or HttpSessionPool.from_config(proxy_url)
+        self.html_parser = resolve_parser_backend(CONFIG["HTML_PARSER"])
+        self.http_cache = http_cache or HttpCache.from_config()
+
+    def _http_get(self, url: str, **kwargs) -> "requests.Response":
+        """按主机限流发送GET请求（复用会话池连接），并记录429/Retry-After响应"""
+        self.rate_limiter.acquire(url)
+        response = self.session_pool.get(url, **kwargs)
+        self.rate_limiter.observe(url, response)
+        return response
+
+    def _fetch_parsed(
+            self,
+            url: str,
+            parse: Callable[["requests.Response"], List[Dict]],
+            use_cache: bool = True,
+            cache_variant: str = "",
+            **kwargs,
+    ) -> List[Dict]:
+        """获取并解析响应；启用缓存时发送条件请求，内容未变化则复用上次的解析结果"""
+        if self.http_cache is None or not use_cache:
+            response = self._http_get(url, **kwargs)
+            response.raise_for_status()
+            return parse(response)
+
+        key = self.http_cache.make_key(url, kwargs.get("params"), cache_variant)
+        base_headers = kwargs.pop("headers", None) or {}
+        headers = {**base_headers, **self.http_cache.conditional_headers(key)}
+
+        response = self._http_get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            items = self.http_cache.get_not_modified(key)
+            if items is not None:
+                return items
+            # 缓存条目已被淘汰，改为无条件请求（保留调用方的请求头）
+            return self._fetch_parsed(url, parse, False, headers=base_headers, **kwargs)
+
+        response.raise_for_status()
+        body_hash = self.http_cache.hash_body(response.content)
+        items = self.http_cache.get_unchanged(key, body_hash)
+        if items is None:
+            items = parse(response)
+        self.http_cache.store(key, response.headers, body_hash, items)
+        return items
+
+    def _finish_crawl(self) -> None:
+        """爬取结束后持久化HTTP缓存"""
+        if self.http_cache is None:
+            return
+        try:
+            self.http_cache.save()
+            print(self.http_cache.get_summary())
+        except Exception as e:
+            print(f"HTTP缓存保存失败: {e}")
 
-    def fetch_newsnow_data(self, platform_config: dict) -> Optional[str]:
+    def fetch_newsnow_data(self, platform_config: dict) -> Optional[List[Dict]]:
         """获取NewsNow数据"""
         try:
             id_value = platform_config["id"]
@@ -34,37 +113,43 @@ class DataFetcher:
             }
             base_headers.update(headers)
 
-            proxies = None
-            if self.proxy_url:
-                proxies = {"http": self.proxy_url, "https": self.proxy_url}
+            response_status = {}
 
-            response = requests.get(
-                url, proxies=proxies, headers=base_headers, timeout=10
-            )
-            response.raise_for_status()
+            def parse_response(response: "requests.Response") -> List[Dict]:
+                data_json = response.json()
 
-            data_text = response.text
-            data_json = json.loads(data_text)
+                status = data_json.get("status", "未知")
+                if status not in ["success", "cache"]:
+                    raise ValueError(f"响应状态异常: {status}")
 
-            status = data_json.get("status", "未知")
-            if status not in ["success", "cache"]:
-                raise ValueError(f"响应状态异常: {status}")
+                response_status["status"] = status
+                return data_json.get("items", [])
 
-            status_info = "最新数据" if status == "success" else "缓存数据"
+            items = self._fetch_parsed(
+                url,
+                parse_response,
+                use_cache=platform_config.get("cache", True),
+                headers=base_headers,
+                timeout=10,
+            )
+
+            status = response_status.get("status")
+            if status == "success":
+                status_info = "最新数据"
+            elif status == "cache":
+                status_info = "缓存数据"
+            else:
+                status_info = "内容未变化"
             print(f"获取 {id_value} 成功（{status_info}）")
-            return data_text
+            return items
 
         except Exception as e:
             print(f"NewsNow请求失败: {e}")
             return None
 
-    def fetch_tophub_data(self, platform_config: dict) -> Optional[str]:
+    def fetch_tophub_data(self, platform_config: dict) -> Optional[List[Dict]]:
         """获取Tophub数据，支持多页和任意请求参数"""
         try:
-            request_interval = CONFIG["REQUEST_INTERVAL"] / 1000
-            request_min_interval = CONFIG["REQUEST_MIN_INTERVAL"] / 1000
-            request_max_interval = CONFIG["REQUEST_MAX_INTERVAL"] / 1000
-
             category = platform_config.get("category", "news")
             id = platform_config.get("id", "news")
 
@@ -95,41 +180,29 @@ class DataFetcher:
             }
             base_headers.update(headers)
 
-            proxies = None
-            if self.proxy_url:
-                proxies = {"http": self.proxy_url, "https": self.proxy_url}
-
-            all_items = []
-            for idx, current_page in enumerate(pages, 1):
+            def fetch_page(current_page) -> List[Dict]:
                 # 构建最终请求参数
                 params = base_params.copy()
                 params["p"] = current_page  # 确保页码参数正确
 
                 url = f"https://tophub.today/c/{category}"
-                response = requests.get(
+                return self._fetch_parsed(
                     url,
+                    lambda response: self.parse_tophub_html(response.text),
+                    use_cache=platform_config.get("cache", True),
                     params=params,
                     headers=base_headers,
-                    proxies=proxies,
                     timeout=15
                 )
-                response.raise_for_status()
 
-                # 解析并收集数据
-                page_result = json.loads(self.parse_tophub_html(response.text))
-                items = page_result.get("items", [])
+            # 各页并发请求，按页码顺序收集数据
+            all_items = []
+            for current_page, items in self._fetch_pages(list(pages), fetch_page):
                 all_items.extend(items)
                 print(f"今日热榜: {id} 第 {current_page} 页抓取成功，共 {len(items)} 条")
 
-                # 非最后一页随机等待
-                if idx < len(pages):
-                    wait_sec = random.uniform(request_min_interval, request_max_interval)
-                    print(f"等待 {wait_sec:.2f} 秒后继续下一页...")
-                    time.sleep(wait_sec)
-
             # 返回合并结果
-            result = {"status": "success", "items": all_items}
-            return json.dumps(result)
+            return all_items
 
         except Exception as e:
             print(f"今日热榜 请求失败: {e}")
@@ -183,71 +256,41 @@ class DataFetcher:
     #         print(f"Tophub请求失败: {e}")
     #         return None
 
-    def parse_tophub_html(self, html_content: str) -> str:
-        """解析Tophub HTML内容"""
-        from bs4 import BeautifulSoup
-        import re
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        result = {"status": "success", "items": []}
-
-        # 查找所有新闻源卡片
-        cards = soup.find_all('div', class_='cc-cd')
-
-        for card in cards:
-            # 提取新闻源信息
-            source_name = ""
-            source_link = card.find('a')
-            if source_link:
-                source_name_div = source_link.find('div', class_='cc-cd-lb')
-                if source_name_div:
-                    source_name = source_name_div.get_text(strip=True)
-
-            # 提取时间信息
-            time_info_div = card.find('div', class_='cc-cd-if')
-            time_text = ""
-            if time_info_div:
-                time_span = time_info_div.find('span')
-                if time_span:
-                    time_text = time_span.get_text(strip=True)
-
-            # 提取新闻条目
-            news_items = card.find('div', class_='cc-cd-cb-l')
-            if not news_items:
-                continue
-
-            items = news_items.find_all('a', rel='nofollow')
-            for i, item in enumerate(items, 1):
-                # 提取排名
-                rank_span = item.find('span', class_='s')
-                if rank_span:
-                    # 清理排名中的特殊字符
-                    rank_text = re.sub(r'\D', '', rank_span.get_text(strip=True))
-                    rank = int(rank_text) if rank_text.isdigit() else i
-                else:
-                    rank = i
-
-                # 提取标题
-                title_span = item.find('span', class_='t')
-                title = title_span.get_text(strip=True) if title_span else "无标题"
-
-                # 提取URL
-                url = item.get('href', '')
-
-                # 添加到结果
-                result["items"].append({
-                    "title": title,
-                    "url": url,
-                    "mobileUrl": url,
-                    "rank": rank,
-                    "source": source_name,
-                    # 注意,不能在这里添加date,否则会影响去重效果
-                    # "date": time_text,
-                })
+    def _fetch_pages(
+            self,
+            pages: List,
+            fetch_page: Callable[..., List[Dict]],
+            stop_on_empty: bool = False,
+    ) -> List[Tuple[object, List[Dict]]]:
+        """并发获取同一平台的多个分页，按页码顺序返回 (页码, 条目列表)
+
+        请求节奏仍受按主机限流器约束；stop_on_empty 为 True 时，
+        遇到无结果的分页即取消其后尚未完成的分页请求。
+        """
+        if len(pages) <= 1:
+            return [(page, fetch_page(page)) for page in pages]
+
+        page_results = []
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(len(pages), CONFIG["PAGE_CONCURRENCY"]))
+        )
+        try:
+            futures = [executor.submit(fetch_page, page) for page in pages]
+            for page, future in zip(pages, futures):
+                items = future.result()
+                page_results.append((page, items))
+                if stop_on_empty and not items:
+                    break
+        finally:
+            # 提前停止或出错时，取消尚未开始的分页请求
+            executor.shutdown(wait=False, cancel_futures=True)
+        return page_results
 
-        return json.dumps(result)
+    def parse_tophub_html(self, html_content: str) -> List[Dict]:
+        """解析Tophub HTML内容"""
+        return parse_tophub_items(html_content, self.html_parser)
 
-    def fetch_zqrb_data(self, platform_config: dict) -> Optional[str]:
+    def fetch_zqrb_data(self, platform_config: dict) -> Optional[List[Dict]]:
         """获取证券日报网数据，支持时间过滤"""
         try:
             # 获取配置参数
@@ -273,12 +316,7 @@ class DataFetcher:
             }
             base_headers.update(headers)
 
-            proxies = None
-            if self.proxy_url:
-                proxies = {"http": self.proxy_url, "https": self.proxy_url}
-
-            all_items = []
-            for page in range(1, pages + 1):
+            def fetch_page(page: int) -> List[Dict]:
                 # 构建URL
                 url = f"http://search.zqrb.cn/search.php"
                 params = {
@@ -289,32 +327,31 @@ class DataFetcher:
                     "p": page
                 }
 
-                response = requests.get(
+                # 解析HTML并过滤时间（过滤结果与截止日期相关，缓存按日期区分）
+                return self._fetch_parsed(
                     url,
+                    lambda response: self.parse_zqrb_html(response.text, cutoff_date),
+                    use_cache=platform_config.get("cache", True),
+                    cache_variant=cutoff_date.strftime("%Y-%m-%d") if cutoff_date else "",
                     params=params,
                     headers=base_headers,
-                    proxies=proxies,
                     timeout=15
                 )
-                response.raise_for_status()
 
-                # 解析HTML并过滤时间
-                items = self.parse_zqrb_html(response.text, cutoff_date)
+            # 各页并发请求；某页没有符合时间条件的新闻时，取消其后的分页
+            all_items = []
+            page_results = self._fetch_pages(
+                list(range(1, pages + 1)), fetch_page, stop_on_empty=recent_days > 0
+            )
+            for page, items in page_results:
                 all_items.extend(items)
                 print(f"证券日报网: {keyword} 第 {page} 页抓取成功，共 {len(items)} 条")
 
-                # 如果没有符合时间条件的新闻，提前停止
                 if recent_days > 0 and len(items) == 0:
                     print(f"第 {page} 页没有符合时间条件的新闻，停止抓取")
-                    break
-
-                # 页间延迟
-                if page < pages:
-                    time.sleep(random.uniform(1, 2))
 
             # 返回结果
-            result = {"status": "success", "items": all_items}
-            return json.dumps(result)
+            return all_items
 
         except Exception as e:
             print(f"证券日报网请求失败: {e}")
@@ -322,65 +359,7 @@ class DataFetcher:
 
     def parse_zqrb_html(self, html_content: str, cutoff_date: Optional[datetime] = None) -> List[Dict]:
         """解析证券日报网HTML内容，支持时间过滤"""
-        from bs4 import BeautifulSoup
-        import re
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        items = []
-
-        # 查找搜索结果项
-        result_list = soup.find('dl', class_='result-list')
-        if not result_list:
-            return items
-
-        # 提取每个结果项
-        for idx, dt_item in enumerate(result_list.find_all('dt'), 1):
-            # 标题和链接
-            link = dt_item.find('a')
-            if not link:
-                continue
-
-            title = link.get_text(strip=True)
-            url = link.get('href', '')
-
-            # 清理标题中的HTML标签
-            title = re.sub(r'<[^>]+>', '', title)
-
-            # 获取时间信息（从相邻的dd元素）
-            time_str = None
-            dd_item = dt_item.find_next_sibling('dd')
-            if dd_item:
-                time_info = dd_item.find('p', class_='field-info')
-                if time_info:
-                    time_match = re.search(r'时间:(\d{4}年\d{1,2}月\d{1,2}日)', time_info.get_text())
-                    if time_match:
-                        time_str = time_match.group(1)
-
-            # 转换时间格式
-            news_date = None
-            if time_str:
-                try:
-                    # 将中文日期转换为标准格式
-                    time_str = time_str.replace('年', '-').replace('月', '-').replace('日', '')
-                    news_date = datetime.strptime(time_str, "%Y-%m-%d")
-                except Exception:
-                    pass
-
-            # 时间过滤
-            if cutoff_date and news_date and news_date < cutoff_date:
-                continue  # 跳过过时的新闻
-
-            # 添加到结果
-            items.append({
-                "title": title,
-                "url": url,
-                "mobileUrl": url,  # 使用相同URL
-                "rank": idx,
-                "source": "证券日报网",
-                "date": news_date.strftime("%Y-%m-%d") if news_date else "未知"
-            })
-
-        return items
+        return parse_zqrb_items(html_content, cutoff_date, self.html_parser)
 
     def fetch_data(
             self,
@@ -388,8 +367,8 @@ class DataFetcher:
             max_retries: int = 2,
             min_retry_wait: int = 3,
             max_retry_wait: int = 5,
-    ) -> Tuple[Optional[str], str, str]:
-        """获取指定平台数据，支持重试"""
+    ) -> Tuple[Optional[List[Dict]], str, str]:
+        """获取指定平台数据（新闻条目列表），支持重试"""
         # 获取平台标识
         source_id = platform_config["id"]
         alias = platform_config.get("name", source_id)
@@ -405,7 +384,7 @@ class DataFetcher:
                 else:
                     response_data = self.fetch_newsnow_data(platform_config)
 
-                if response_data:
+                if response_data is not None:
                     return response_data, source_id, alias
                 else:
                     raise ValueError("未获取到有效响应数据")
@@ -422,55 +401,150 @@ class DataFetcher:
 
         return None, source_id, alias
 
-    def crawl_websites(
-            self,
-            platforms_config: List[dict],
-            request_interval: int = CONFIG["REQUEST_INTERVAL"],
+    @staticmethod
+    def get_platform_host(platform_config: dict) -> str:
+        """获取平台对应的请求主机"""
+        source_type = platform_config.get("source", "newsnow")
+        return SOURCE_HOSTS.get(source_type, source_type)
+
+    def _fetch_platform(self, platform_config: dict) -> Optional[Dict]:
+        """获取并解析单个平台数据，失败时返回None"""
+        items, source_id, _ = self.fetch_data(platform_config)
+        if items is None:
+            return None
+        return self._merge_platform_items(source_id, items)
+
+    def _merge_platform_items(self, source_id: str, items: List[Dict]) -> Optional[Dict]:
+        """将新闻条目列表合并为 {标题: 数据} 结构，失败时返回None"""
+        try:
+            platform_results = {}
+            for item in items:
+                title = item["title"]
+                url = item.get("url", "")
+                mobile_url = item.get("mobileUrl", "")
+                rank = item.get("rank", 1)
+                date = item.get("date", "")
+
+                if title in platform_results:
+                    platform_results[title].ranks.append(rank)
+                else:
+                    platform_results[intern_text(title)] = TitleRecord(
+                        [rank], url, mobile_url, date
+                    )
+            return platform_results
+        except Exception as e:
+            print(f"处理 {source_id} 数据出错: {e}")
+            return None
+
+    def _crawl_host_group(self, platforms_config: List[dict]) -> Dict[str, Optional[Dict]]:
+        """串行爬取同一主机下的平台，请求节奏由按主机限流器控制"""
+        outcomes = {}
+        for platform_config in platforms_config:
+            outcomes[platform_config["id"]] = self._fetch_platform(platform_config)
+        return outcomes
+
+    def _crawl_websites_concurrently(
+            self, platforms_config: List[dict]
+    ) -> Dict[str, Optional[Dict]]:
+        """按主机分组并发爬取：同一主机内串行，不同主机之间并行"""
+        host_groups = {}
+        for platform_config in platforms_config:
+            host = self.get_platform_host(platform_config)
+            host_groups.setdefault(host, []).append(platform_config)
+
+        max_workers = max(1, min(CONFIG["MAX_WORKERS"], len(host_groups)))
+        print(f"并发爬取: {len(host_groups)} 个主机，{max_workers} 个工作线程")
+
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._crawl_host_group, group)
+                for group in host_groups.values()
+            ]
+            for future in as_completed(futures):
+                outcomes.update(future.result())
+        return outcomes
+
+    @staticmethod
+    def _collect_outcomes(
+            platforms_config: List[dict], outcomes: Dict[str, Optional[Dict]]
     ) -> Tuple[Dict, Dict, List]:
-        """爬取多个网站数据"""
+        """按配置顺序汇总结果，保证各爬取模式的输出一致"""
         results = {}
         id_to_name = {}
         failed_ids = []
 
-        for i, platform_config in enumerate(platforms_config):
-            source_id = platform_config["id"]
+        for platform_config in platforms_config:
+            source_id = intern_text(platform_config["id"])
             name = platform_config.get("name", source_id)
 
             id_to_name[source_id] = name
-            response, _, _ = self.fetch_data(platform_config)
-
-            if response:
-                try:
-                    data = json.loads(response)
-                    results[source_id] = {}
-                    for item in data.get("items", []):
-                        title = item["title"]
-                        url = item.get("url", "")
-                        mobile_url = item.get("mobileUrl", "")
-                        rank = item.get("rank", 1)
-                        date = item.get("date", "")
-
-                        # 保留原有数据结构
-                        if title in results[source_id]:
-                            results[source_id][title]["ranks"].append(rank)
-                        else:
-                            results[source_id][title] = {
-                                "ranks": [rank],
-                                "url": url,
-                                "mobileUrl": mobile_url,
-                                "date": date,
-                            }
-                except Exception as e:
-                    print(f"处理 {source_id} 数据出错: {e}")
-                    failed_ids.append(source_id)
+            platform_results = outcomes.get(source_id)
+
+            if platform_results is not None:
+                results[source_id] = platform_results
             else:
                 failed_ids.append(source_id)
 
-            # 请求间隔控制
-            if i < len(platforms_config) - 1:
-                actual_interval = request_interval + random.randint(-10, 20)
-                actual_interval = max(50, actual_interval)
-                time.sleep(actual_interval / 1000)
-
         print(f"成功: {list(results.keys())}, 失败: {failed_ids}")
         return results, id_to_name, failed_ids
+
+    async def crawl_websites_async(
+            self, platforms_config: List[dict], queue: Optional["asyncio.Queue"] = None
+    ) -> Tuple[Dict, Dict, List]:
+        """异步爬取多个网站：请求和解析在抓取线程池中执行，合并在默认执行器中进行
+
+        传入 queue 时，每个平台完成后立即放入 (source_id, 合并结果或None)，
+        下游可以边抓取边处理，全部完成后放入 None 作为结束标记。
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        fetch_workers = max(1, min(len(platforms_config), CONFIG["MAX_WORKERS"] * 4))
+
+        try:
+            with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_executor:
+
+                async def crawl_platform(platform_config: dict):
+                    items, source_id, _ = await loop.run_in_executor(
+                        fetch_executor, self.fetch_data, platform_config
+                    )
+                    if items is None:
+                        return source_id, None
+
+                    platform_results = await loop.run_in_executor(
+                        None, self._merge_platform_items, source_id, items
+                    )
+                    return source_id, platform_results
+
+                outcomes = {}
+                tasks = [crawl_platform(config) for config in platforms_config]
+                for finished in asyncio.as_completed(tasks):
+                    source_id, platform_results = await finished
+                    outcomes[source_id] = platform_results
+                    if queue is not None:
+                        queue.put_nowait((source_id, platform_results))
+                    print(f"异步爬取进度: {len(outcomes)}/{len(platforms_config)}（{source_id}）")
+        finally:
+            if queue is not None:
+                queue.put_nowait(None)
+
+        self._finish_crawl()
+        return self._collect_outcomes(platforms_config, outcomes)
+
+    def crawl_websites(
+            self,
+            platforms_config: List[dict],
+            request_interval: Optional[int] = None,
+    ) -> Tuple[Dict, Dict, List]:
+        """爬取多个网站数据
+
+        request_interval 仅为兼容旧调用保留，请求间隔由 crawler.rate_limit 控制
+        """
+        if CONFIG["CONCURRENT_CRAWL"] and len(platforms_config) > 1:
+            outcomes = self._crawl_websites_concurrently(platforms_config)
+        else:
+            outcomes = self._crawl_host_group(platforms_config)
+
+        self._finish_crawl()
+        return self._collect_outcomes(platforms_config, outcomes)
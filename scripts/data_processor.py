@@ -1,10 +1,47 @@
 ﻿import os
 import re
+from itertools import chain
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Set, Union
-from .utils import clean_title, format_date_folder, format_time_filename, get_output_path, format_time_display, \
+from .utils import clean_title, format_time_filename, get_output_path, format_time_display, \
     is_first_crawl_today
 from .config_loader import CONFIG
+from .storage import get_repository
+from .frequency_rules import find_loaded_rules, load_frequency_rules
+from .word_matcher import WordGroupMatcher
+from .models import RankStats, SlotRecord, TitleRecord, TitleStats, intern_text
+from .title_dedup import cluster_titles
+
+
+def save_crawl_results(
+    results: Dict,
+    id_to_name: Dict,
+    failed_ids: List,
+    partial: bool = False,
+    prepared_rows: Optional[Dict] = None,
+) -> str:
+    """保存抓取结果到存储，按配置导出txt快照，返回本批次的时间标签
+
+    partial 为只抓取了部分平台的轮询批次，不导出txt快照；
+    prepared_rows 为异步流水线中各平台到达时已生成的标题行
+    """
+    time_info = format_time_filename()
+    run_id = get_repository().save_run(
+        results,
+        id_to_name,
+        failed_ids,
+        time_label=time_info,
+        partial=partial,
+        prepared_rows=prepared_rows,
+    )
+    print(f"抓取结果已保存到存储: 批次 {run_id}（{time_info}）")
+
+    if CONFIG["STORAGE"]["TXT_EXPORT"] and not partial:
+        file_path = save_titles_to_file(results, id_to_name, failed_ids)
+        print(f"标题已导出到: {file_path}")
+
+    return time_info
+
 
 def save_titles_to_file(results: Dict, id_to_name: Dict, failed_ids: List) -> str:
     """保存标题到文件"""
@@ -23,27 +60,32 @@ def save_titles_to_file(results: Dict, id_to_name: Dict, failed_ids: List) -> st
             sorted_titles = []
             for title, info in title_data.items():
                 cleaned_title = clean_title(title)
-                if isinstance(info, dict):
-                    ranks = info.get("ranks", [])
-                    url = info.get("url", "")
-                    mobile_url = info.get("mobileUrl", "")
-                    date = info.get("date", "")  # 新增时间字段
+                # TitleRecord 与旧的 dict 都支持 get（mobileUrl 为 mobile_url 的别名）
+                if isinstance(info, (dict, SlotRecord)):
+                    ranks = list(info.get("ranks") or [])
+                    url = info.get("url") or ""
+                    mobile_url = info.get("mobileUrl") or ""
+                    date = info.get("date") or ""  # 新增时间字段
                 else:
-                    ranks = info if isinstance(info, list) else []
+                    ranks = list(info) if isinstance(info, list) else []
                     url = ""
                     mobile_url = ""
                     date = ""
-                rank = ranks[0] if ranks else 1
                 # 使用日期作为主要排序键
                 sort_key = date if date else ""
-                sorted_titles.append((sort_key, min(ranks) if ranks else 999, cleaned_title, url, mobile_url))
+                sorted_titles.append(
+                    (sort_key, min(ranks) if ranks else 999, ranks, cleaned_title, url, mobile_url)
+                )
 
             # 按日期降序，然后按排名升序
             sorted_titles.sort(key=lambda x: (x[0], x[1]), reverse=False)
 
-            for date, rank, cleaned_title, url, mobile_url in sorted_titles:
+            for date, rank, ranks, cleaned_title, url, mobile_url in sorted_titles:
                 line = f"{rank}. {cleaned_title}"
 
+                # 多个排名时完整记录，行首仍为最高排名
+                if len(ranks) > 1:
+                    line += f" [RANKS:{','.join(map(str, ranks))}]"
                 # 添加时间信息
                 if date:
                     line += f" [DATE:{date}]"
@@ -66,55 +108,14 @@ def save_titles_to_file(results: Dict, id_to_name: Dict, failed_ids: List) -> st
 def load_frequency_words(
     frequency_file: Optional[str] = None,
 ) -> Tuple[List[Dict], List[str]]:
-    """加载频率词配置"""
+    """加载频率词配置，返回规则缓存中共享的只读结构（词组为 MappingProxyType 的元组）"""
     if frequency_file is None:
         frequency_file = os.environ.get(
             "FREQUENCY_WORDS_PATH", "config/frequency_words.txt"
         )
 
-    frequency_path = Path(frequency_file)
-    if not frequency_path.exists():
-        raise FileNotFoundError(f"频率词文件 {frequency_file} 不存在")
-
-    with open(frequency_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    word_groups = [group.strip() for group in content.split("\n\n") if group.strip()]
-
-    processed_groups = []
-    filter_words = []
-
-    for group in word_groups:
-        words = [word.strip() for word in group.split("\n") if word.strip()]
-
-        group_required_words = []
-        group_normal_words = []
-        group_filter_words = []
-
-        for word in words:
-            if word.startswith("!"):
-                filter_words.append(word[1:])
-                group_filter_words.append(word[1:])
-            elif word.startswith("+"):
-                group_required_words.append(word[1:])
-            else:
-                group_normal_words.append(word)
-
-        if group_required_words or group_normal_words:
-            if group_normal_words:
-                group_key = " ".join(group_normal_words)
-            else:
-                group_key = " ".join(group_required_words)
-
-            processed_groups.append(
-                {
-                    "required": group_required_words,
-                    "normal": group_normal_words,
-                    "group_key": group_key,
-                }
-            )
-
-    return processed_groups, filter_words
+    rules = load_frequency_rules(frequency_file)
+    return rules.word_groups, rules.filter_words
 
 
 def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
@@ -172,14 +173,25 @@ def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
                             if url_part.endswith("]"):
                                 url = url_part[:-1]
 
-                        title = clean_title(title_part.strip())
+                        # 提取日期
+                        date = ""
+                        if " [DATE:" in title_part:
+                            title_part, date_part = title_part.rsplit(" [DATE:", 1)
+                            if date_part.endswith("]"):
+                                date = date_part[:-1]
+
                         ranks = [rank] if rank is not None else [1]
+                        # 提取完整排名
+                        if " [RANKS:" in title_part:
+                            title_part, ranks_part = title_part.rsplit(" [RANKS:", 1)
+                            if ranks_part.endswith("]"):
+                                ranks = [int(value) for value in ranks_part[:-1].split(",")]
 
-                        titles_by_id[source_id][title] = {
-                            "ranks": ranks,
-                            "url": url,
-                            "mobileUrl": mobile_url,
-                        }
+                        title = clean_title(title_part.strip())
+
+                        titles_by_id[source_id][intern_text(title)] = TitleRecord(
+                            ranks, url, mobile_url, date
+                        )
 
                     except Exception as e:
                         print(f"解析标题行出错: {line}, 错误: {e}")
@@ -190,45 +202,8 @@ def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
 def read_all_today_titles(
     current_platform_ids: Optional[List[str]] = None,
 ) -> Tuple[Dict, Dict, Dict]:
-    """读取当天所有标题文件，支持按当前监控平台过滤"""
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-
-    if not txt_dir.exists():
-        return {}, {}, {}
-
-    all_results = {}
-    final_id_to_name = {}
-    title_info = {}
-
-    files = sorted([f for f in txt_dir.iterdir() if f.suffix == ".txt"])
-
-    for file_path in files:
-        time_info = file_path.stem
-
-        titles_by_id, file_id_to_name = parse_file_titles(file_path)
-
-        if current_platform_ids is not None:
-            filtered_titles_by_id = {}
-            filtered_id_to_name = {}
-
-            for source_id, title_data in titles_by_id.items():
-                if source_id in current_platform_ids:
-                    filtered_titles_by_id[source_id] = title_data
-                    if source_id in file_id_to_name:
-                        filtered_id_to_name[source_id] = file_id_to_name[source_id]
-
-            titles_by_id = filtered_titles_by_id
-            file_id_to_name = filtered_id_to_name
-
-        final_id_to_name.update(file_id_to_name)
-
-        for source_id, title_data in titles_by_id.items():
-            process_source_data(
-                source_id, title_data, time_info, all_results, title_info
-            )
-
-    return all_results, final_id_to_name, title_info
+    """读取当天的增量汇总数据，支持按当前监控平台过滤"""
+    return get_repository().load_day_aggregate(platform_ids=current_platform_ids)
 
 
 def process_source_data(
@@ -237,8 +212,12 @@ def process_source_data(
     time_info: str,
     all_results: Dict,
     title_info: Dict,
+    partial: bool = False,
 ) -> None:
-    """处理来源数据，合并重复标题"""
+    """处理来源数据，合并重复标题
+
+    partial 为轮询批次：已有标题只合并排名和最后出现时间，不计入出现次数
+    """
     if source_id not in all_results:
         all_results[source_id] = title_data
 
@@ -250,14 +229,14 @@ def process_source_data(
             url = data.get("url", "")
             mobile_url = data.get("mobileUrl", "")
 
-            title_info[source_id][title] = {
-                "first_time": time_info,
-                "last_time": time_info,
-                "count": 1,
-                "ranks": ranks,
-                "url": url,
-                "mobileUrl": mobile_url,
-            }
+            title_info[source_id][title] = TitleStats(
+                first_time=time_info,
+                last_time=time_info,
+                count=1,
+                ranks=ranks,
+                url=url,
+                mobile_url=mobile_url,
+            )
     else:
         for title, data in title_data.items():
             ranks = data.get("ranks", [])
@@ -265,39 +244,31 @@ def process_source_data(
             mobile_url = data.get("mobileUrl", "")
 
             if title not in all_results[source_id]:
-                all_results[source_id][title] = {
-                    "ranks": ranks,
-                    "url": url,
-                    "mobileUrl": mobile_url,
-                }
-                title_info[source_id][title] = {
-                    "first_time": time_info,
-                    "last_time": time_info,
-                    "count": 1,
-                    "ranks": ranks,
-                    "url": url,
-                    "mobileUrl": mobile_url,
-                }
+                all_results[source_id][title] = TitleRecord(ranks, url, mobile_url)
+                title_info[source_id][title] = TitleStats(
+                    first_time=time_info,
+                    last_time=time_info,
+                    count=1,
+                    ranks=ranks,
+                    url=url,
+                    mobile_url=mobile_url,
+                )
             else:
                 existing_data = all_results[source_id][title]
-                existing_ranks = existing_data.get("ranks", [])
-                existing_url = existing_data.get("url", "")
-                existing_mobile_url = existing_data.get("mobileUrl", "")
 
-                merged_ranks = existing_ranks.copy()
-                for rank in ranks:
-                    if rank not in merged_ranks:
-                        merged_ranks.append(rank)
-
-                all_results[source_id][title] = {
-                    "ranks": merged_ranks,
-                    "url": existing_url or url,
-                    "mobileUrl": existing_mobile_url or mobile_url,
-                }
+                # 就地合并到该标题的排名累加器，代价只与本次快照的排名数有关
+                merged_ranks = RankStats.coerce(existing_data.get("ranks"))
+                merged_ranks.merge(ranks)
+                existing_data["ranks"] = merged_ranks
+                if not existing_data.get("url"):
+                    existing_data["url"] = url
+                if not existing_data.get("mobileUrl"):
+                    existing_data["mobileUrl"] = mobile_url
 
                 title_info[source_id][title]["last_time"] = time_info
                 title_info[source_id][title]["ranks"] = merged_ranks
-                title_info[source_id][title]["count"] += 1
+                if not partial:
+                    title_info[source_id][title]["count"] += 1
                 if not title_info[source_id][title].get("url"):
                     title_info[source_id][title]["url"] = url
                 if not title_info[source_id][title].get("mobileUrl"):
@@ -306,70 +277,23 @@ def process_source_data(
 
 def detect_latest_new_titles(current_platform_ids: Optional[List[str]] = None) -> Dict:
     """检测当日最新批次的新增标题，支持按当前监控平台过滤"""
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-
-    if not txt_dir.exists():
-        return {}
-
-    files = sorted([f for f in txt_dir.iterdir() if f.suffix == ".txt"])
-    if len(files) < 2:
-        return {}
-
-    # 解析最新文件
-    latest_file = files[-1]
-    latest_titles, _ = parse_file_titles(latest_file)
-
-    # 如果指定了当前平台列表，过滤最新文件数据
-    if current_platform_ids is not None:
-        filtered_latest_titles = {}
-        for source_id, title_data in latest_titles.items():
-            if source_id in current_platform_ids:
-                filtered_latest_titles[source_id] = title_data
-        latest_titles = filtered_latest_titles
-
-    # 汇总历史标题（按平台过滤）
-    historical_titles = {}
-    for file_path in files[:-1]:
-        historical_data, _ = parse_file_titles(file_path)
-
-        # 过滤历史数据
-        if current_platform_ids is not None:
-            filtered_historical_data = {}
-            for source_id, title_data in historical_data.items():
-                if source_id in current_platform_ids:
-                    filtered_historical_data[source_id] = title_data
-            historical_data = filtered_historical_data
-
-        for source_id, titles_data in historical_data.items():
-            if source_id not in historical_titles:
-                historical_titles[source_id] = set()
-            for title in titles_data.keys():
-                historical_titles[source_id].add(title)
-
-    # 找出新增标题
-    new_titles = {}
-    for source_id, latest_source_titles in latest_titles.items():
-        historical_set = historical_titles.get(source_id, set())
-        source_new_titles = {}
-
-        for title, title_data in latest_source_titles.items():
-            if title not in historical_set:
-                source_new_titles[title] = title_data
-
-        if source_new_titles:
-            new_titles[source_id] = source_new_titles
-
-    return new_titles
+    return get_repository().detect_new_titles(
+        current_platform_ids, CONFIG["STORAGE"]["NEW_TITLE_WINDOW_DAYS"]
+    )
+
 
 def format_rank_display(ranks: List[int], rank_threshold: int, format_type: str) -> str:
     """统一的排名格式化方法"""
     if not ranks:
         return ""
 
-    unique_ranks = sorted(set(ranks))
-    min_rank = unique_ranks[0]
-    max_rank = unique_ranks[-1]
+    if isinstance(ranks, RankStats):
+        min_rank = ranks.min_rank
+        max_rank = ranks.max_rank
+    else:
+        unique_ranks = sorted(set(ranks))
+        min_rank = unique_ranks[0]
+        max_rank = unique_ranks[-1]
 
     if format_type == "html":
         highlight_start = "<font color='red'><strong>"
@@ -401,14 +325,149 @@ def format_rank_display(ranks: List[int], rank_threshold: int, format_type: str)
         else:
             return f"[{min_rank} - {max_rank}]"
 
+_word_matcher_cache: Dict[Tuple, WordGroupMatcher] = {}
+
+
+def get_word_matcher(word_groups: List[Dict], filter_words: List[str]) -> WordGroupMatcher:
+    """获取词组对应的已编译匹配器，相同词组配置只编译一次"""
+    rules = find_loaded_rules(word_groups, filter_words)
+    if rules is not None:
+        return rules.matcher
+
+    cache_key = (
+        tuple((tuple(g["required"]), tuple(g["normal"])) for g in word_groups),
+        tuple(filter_words),
+    )
+    matcher = _word_matcher_cache.get(cache_key)
+    if matcher is None:
+        matcher = WordGroupMatcher(word_groups, filter_words)
+        _word_matcher_cache.clear()
+        _word_matcher_cache[cache_key] = matcher
+    return matcher
+
+
+class TitleClassification:
+    """一次运行内共享的标题分类结果：标题 -> (是否被过滤, 命中的词组下标)"""
+
+    def __init__(self, word_groups: List[Dict], filter_words: List[str]):
+        self.word_groups = word_groups
+        self.filter_words = filter_words
+        self.matcher = get_word_matcher(word_groups, filter_words)
+        self._verdicts: Dict[str, Tuple[bool, Optional[int]]] = {}
+
+    def is_for(self, word_groups: List[Dict], filter_words: List[str]) -> bool:
+        """是否基于同一份词组配置（load_frequency_words 返回的缓存对象）"""
+        return self.word_groups is word_groups and self.filter_words is filter_words
+
+    def classify(self, title: str) -> Tuple[bool, Optional[int]]:
+        verdict = self._verdicts.get(title)
+        if verdict is None:
+            verdict = self.matcher.classify(title)
+            self._verdicts[title] = verdict
+        return verdict
+
+    def group_index(self, title: str) -> Optional[int]:
+        return self.classify(title)[1]
+
+    def matches(self, title: str) -> bool:
+        """与 matches_word_groups 规则一致：未配置词组时匹配所有标题"""
+        if not self.word_groups:
+            return True
+        return self.classify(title)[1] is not None
+
+    def classify_results(self, results: Dict) -> None:
+        """预先分类一批 results[source_id][title] 中的所有标题"""
+        for titles_data in results.values():
+            for title in titles_data:
+                self.classify(title)
+
+    def __len__(self) -> int:
+        return len(self._verdicts)
+
+    def rebase(self, word_groups: List[Dict], filter_words: List[str]) -> "TitleClassification":
+        """频率词配置变化后创建新的分类结果，只重新分类可能受变化词组影响的标题
+
+        分类取第一个命中的词组：旧结果为词组 i 的标题，已知旧词组 0..i-1 均未命中、
+        词组 i 命中。新配置中排在前面的词组若都是未变化且已知未命中的旧词组，
+        结果可直接换算为新下标；遇到新增/修改的词组或命中情况未知的词组才重新分类。
+        过滤词变化会影响所有标题，此时全部重新分类。
+        """
+        rebased = TitleClassification(word_groups, filter_words)
+        if (
+            not self._verdicts
+            or not self.word_groups
+            or not word_groups
+            or list(filter_words) != list(self.filter_words)
+        ):
+            return rebased
+
+        def definition(group: Dict) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+            return tuple(group["required"]), tuple(group["normal"])
+
+        old_positions: Dict[Tuple, int] = {}
+        for index, group in enumerate(self.word_groups):
+            old_positions.setdefault(definition(group), index)
+        new_positions = [old_positions.get(definition(group)) for group in word_groups]
+
+        # 旧词组下标（None 为未命中任何词组） -> 换算后的新下标；无法确定时为 False
+        def translate(old_index: Optional[int]):
+            for new_index, old_position in enumerate(new_positions):
+                if old_position is None:
+                    return False
+                if old_index is not None and old_position == old_index:
+                    return new_index
+                if old_index is not None and old_position > old_index:
+                    return False
+            return None
+
+        translations = {
+            old_index: translate(old_index)
+            for old_index in [None, *range(len(self.word_groups))]
+        }
+
+        verdicts = rebased._verdicts
+        reclassified = 0
+        for title, (filtered, old_index) in self._verdicts.items():
+            if filtered:
+                verdicts[title] = (True, None)
+                continue
+            new_index = translations[old_index]
+            if new_index is False:
+                rebased.classify(title)
+                reclassified += 1
+            else:
+                verdicts[title] = (False, new_index)
+
+        changed_groups = sum(1 for position in new_positions if position is None)
+        print(
+            f"频率词已更新：{changed_groups} 个词组新增或修改，"
+            f"重新分类 {reclassified}/{len(self._verdicts)} 条标题"
+        )
+        return rebased
+
+
+def get_title_classification(
+    word_groups: List[Dict],
+    filter_words: List[str],
+    classification: Optional[TitleClassification] = None,
+) -> TitleClassification:
+    """复用与词组配置一致的分类结果；词组配置变化时只重新分类受影响的标题"""
+    if classification is None:
+        return TitleClassification(word_groups, filter_words)
+    if classification.is_for(word_groups, filter_words):
+        return classification
+    return classification.rebase(word_groups, filter_words)
+
+
 def prepare_report_data(
     stats: List[Dict],
     failed_ids: Optional[List] = None,
     new_titles: Optional[Dict] = None,
     id_to_name: Optional[Dict] = None,
     mode: str = "daily",
+    classification: Optional[TitleClassification] = None,
 ) -> Dict:
-    """准备报告数据"""
+    """准备报告数据，传入本次运行的标题分类结果时直接复用"""
     processed_new_titles = []
 
     # 在增量模式下隐藏新增新闻区域
@@ -419,10 +478,13 @@ def prepare_report_data(
         filtered_new_titles = {}
         if new_titles and id_to_name:
             word_groups, filter_words = load_frequency_words()
+            classification = get_title_classification(
+                word_groups, filter_words, classification
+            )
             for source_id, titles_data in new_titles.items():
                 filtered_titles = {}
                 for title, title_data in titles_data.items():
-                    if matches_word_groups(title, word_groups, filter_words):
+                    if classification.matches(title):
                         filtered_titles[title] = title_data
                 if filtered_titles:
                     filtered_new_titles[source_id] = filtered_titles
@@ -437,17 +499,16 @@ def prepare_report_data(
                     mobile_url = title_data.get("mobileUrl", "")
                     ranks = title_data.get("ranks", [])
 
-                    processed_title = {
-                        "title": title,
-                        "source_name": source_name,
-                        "time_display": "",
-                        "count": 1,
-                        "ranks": ranks,
-                        "rank_threshold": CONFIG["RANK_THRESHOLD"],
-                        "url": url,
-                        "mobile_url": mobile_url,
-                        "is_new": True,
-                    }
+                    processed_title = TitleStats(
+                        title=title,
+                        source_name=source_name,
+                        count=1,
+                        ranks=ranks,
+                        rank_threshold=CONFIG["RANK_THRESHOLD"],
+                        url=url,
+                        mobile_url=mobile_url,
+                        is_new=True,
+                    )
                     source_titles.append(processed_title)
 
                 if source_titles:
@@ -464,29 +525,18 @@ def prepare_report_data(
         if stat["count"] <= 0:
             continue
 
-        processed_titles = []
-        for title_data in stat["titles"]:
-            processed_title = {
-                "title": title_data["title"],
-                "source_name": title_data["source_name"],
-                "time_display": title_data["time_display"],
-                "count": title_data["count"],
-                "ranks": title_data["ranks"],
-                "rank_threshold": title_data["rank_threshold"],
-                "url": title_data.get("url", ""),
-                "mobile_url": title_data.get("mobileUrl", ""),
-                "is_new": title_data.get("is_new", False),
-            }
-            processed_titles.append(processed_title)
+        # TitleStats 同时支持 mobileUrl / mobile_url 访问，无需逐条复制改名
+        processed_titles = list(stat["titles"])
 
-        processed_stats.append(
-            {
-                "word": stat["word"],
-                "count": stat["count"],
-                "percentage": stat.get("percentage", 0),
-                "titles": processed_titles,
-            }
-        )
+        processed_stat = {
+            "word": stat["word"],
+            "count": stat["count"],
+            "percentage": stat.get("percentage", 0),
+            "titles": processed_titles,
+        }
+        if "trend" in stat:
+            processed_stat["trend"] = stat["trend"]
+        processed_stats.append(processed_stat)
 
     return {
         "stats": processed_stats,
@@ -505,36 +555,7 @@ def matches_word_groups(
     if not word_groups:
         return True
 
-    title_lower = title.lower()
-
-    # 过滤词检查
-    if any(filter_word.lower() in title_lower for filter_word in filter_words):
-        return False
-
-    # 词组匹配检查
-    for group in word_groups:
-        required_words = group["required"]
-        normal_words = group["normal"]
-
-        # 必须词检查
-        if required_words:
-            all_required_present = all(
-                req_word.lower() in title_lower for req_word in required_words
-            )
-            if not all_required_present:
-                continue
-
-        # 普通词检查
-        if normal_words:
-            any_normal_present = any(
-                normal_word.lower() in title_lower for normal_word in normal_words
-            )
-            if not any_normal_present:
-                continue
-
-        return True
-
-    return False
+    return get_word_matcher(word_groups, filter_words).matches(title)
 
 def count_word_frequency(
     results: Dict,
@@ -542,11 +563,17 @@ def count_word_frequency(
     filter_words: List[str],
     id_to_name: Dict,
     title_info: Optional[Dict] = None,
-    rank_threshold: int = CONFIG["RANK_THRESHOLD"],
+    rank_threshold: Optional[int] = None,
     new_titles: Optional[Dict] = None,
     mode: str = "daily",
+    classification: Optional[TitleClassification] = None,
 ) -> Tuple[List[Dict], int]:
-    """统计词频，支持必须词、频率词、过滤词，并标记新增标题"""
+    """统计词频，支持必须词、频率词、过滤词，并标记新增标题
+
+    开启 report.dedup 时，同一词组内不同平台的近似重复标题合并为一条
+    """
+    if rank_threshold is None:
+        rank_threshold = CONFIG["RANK_THRESHOLD"]
 
     # 如果没有配置词组，创建一个包含所有新闻的虚拟词组
     if not word_groups:
@@ -625,6 +652,10 @@ def count_word_frequency(
         group_key = group["group_key"]
         word_stats[group_key] = {"count": 0, "titles": {}}
 
+    classification = get_title_classification(
+        word_groups, filter_words, classification
+    )
+
     for source_id, titles_data in results_to_process.items():
         total_titles += len(titles_data)
 
@@ -635,12 +666,9 @@ def count_word_frequency(
             if title in processed_titles.get(source_id, {}):
                 continue
 
-            # 使用统一的匹配逻辑
-            matches_frequency_words = matches_word_groups(
-                title, word_groups, filter_words
-            )
-
-            if not matches_frequency_words:
+            # 一次扫描得到命中的第一个词组
+            group_index = classification.group_index(title)
+            if group_index is None:
                 continue
 
             # 如果是增量模式或 current 模式第一次，统计匹配的新增新闻数量
@@ -653,115 +681,83 @@ def count_word_frequency(
             source_url = title_data.get("url", "")
             source_mobile_url = title_data.get("mobileUrl", "")
 
-            # 找到匹配的词组
-            title_lower = title.lower()
-            for group in word_groups:
-                required_words = group["required"]
-                normal_words = group["normal"]
-
-                # 如果是"全部新闻"模式，所有标题都匹配第一个（唯一的）词组
-                if len(word_groups) == 1 and word_groups[0]["group_key"] == "全部新闻":
-                    group_key = group["group_key"]
-                    word_stats[group_key]["count"] += 1
-                    if source_id not in word_stats[group_key]["titles"]:
-                        word_stats[group_key]["titles"][source_id] = []
-                else:
-                    # 原有的匹配逻辑
-                    if required_words:
-                        all_required_present = all(
-                            req_word.lower() in title_lower
-                            for req_word in required_words
-                        )
-                        if not all_required_present:
-                            continue
-
-                    if normal_words:
-                        any_normal_present = any(
-                            normal_word.lower() in title_lower
-                            for normal_word in normal_words
-                        )
-                        if not any_normal_present:
-                            continue
-
-                    group_key = group["group_key"]
-                    word_stats[group_key]["count"] += 1
-                    if source_id not in word_stats[group_key]["titles"]:
-                        word_stats[group_key]["titles"][source_id] = []
-
-                first_time = ""
-                last_time = ""
-                count_info = 1
-                ranks = source_ranks if source_ranks else []
-                url = source_url
-                mobile_url = source_mobile_url
-
-                # 对于 current 模式，从历史统计信息中获取完整数据
-                if (
-                    mode == "current"
-                    and title_info
-                    and source_id in title_info
-                    and title in title_info[source_id]
-                ):
-                    info = title_info[source_id][title]
-                    first_time = info.get("first_time", "")
-                    last_time = info.get("last_time", "")
-                    count_info = info.get("count", 1)
-                    if "ranks" in info and info["ranks"]:
-                        ranks = info["ranks"]
-                    url = info.get("url", source_url)
-                    mobile_url = info.get("mobileUrl", source_mobile_url)
-                elif (
-                    title_info
-                    and source_id in title_info
-                    and title in title_info[source_id]
-                ):
-                    info = title_info[source_id][title]
-                    first_time = info.get("first_time", "")
-                    last_time = info.get("last_time", "")
-                    count_info = info.get("count", 1)
-                    if "ranks" in info and info["ranks"]:
-                        ranks = info["ranks"]
-                    url = info.get("url", source_url)
-                    mobile_url = info.get("mobileUrl", source_mobile_url)
-
-                if not ranks:
-                    ranks = [99]
-
-                time_display = format_time_display(first_time, last_time)
-
-                source_name = id_to_name.get(source_id, source_id)
-
-                # 判断是否为新增
-                is_new = False
-                if all_news_are_new:
-                    # 增量模式下所有处理的新闻都是新增，或者当天第一次的所有新闻都是新增
-                    is_new = True
-                elif new_titles and source_id in new_titles:
-                    # 检查是否在新增列表中
-                    new_titles_for_source = new_titles[source_id]
-                    is_new = title in new_titles_for_source
-
-                word_stats[group_key]["titles"][source_id].append(
-                    {
-                        "title": title,
-                        "source_name": source_name,
-                        "first_time": first_time,
-                        "last_time": last_time,
-                        "time_display": time_display,
-                        "count": count_info,
-                        "ranks": ranks,
-                        "rank_threshold": rank_threshold,
-                        "url": url,
-                        "mobileUrl": mobile_url,
-                        "is_new": is_new,
-                    }
+            group_key = word_groups[group_index]["group_key"]
+            word_stats[group_key]["count"] += 1
+            if source_id not in word_stats[group_key]["titles"]:
+                word_stats[group_key]["titles"][source_id] = []
+
+            first_time = ""
+            last_time = ""
+            count_info = 1
+            ranks = source_ranks if source_ranks else []
+            url = source_url
+            mobile_url = source_mobile_url
+
+            # 对于 current 模式，从历史统计信息中获取完整数据
+            if (
+                mode == "current"
+                and title_info
+                and source_id in title_info
+                and title in title_info[source_id]
+            ):
+                info = title_info[source_id][title]
+                first_time = info.get("first_time", "")
+                last_time = info.get("last_time", "")
+                count_info = info.get("count", 1)
+                if "ranks" in info and info["ranks"]:
+                    ranks = info["ranks"]
+                url = info.get("url", source_url)
+                mobile_url = info.get("mobileUrl", source_mobile_url)
+            elif (
+                title_info
+                and source_id in title_info
+                and title in title_info[source_id]
+            ):
+                info = title_info[source_id][title]
+                first_time = info.get("first_time", "")
+                last_time = info.get("last_time", "")
+                count_info = info.get("count", 1)
+                if "ranks" in info and info["ranks"]:
+                    ranks = info["ranks"]
+                url = info.get("url", source_url)
+                mobile_url = info.get("mobileUrl", source_mobile_url)
+
+            if not ranks:
+                ranks = [99]
+
+            time_display = format_time_display(first_time, last_time)
+
+            source_name = id_to_name.get(source_id, source_id)
+
+            # 判断是否为新增
+            is_new = False
+            if all_news_are_new:
+                # 增量模式下所有处理的新闻都是新增，或者当天第一次的所有新闻都是新增
+                is_new = True
+            elif new_titles and source_id in new_titles:
+                # 检查是否在新增列表中
+                new_titles_for_source = new_titles[source_id]
+                is_new = title in new_titles_for_source
+
+            word_stats[group_key]["titles"][source_id].append(
+                TitleStats(
+                    title=title,
+                    source_name=source_name,
+                    first_time=first_time,
+                    last_time=last_time,
+                    time_display=time_display,
+                    count=count_info,
+                    ranks=ranks,
+                    rank_threshold=rank_threshold,
+                    url=url,
+                    mobile_url=mobile_url,
+                    is_new=is_new,
                 )
+            )
 
-                if source_id not in processed_titles:
-                    processed_titles[source_id] = {}
-                processed_titles[source_id][title] = True
-
-                break
+            if source_id not in processed_titles:
+                processed_titles[source_id] = {}
+            processed_titles[source_id][title] = True
 
     # 最后统一打印汇总信息
     if mode == "incremental":
@@ -813,21 +809,34 @@ def count_word_frequency(
                 f"当前榜单模式：{total_input_news} 条当前榜单新闻中有 {matched_count} 条{filter_status}"
             )
 
-    stats = []
+    group_titles = {}
     for group_key, data in word_stats.items():
         all_titles = []
         for source_id, title_list in data["titles"].items():
             all_titles.extend(title_list)
+        group_titles[group_key] = all_titles
+
+    # 每条标题只计算一次权重和排序键
+    score_titles(
+        list(chain.from_iterable(group_titles.values())), rank_threshold
+    )
 
+    dedup_config = CONFIG["DEDUP"]
+    if dedup_config["ENABLED"]:
+        before_count = sum(len(titles) for titles in group_titles.values())
+        for group_key, titles in group_titles.items():
+            group_titles[group_key] = merge_duplicate_titles(
+                titles, dedup_config["THRESHOLD"], dedup_config["NGRAM"], rank_threshold
+            )
+            word_stats[group_key]["count"] = len(group_titles[group_key])
+        after_count = sum(len(titles) for titles in group_titles.values())
+        if after_count < before_count:
+            print(f"近似重复标题合并：{before_count} 条合并为 {after_count} 条")
+
+    stats = []
+    for group_key, data in word_stats.items():
         # 按权重排序
-        sorted_titles = sorted(
-            all_titles,
-            key=lambda x: (
-                -calculate_news_weight(x, rank_threshold),
-                min(x["ranks"]) if x["ranks"] else 999,
-                -x["count"],
-            ),
-        )
+        sorted_titles = sort_titles(group_titles[group_key])
 
         stats.append(
             {
@@ -846,7 +855,9 @@ def count_word_frequency(
     return stats, total_titles
 
 def calculate_news_weight(
-    title_data: Dict, rank_threshold: int = CONFIG["RANK_THRESHOLD"]
+    title_data: Dict,
+    rank_threshold: Optional[int] = None,
+    weight_config: Optional[Dict] = None,
 ) -> float:
     """计算新闻权重，用于排序"""
     ranks = title_data.get("ranks", [])
@@ -854,22 +865,32 @@ def calculate_news_weight(
         return 0.0
 
     count = title_data.get("count", len(ranks))
-    weight_config = CONFIG["WEIGHT_CONFIG"]
+    if rank_threshold is None:
+        rank_threshold = CONFIG["RANK_THRESHOLD"]
+    if weight_config is None:
+        weight_config = CONFIG["WEIGHT_CONFIG"]
+
+    if isinstance(ranks, RankStats):
+        # 排名累加器已维护得分和高排名个数
+        rank_score_sum = ranks.score_sum
+        high_rank_count = ranks.high_count_for(rank_threshold)
+    else:
+        # 一次遍历同时累计排名得分和高排名次数
+        rank_score_sum = 0
+        high_rank_count = 0
+        for rank in ranks:
+            rank_score_sum += 11 - (rank if rank < 10 else 10)
+            if rank <= rank_threshold:
+                high_rank_count += 1
 
     # 排名权重：Σ(11 - min(rank, 10)) / 出现次数
-    rank_scores = []
-    for rank in ranks:
-        score = 11 - min(rank, 10)
-        rank_scores.append(score)
-
-    rank_weight = sum(rank_scores) / len(ranks) if ranks else 0
+    rank_weight = rank_score_sum / len(ranks)
 
     # 频次权重：min(出现次数, 10) × 10
     frequency_weight = min(count, 10) * 10
 
     # 热度加成：高排名次数 / 总出现次数 × 100
-    high_rank_count = sum(1 for rank in ranks if rank <= rank_threshold)
-    hotness_ratio = high_rank_count / len(ranks) if ranks else 0
+    hotness_ratio = high_rank_count / len(ranks)
     hotness_weight = hotness_ratio * 100
 
     total_weight = (
@@ -878,4 +899,94 @@ def calculate_news_weight(
         + hotness_weight * weight_config["HOTNESS_WEIGHT"]
     )
 
-    return total_weight
\ No newline at end of file
+    return total_weight
+
+
+def score_titles(
+    titles: List[Dict], rank_threshold: Optional[int] = None
+) -> None:
+    """预先计算每条标题的权重和最小排名，写入 weight / min_rank 字段"""
+    if rank_threshold is None:
+        rank_threshold = CONFIG["RANK_THRESHOLD"]
+    weight_config = CONFIG["WEIGHT_CONFIG"]
+
+    for title_data in titles:
+        ranks = title_data.get("ranks", [])
+        title_data["weight"] = calculate_news_weight(
+            title_data, rank_threshold, weight_config
+        )
+        if isinstance(ranks, RankStats):
+            title_data["min_rank"] = ranks.min_rank if ranks else 999
+        else:
+            title_data["min_rank"] = min(ranks) if ranks else 999
+
+
+def _title_sort_key(title_data: Dict) -> Tuple[float, int, int]:
+    return (-title_data["weight"], title_data["min_rank"], -title_data["count"])
+
+
+def _merge_title_cluster(members: List[Dict], rank_threshold: int) -> TitleStats:
+    """把同一事件的多条标题合并为一条：沿用权重最高的标题和链接，合并平台、排名和次数"""
+    members = sorted(members, key=_title_sort_key)
+    representative = members[0]
+
+    ranks = RankStats.coerce(representative["ranks"]).copy()
+    source_names = []
+    for member in members:
+        if member is not representative:
+            ranks.merge(member["ranks"])
+        if member["source_name"] not in source_names:
+            source_names.append(member["source_name"])
+
+    first_times = [member["first_time"] for member in members if member["first_time"]]
+    last_times = [member["last_time"] for member in members if member["last_time"]]
+    first_time = min(first_times) if first_times else ""
+    last_time = max(last_times) if last_times else ""
+
+    return TitleStats(
+        title=representative["title"],
+        source_name="、".join(source_names),
+        first_time=first_time,
+        last_time=last_time,
+        time_display=format_time_display(first_time, last_time),
+        count=sum(member["count"] for member in members),
+        ranks=ranks,
+        rank_threshold=rank_threshold,
+        url=representative["url"],
+        mobile_url=representative["mobileUrl"],
+        is_new=any(member.get("is_new") for member in members),
+    )
+
+
+def merge_duplicate_titles(
+    titles: List[Dict],
+    threshold: float = 0.6,
+    ngram: int = 2,
+    rank_threshold: Optional[int] = None,
+) -> List[Dict]:
+    """合并近似重复的标题（需已由 score_titles 计算权重），合并后的条目重新计算权重"""
+    if len(titles) < 2:
+        return titles
+    if rank_threshold is None:
+        rank_threshold = CONFIG["RANK_THRESHOLD"]
+
+    clusters = cluster_titles([t["title"] for t in titles], threshold, ngram)
+    if len(clusters) == len(titles):
+        return titles
+
+    merged_titles = []
+    new_entries = []
+    for cluster in clusters:
+        if len(cluster) == 1:
+            merged_titles.append(titles[cluster[0]])
+            continue
+        merged = _merge_title_cluster([titles[index] for index in cluster], rank_threshold)
+        merged_titles.append(merged)
+        new_entries.append(merged)
+    score_titles(new_entries, rank_threshold)
+    return merged_titles
+
+
+def sort_titles(titles: List[Dict]) -> List[Dict]:
+    """按已计算的排序键（权重、最小排名、出现次数）排序"""
+    return sorted(titles, key=_title_sort_key)
@@ -0,0 +1,185 @@
+﻿import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import word_matcher
+from .config_loader import freeze
+from .word_matcher import WordGroupMatcher
+
+
+RULES_CACHE_DIR = Path("output/.cache/frequency_rules")
+# 缓存格式变化时递增；缓存键同时包含规则集和匹配器源码的哈希，实现变化时旧缓存自动失效
+RULES_CACHE_VERSION = 1
+
+
+def parse_frequency_words(content: str) -> Tuple[List[Dict], List[str]]:
+    """解析频率词文件内容，返回 (词组列表, 过滤词列表)"""
+    word_groups = [group.strip() for group in content.split("\n\n") if group.strip()]
+
+    processed_groups = []
+    filter_words = []
+
+    for group in word_groups:
+        words = [word.strip() for word in group.split("\n") if word.strip()]
+
+        group_required_words = []
+        group_normal_words = []
+        group_filter_words = []
+
+        for word in words:
+            if word.startswith("!"):
+                filter_words.append(word[1:])
+                group_filter_words.append(word[1:])
+            elif word.startswith("+"):
+                group_required_words.append(word[1:])
+            else:
+                group_normal_words.append(word)
+
+        if group_required_words or group_normal_words:
+            if group_normal_words:
+                group_key = " ".join(group_normal_words)
+            else:
+                group_key = " ".join(group_required_words)
+
+            processed_groups.append(
+                {
+                    "required": group_required_words,
+                    "normal": group_normal_words,
+                    "group_key": group_key,
+                }
+            )
+
+    return processed_groups, filter_words
+
+
+class FrequencyRuleSet:
+    """编译后的频率词规则：词组、过滤词和对应的匹配自动机
+
+    word_groups/filter_words 为只读结构（tuple 和 MappingProxyType），
+    同一规则集被进程内所有调用方共享，不能被某个调用方修改。
+    """
+
+    def __init__(self, content_hash: str, word_groups: List[Dict], filter_words: List[str]):
+        self.content_hash = content_hash
+        self.matcher = WordGroupMatcher(word_groups, filter_words)
+        self._parsed = (word_groups, filter_words)
+        self._freeze()
+
+    def _freeze(self) -> None:
+        word_groups, filter_words = self._parsed
+        self.word_groups = freeze(word_groups)
+        self.filter_words = freeze(filter_words)
+
+    def __getstate__(self) -> Dict:
+        # MappingProxyType 无法序列化，磁盘缓存只保存解析结果和匹配器
+        return {
+            "content_hash": self.content_hash,
+            "matcher": self.matcher,
+            "parsed": self._parsed,
+        }
+
+    def __setstate__(self, state: Dict) -> None:
+        self.content_hash = state["content_hash"]
+        self.matcher = state["matcher"]
+        self._parsed = state["parsed"]
+        self._freeze()
+
+    def matches(self, title: str) -> bool:
+        return self.matcher.matches(title)
+
+    def match_group(self, title: str) -> Optional[int]:
+        return self.matcher.match_group(title)
+
+
+# 进程内缓存：文件路径 -> (mtime_ns, size, 规则集)
+_rules_cache: Dict[str, Tuple[int, int, FrequencyRuleSet]] = {}
+_rules_lock = threading.Lock()
+
+
+_source_hash: Optional[str] = None
+
+
+def _rules_cache_key(content_hash: str) -> str:
+    """磁盘缓存键：频率词内容哈希 + 本模块和匹配器源码的哈希"""
+    global _source_hash
+    if _source_hash is None:
+        digest = hashlib.sha256()
+        for module_path in (__file__, word_matcher.__file__):
+            digest.update(Path(module_path).read_bytes())
+        _source_hash = digest.hexdigest()
+    digest = hashlib.sha256(content_hash.encode("ascii"))
+    digest.update(_source_hash.encode("ascii"))
+    return f"{digest.hexdigest()}.v{RULES_CACHE_VERSION}"
+
+
+def _load_cached_rules(content_hash: str) -> Optional[FrequencyRuleSet]:
+    cache_path = RULES_CACHE_DIR / f"{_rules_cache_key(content_hash)}.pickle"
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            rules = pickle.load(f)
+    except Exception as e:
+        print(f"频率词规则缓存读取失败，将重新编译: {e}")
+        return None
+    return rules if isinstance(rules, FrequencyRuleSet) else None
+
+
+def _store_cached_rules(rules: FrequencyRuleSet) -> None:
+    cache_path = RULES_CACHE_DIR / f"{_rules_cache_key(rules.content_hash)}.pickle"
+    try:
+        RULES_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(rules, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"频率词规则缓存写入失败: {e}")
+
+
+def load_frequency_rules(frequency_file: str) -> FrequencyRuleSet:
+    """加载编译后的频率词规则，按 路径 + mtime + 内容哈希 复用进程内和磁盘缓存"""
+    frequency_path = Path(frequency_file)
+    if not frequency_path.exists():
+        raise FileNotFoundError(f"频率词文件 {frequency_file} 不存在")
+
+    cache_key = str(frequency_path.resolve())
+    stat = frequency_path.stat()
+
+    with _rules_lock:
+        cached = _rules_cache.get(cache_key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        content_bytes = frequency_path.read_bytes()
+        content_hash = hashlib.sha256(content_bytes).hexdigest()
+
+        # mtime 变化但内容未变（如 touch、重新挂载），直接复用
+        if cached and cached[2].content_hash == content_hash:
+            rules = cached[2]
+        else:
+            rules = _load_cached_rules(content_hash)
+            if rules is None:
+                # 与文本模式读取一致，统一换行符
+                content = content_bytes.decode("utf-8")
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
+                word_groups, filter_words = parse_frequency_words(content)
+                rules = FrequencyRuleSet(content_hash, word_groups, filter_words)
+                _store_cached_rules(rules)
+
+        _rules_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, rules)
+        return rules
+
+
+def find_loaded_rules(
+    word_groups: List[Dict], filter_words: List[str]
+) -> Optional[FrequencyRuleSet]:
+    """查找与给定词组对象相同的已加载规则集，用于复用其匹配自动机"""
+    with _rules_lock:
+        for _, _, rules in _rules_cache.values():
+            if rules.word_groups is word_groups and rules.filter_words is filter_words:
+                return rules
+    return None
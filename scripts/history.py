@@ -0,0 +1,407 @@
+﻿import argparse
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .config_loader import CONFIG
+from .storage import NewsRepository, get_repository, normalize_title_key
+from .utils import get_beijing_time
+
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_days (
+    day TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    last_run_id INTEGER NOT NULL,
+    title_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS history_titles (
+    day TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    platform_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    first_time TEXT NOT NULL,
+    last_time TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    best_rank INTEGER NOT NULL,
+    PRIMARY KEY (title_key, day, platform_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_history_titles_day ON history_titles (day);
+
+CREATE TABLE IF NOT EXISTS history_groups (
+    rules_hash TEXT NOT NULL,
+    day TEXT NOT NULL,
+    group_key TEXT NOT NULL,
+    title_count INTEGER NOT NULL,
+    PRIMARY KEY (rules_hash, day, group_key)
+) WITHOUT ROWID;
+"""
+
+DATE_FOLDER_FORMAT = "%Y年%m月%d日"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def folder_to_day(date: str) -> str:
+    """日期目录名（2025年01月01日）转为可按范围查询的 ISO 日期"""
+    return datetime.strptime(date, DATE_FOLDER_FORMAT).strftime(DAY_FORMAT)
+
+
+def rules_hash(word_groups: List[Dict], filter_words: List[str]) -> str:
+    """词组配置的指纹，频率词变化后分组计数自动重新计算"""
+    from .frequency_rules import find_loaded_rules
+
+    rules = find_loaded_rules(word_groups, filter_words)
+    if rules is not None:
+        return rules.content_hash
+    content = json.dumps(
+        [
+            [(g["required"], g["normal"], g["group_key"]) for g in word_groups],
+            filter_words,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class TrendHistory:
+    """多日趋势历史：把每天的汇总压缩为按标题键索引的日摘要，支持滚动窗口查询
+
+    - history_titles：每天每个平台每个标题一行（出现次数、最好排名、首末时间）
+    - history_groups：按频率词配置指纹缓存的每日词组标题数
+    """
+
+    def __init__(self, repository: NewsRepository):
+        self.repository = repository
+        with repository.lock:
+            repository.connection.executescript(HISTORY_SCHEMA)
+
+    # ---------- 压缩 ----------
+
+    def compact(self, date: str) -> bool:
+        """把某天的当日汇总压缩为日摘要，已是最新时跳过，返回是否重写"""
+        repository = self.repository
+        repository.update_day_aggregate(date)
+        day = folder_to_day(date)
+        conn = repository.connection
+
+        with repository.lock, conn:
+            row = conn.execute(
+                "SELECT last_run_id FROM day_aggregates WHERE date = ?", (date,)
+            ).fetchone()
+            if row is None:
+                return False
+            last_run_id = row[0]
+            compacted = conn.execute(
+                "SELECT last_run_id FROM history_days WHERE day = ?", (day,)
+            ).fetchone()
+            if compacted and compacted[0] == last_run_id:
+                return False
+
+            summaries: Dict[Tuple[str, str], List] = {}
+            for platform_id, title, first_time, last_time, count, ranks in conn.execute(
+                "SELECT platform_id, title, first_time, last_time, count, ranks"
+                " FROM day_titles WHERE date = ? ORDER BY rowid",
+                (date,),
+            ):
+                best_rank = min(json.loads(ranks) or [99])
+                key = (normalize_title_key(title), platform_id)
+                summary = summaries.get(key)
+                if summary is None:
+                    summaries[key] = [title, first_time, last_time, count, best_rank]
+                    continue
+                # 仅大小写或空白不同的标题合并为一条
+                summary[1] = min(summary[1], first_time)
+                summary[2] = max(summary[2], last_time)
+                summary[3] += count
+                summary[4] = min(summary[4], best_rank)
+
+            conn.execute("DELETE FROM history_titles WHERE day = ?", (day,))
+            conn.execute("DELETE FROM history_groups WHERE day = ?", (day,))
+            conn.executemany(
+                "INSERT INTO history_titles"
+                " (day, title_key, platform_id, title, first_time, last_time, count, best_rank)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (day, title_key, platform_id, *summary)
+                    for (title_key, platform_id), summary in summaries.items()
+                ],
+            )
+            conn.execute(
+                "INSERT INTO history_days (day, date, last_run_id, title_count)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(day) DO UPDATE SET last_run_id = excluded.last_run_id,"
+                " title_count = excluded.title_count",
+                (day, date, last_run_id, len(summaries)),
+            )
+        return True
+
+    def compact_all(self) -> int:
+        """压缩保留期内尚未压缩或有新批次的日期，并清理超出保留期的摘要，返回重写的天数
+
+        原始批次不随摘要清理，超出保留期的日期不再压缩，否则每次执行都会重写后立即删除。
+        """
+        cutoff = self._retention_cutoff()
+        conn = self.repository.connection
+        with self.repository.lock:
+            dates = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT r.date FROM runs r"
+                    " LEFT JOIN history_days h ON h.date = r.date"
+                    " WHERE r.date >= ?"
+                    " GROUP BY r.date HAVING MAX(r.id) > COALESCE(MAX(h.last_run_id), 0)",
+                    (cutoff.strftime(DATE_FOLDER_FORMAT) if cutoff else "",),
+                )
+            ]
+        compacted = sum(1 for date in dates if self.compact(date))
+        self.prune()
+        return compacted
+
+    @staticmethod
+    def _retention_cutoff(retention_days: Optional[int] = None) -> Optional[datetime]:
+        """保留期内最早的日期，不限制保留期时返回 None"""
+        if retention_days is None:
+            retention_days = CONFIG["HISTORY"]["RETENTION_DAYS"]
+        if retention_days <= 0:
+            return None
+        return get_beijing_time() - timedelta(days=retention_days)
+
+    def prune(self, retention_days: Optional[int] = None) -> None:
+        """删除超出保留期的日摘要（原始批次不受影响）"""
+        cutoff = self._retention_cutoff(retention_days)
+        if cutoff is None:
+            return
+        conn = self.repository.connection
+        with self.repository.lock, conn:
+            for table in ("history_titles", "history_groups", "history_days"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE day < ?", (cutoff.strftime(DAY_FORMAT),)
+                )
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def window(window_days: int, end_day: Optional[str] = None) -> List[str]:
+        """以 end_day（默认今天）结尾、共 window_days 天的 ISO 日期，按时间升序"""
+        end = (
+            datetime.strptime(end_day, DAY_FORMAT)
+            if end_day
+            else get_beijing_time().replace(tzinfo=None)
+        )
+        return [
+            (end - timedelta(days=offset)).strftime(DAY_FORMAT)
+            for offset in range(max(window_days, 1) - 1, -1, -1)
+        ]
+
+    def appearances(
+        self,
+        title: Optional[str] = None,
+        group: Optional[str] = None,
+        window_days: int = 7,
+        end_day: Optional[str] = None,
+        word_groups: Optional[List[Dict]] = None,
+        filter_words: Optional[List[str]] = None,
+    ) -> Dict[str, int]:
+        """窗口内每天的出现次数
+
+        按标题查询时为该标题在各平台被抓取到的次数之和；
+        按词组查询时为当天命中该词组的标题条数（未传词组配置时使用当前频率词）。
+        """
+        if (title is None) == (group is None):
+            raise ValueError("appearances 需要且只能指定 title 或 group 之一")
+
+        days = self.window(window_days, end_day)
+        if group is not None:
+            if word_groups is None or filter_words is None:
+                from .data_processor import load_frequency_words
+
+                word_groups, filter_words = load_frequency_words()
+            counts = self.group_counts(word_groups, filter_words, window_days, end_day)
+            return counts.get(group, {day: 0 for day in days})
+
+        with self.repository.lock:
+            rows = self.repository.connection.execute(
+                "SELECT day, SUM(count) FROM history_titles"
+                " WHERE title_key = ? AND day BETWEEN ? AND ? GROUP BY day",
+                (normalize_title_key(title), days[0], days[-1]),
+            ).fetchall()
+        series = dict.fromkeys(days, 0)
+        series.update(rows)
+        return series
+
+    def rank_series(
+        self,
+        title: str,
+        window_days: int = 30,
+        platform_id: Optional[str] = None,
+        end_day: Optional[str] = None,
+    ) -> List[Tuple[str, int]]:
+        """窗口内每天的最好排名 [(日期, 排名)]，只包含出现过的日期"""
+        days = self.window(window_days, end_day)
+        query = (
+            "SELECT day, MIN(best_rank) FROM history_titles"
+            " WHERE title_key = ? AND day BETWEEN ? AND ?"
+        )
+        params: List = [normalize_title_key(title), days[0], days[-1]]
+        if platform_id is not None:
+            query += " AND platform_id = ?"
+            params.append(platform_id)
+        query += " GROUP BY day ORDER BY day"
+        with self.repository.lock:
+            return [
+                (day, rank)
+                for day, rank in self.repository.connection.execute(query, params)
+            ]
+
+    def first_seen(self, title: str) -> Optional[Tuple[str, str]]:
+        """标题在历史中首次出现的 (日期, 时间)，保留期内未出现过返回 None"""
+        with self.repository.lock:
+            row = self.repository.connection.execute(
+                "SELECT day, MIN(first_time) FROM history_titles"
+                " WHERE title_key = ? AND day = ("
+                "   SELECT MIN(day) FROM history_titles WHERE title_key = ?"
+                " )",
+                (normalize_title_key(title),) * 2,
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return row[0], row[1]
+
+    def group_counts(
+        self,
+        word_groups: List[Dict],
+        filter_words: List[str],
+        window_days: int = 7,
+        end_day: Optional[str] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """窗口内每个词组每天命中的标题条数 {词组: {日期: 条数}}
+
+        每天的计数按频率词配置指纹缓存，只有首次查询或当天重新压缩后才重新分类。
+        """
+        days = self.window(window_days, end_day)
+        fingerprint = rules_hash(word_groups, filter_words)
+        self._fill_group_counts(word_groups, filter_words, fingerprint, days)
+
+        counts = {group["group_key"]: dict.fromkeys(days, 0) for group in word_groups}
+        with self.repository.lock:
+            rows = self.repository.connection.execute(
+                "SELECT day, group_key, title_count FROM history_groups"
+                " WHERE rules_hash = ? AND day BETWEEN ? AND ?",
+                (fingerprint, days[0], days[-1]),
+            ).fetchall()
+        for day, group_key, title_count in rows:
+            if group_key in counts:
+                counts[group_key][day] = title_count
+        return counts
+
+    def _fill_group_counts(
+        self,
+        word_groups: List[Dict],
+        filter_words: List[str],
+        fingerprint: str,
+        days: List[str],
+    ) -> None:
+        from .data_processor import get_word_matcher
+
+        if not word_groups:
+            return
+        conn = self.repository.connection
+        with self.repository.lock:
+            missing_days = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT h.day FROM history_days h"
+                    " WHERE h.day BETWEEN ? AND ? AND NOT EXISTS ("
+                    "   SELECT 1 FROM history_groups g"
+                    "   WHERE g.rules_hash = ? AND g.day = h.day"
+                    " )",
+                    (days[0], days[-1], fingerprint),
+                )
+            ]
+        if not missing_days:
+            return
+
+        matcher = get_word_matcher(word_groups, filter_words)
+        group_keys = [group["group_key"] for group in word_groups]
+        for day in missing_days:
+            counts = [0] * len(group_keys)
+            with self.repository.lock:
+                titles = conn.execute(
+                    "SELECT title FROM history_titles WHERE day = ?", (day,)
+                ).fetchall()
+            for (title,) in titles:
+                _, group_index = matcher.classify(title)
+                if group_index is not None:
+                    counts[group_index] += 1
+            # 零计数也写入，标记该日已按此配置计算过
+            with self.repository.lock, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO history_groups"
+                    " (rules_hash, day, group_key, title_count) VALUES (?, ?, ?, ?)",
+                    [
+                        (fingerprint, day, group_key, count)
+                        for group_key, count in zip(group_keys, counts)
+                    ],
+                )
+
+    def week_over_week(
+        self,
+        word_groups: List[Dict],
+        filter_words: List[str],
+        window_days: Optional[int] = None,
+        end_day: Optional[str] = None,
+    ) -> Dict[str, Tuple[int, int]]:
+        """每个词组最近 window_days 天与之前同样天数的标题条数 {词组: (本期, 上期)}"""
+        if window_days is None:
+            window_days = CONFIG["HISTORY"]["TREND_WINDOW_DAYS"]
+        counts = self.group_counts(word_groups, filter_words, window_days * 2, end_day)
+        result = {}
+        for group_key, series in counts.items():
+            values = list(series.values())
+            result[group_key] = (sum(values[window_days:]), sum(values[:window_days]))
+        return result
+
+
+_history: Optional[TrendHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> TrendHistory:
+    """获取全局趋势历史实例（与抓取结果共用同一个数据库）"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = TrendHistory(get_repository())
+    return _history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多日趋势历史维护与查询")
+    parser.add_argument("--compact", action="store_true", help="压缩所有待压缩的日期")
+    parser.add_argument("--title", help="查询标题的每日出现次数、排名轨迹和首次出现时间")
+    parser.add_argument("--group", help="查询词组（频率词组名）的每日标题条数")
+    parser.add_argument("--window", type=int, default=30, help="查询窗口天数")
+    parser.add_argument("--wow", action="store_true", help="输出各词组的周环比")
+    args = parser.parse_args()
+
+    history = get_history()
+    if args.compact:
+        print(f"已压缩 {history.compact_all()} 天的历史摘要")
+    if args.title:
+        print(f"每日出现次数: {history.appearances(title=args.title, window_days=args.window)}")
+        print(f"排名轨迹: {history.rank_series(args.title, args.window)}")
+        print(f"首次出现: {history.first_seen(args.title)}")
+    if args.group:
+        print(f"每日标题条数: {history.appearances(group=args.group, window_days=args.window)}")
+    if args.wow:
+        from .data_processor import load_frequency_words
+
+        for group_key, (current, previous) in history.week_over_week(
+            *load_frequency_words()
+        ).items():
+            print(f"  {group_key}: {current} / {previous}")
+    if not (args.compact or args.title or args.group or args.wow):
+        parser.print_help()
@@ -0,0 +1,99 @@
+﻿import argparse
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .config_loader import CONFIG
+
+
+class FileWatcher:
+    """按 mtime/大小 轮询单个文件的变化，内容哈希未变（如 touch、重新挂载）不视为变化"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._signature = self._stat()
+        self._content_hash = self._digest()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _digest(self) -> Optional[str]:
+        try:
+            return hashlib.sha256(self.path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        # 文件被删除或正在替换时保持当前内容，等待下一次检查
+        if signature is None:
+            return False
+        content_hash = self._digest()
+        if content_hash is None or content_hash == self._content_hash:
+            return False
+        self._content_hash = content_hash
+        return True
+
+
+class ConfigReloader:
+    """监视 config.yaml 和 frequency_words.txt，供常驻进程在每轮执行前检查
+
+    - 配置文件变化：CONFIG.reload() 整体替换配置，加载失败时保留当前配置
+    - 频率词变化：预先编译新规则，下一轮分类时只重新分类受影响词组的标题
+    """
+
+    def __init__(self, config_path: Optional[str] = None, frequency_path: Optional[str] = None):
+        self.config_watcher = FileWatcher(
+            config_path or os.environ.get("CONFIG_PATH", "config/config.yaml")
+        )
+        self.frequency_watcher = FileWatcher(
+            frequency_path
+            or os.environ.get("FREQUENCY_WORDS_PATH", "config/frequency_words.txt")
+        )
+
+    def check(self) -> Tuple[bool, bool]:
+        """检查并重新加载，返回 (配置是否变化, 频率词是否变化)"""
+        config_changed = False
+        if self.config_watcher.changed():
+            print(f"检测到配置文件变化: {self.config_watcher.path}")
+            config_changed = CONFIG.reload()
+
+        words_changed = False
+        if self.frequency_watcher.changed():
+            from .data_processor import load_frequency_words
+
+            print(f"检测到频率词文件变化: {self.frequency_watcher.path}")
+            try:
+                word_groups, _ = load_frequency_words(str(self.frequency_watcher.path))
+            except Exception as e:
+                print(f"频率词重新加载失败，继续使用当前规则: {e}")
+            else:
+                print(f"频率词已重新加载，共 {len(word_groups)} 个词组")
+                words_changed = True
+
+        return config_changed, words_changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="监视配置文件和频率词文件的变化")
+    parser.add_argument("--interval", type=float, default=2.0, help="轮询间隔（秒）")
+    args = parser.parse_args()
+
+    CONFIG.snapshot()
+    reloader = ConfigReloader()
+    print("开始监视，按 Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(args.interval)
+            reloader.check()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,287 @@
+﻿import argparse
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .utils import optional_import
+
+
+NON_DIGIT_PATTERN = re.compile(r"\D")
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+ZQRB_TIME_PATTERN = re.compile(r"时间:(\d{4}年\d{1,2}月\d{1,2}日)")
+# 随仓库提供的已保存页面（tophub_*.html / zqrb_*.html），供性能对比和一致性测试使用
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "html"
+
+
+def _has_class(class_name: str) -> str:
+    """生成按 class 单词匹配的 XPath 条件，与 bs4 的 class_ 匹配规则一致"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _lxml_text(element) -> str:
+    """等价于 bs4 的 get_text(strip=True)"""
+    return "".join(part.strip() for part in element.itertext())
+
+
+def _parse_rank(rank_text: str, default_rank: int) -> int:
+    rank_text = NON_DIGIT_PATTERN.sub("", rank_text)
+    return int(rank_text) if rank_text.isdigit() else default_rank
+
+
+def _build_tophub_item(title: str, url: str, rank: int, source_name: str) -> Dict:
+    return {
+        "title": title,
+        "url": url,
+        "mobileUrl": url,
+        "rank": rank,
+        "source": source_name,
+        # 注意,不能在这里添加date,否则会影响去重效果
+    }
+
+
+def _build_zqrb_item(
+    idx: int,
+    title: str,
+    url: str,
+    time_text: str,
+    cutoff_date: Optional[datetime],
+) -> Optional[Dict]:
+    """构建证券日报网条目，超出时间范围时返回None"""
+    # 清理标题中的HTML标签
+    title = HTML_TAG_PATTERN.sub("", title)
+
+    news_date = None
+    time_match = ZQRB_TIME_PATTERN.search(time_text) if time_text else None
+    if time_match:
+        try:
+            # 将中文日期转换为标准格式
+            time_str = (
+                time_match.group(1)
+                .replace("年", "-")
+                .replace("月", "-")
+                .replace("日", "")
+            )
+            news_date = datetime.strptime(time_str, "%Y-%m-%d")
+        except Exception:
+            pass
+
+    # 时间过滤
+    if cutoff_date and news_date and news_date < cutoff_date:
+        return None
+
+    return {
+        "title": title,
+        "url": url,
+        "mobileUrl": url,  # 使用相同URL
+        "rank": idx,
+        "source": "证券日报网",
+        "date": news_date.strftime("%Y-%m-%d") if news_date else "未知",
+    }
+
+
+def parse_tophub_items_bs4(html_content: str) -> List[Dict]:
+    """使用 BeautifulSoup 解析Tophub页面"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    items = []
+
+    for card in soup.find_all("div", class_="cc-cd"):
+        source_name = ""
+        source_link = card.find("a")
+        if source_link:
+            source_name_div = source_link.find("div", class_="cc-cd-lb")
+            if source_name_div:
+                source_name = source_name_div.get_text(strip=True)
+
+        news_items = card.find("div", class_="cc-cd-cb-l")
+        if not news_items:
+            continue
+
+        for i, item in enumerate(news_items.find_all("a", rel="nofollow"), 1):
+            rank_span = item.find("span", class_="s")
+            rank = _parse_rank(rank_span.get_text(strip=True), i) if rank_span else i
+
+            title_span = item.find("span", class_="t")
+            title = title_span.get_text(strip=True) if title_span else "无标题"
+
+            items.append(
+                _build_tophub_item(title, item.get("href", ""), rank, source_name)
+            )
+
+    return items
+
+
+def parse_tophub_items_lxml(html_content: str) -> List[Dict]:
+    """使用 lxml XPath 解析Tophub页面"""
+    tree = optional_import("lxml.html").fromstring(html_content)
+    items = []
+
+    for card in tree.xpath(f"//div[{_has_class('cc-cd')}]"):
+        source_name = ""
+        source_link = card.xpath(".//a[1]")
+        if source_link:
+            source_name_div = source_link[0].xpath(f".//div[{_has_class('cc-cd-lb')}]")
+            if source_name_div:
+                source_name = _lxml_text(source_name_div[0])
+
+        news_items = card.xpath(f".//div[{_has_class('cc-cd-cb-l')}]")
+        if not news_items:
+            continue
+
+        links = news_items[0].xpath(
+            ".//a[contains(concat(' ', normalize-space(@rel), ' '), ' nofollow ')]"
+        )
+        for i, item in enumerate(links, 1):
+            rank_span = item.xpath(f".//span[{_has_class('s')}]")
+            rank = _parse_rank(_lxml_text(rank_span[0]), i) if rank_span else i
+
+            title_span = item.xpath(f".//span[{_has_class('t')}]")
+            title = _lxml_text(title_span[0]) if title_span else "无标题"
+
+            items.append(
+                _build_tophub_item(title, item.get("href", ""), rank, source_name)
+            )
+
+    return items
+
+
+def parse_zqrb_items_bs4(
+    html_content: str, cutoff_date: Optional[datetime] = None
+) -> List[Dict]:
+    """使用 BeautifulSoup 解析证券日报网搜索结果"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    items = []
+
+    result_list = soup.find("dl", class_="result-list")
+    if not result_list:
+        return items
+
+    for idx, dt_item in enumerate(result_list.find_all("dt"), 1):
+        link = dt_item.find("a")
+        if not link:
+            continue
+
+        # 获取时间信息（从相邻的dd元素）
+        time_text = ""
+        dd_item = dt_item.find_next_sibling("dd")
+        if dd_item:
+            time_info = dd_item.find("p", class_="field-info")
+            if time_info:
+                time_text = time_info.get_text()
+
+        item = _build_zqrb_item(
+            idx, link.get_text(strip=True), link.get("href", ""), time_text, cutoff_date
+        )
+        if item:
+            items.append(item)
+
+    return items
+
+
+def parse_zqrb_items_lxml(
+    html_content: str, cutoff_date: Optional[datetime] = None
+) -> List[Dict]:
+    """使用 lxml XPath 解析证券日报网搜索结果"""
+    tree = optional_import("lxml.html").fromstring(html_content)
+    items = []
+
+    result_list = tree.xpath(f"//dl[{_has_class('result-list')}]")
+    if not result_list:
+        return items
+
+    for idx, dt_item in enumerate(result_list[0].xpath(".//dt"), 1):
+        link = dt_item.xpath(".//a[1]")
+        if not link:
+            continue
+
+        time_text = ""
+        dd_item = dt_item.xpath("following-sibling::dd[1]")
+        if dd_item:
+            time_info = dd_item[0].xpath(f".//p[{_has_class('field-info')}]")
+            if time_info:
+                time_text = time_info[0].text_content()
+
+        item = _build_zqrb_item(
+            idx, _lxml_text(link[0]), link[0].get("href", ""), time_text, cutoff_date
+        )
+        if item:
+            items.append(item)
+
+    return items
+
+
+PARSER_BACKENDS: Dict[str, Dict[str, Callable]] = {
+    "bs4": {"tophub": parse_tophub_items_bs4, "zqrb": parse_zqrb_items_bs4},
+    "lxml": {"tophub": parse_tophub_items_lxml, "zqrb": parse_zqrb_items_lxml},
+}
+
+
+def resolve_parser_backend(name: str = "auto") -> str:
+    """解析配置的解析器名称，auto 时优先使用 lxml，未安装时回退到 bs4"""
+    if name == "auto":
+        # lxml 未安装时回退到 bs4
+        return "lxml" if optional_import("lxml.html") is not None else "bs4"
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"无效的HTML解析器: {name}")
+    if name == "lxml" and optional_import("lxml.html") is None:
+        print("未安装 lxml，HTML解析回退到 bs4")
+        return "bs4"
+    return name
+
+
+def parse_tophub_items(html_content: str, backend: str = "auto") -> List[Dict]:
+    """解析Tophub页面，返回新闻条目列表"""
+    return PARSER_BACKENDS[resolve_parser_backend(backend)]["tophub"](html_content)
+
+
+def parse_zqrb_items(
+    html_content: str,
+    cutoff_date: Optional[datetime] = None,
+    backend: str = "auto",
+) -> List[Dict]:
+    """解析证券日报网搜索结果，返回新闻条目列表"""
+    return PARSER_BACKENDS[resolve_parser_backend(backend)]["zqrb"](
+        html_content, cutoff_date
+    )
+
+
+def benchmark_parsers(files: List[str], source: str, repeat: int = 5) -> None:
+    """对比各解析器在已保存页面上的单页耗时和解析结果一致性"""
+    backends = [name for name in PARSER_BACKENDS if resolve_parser_backend(name) == name]
+
+    for file_path in files:
+        html_content = Path(file_path).read_text(encoding="utf-8")
+        print(f"{file_path}:")
+
+        baseline = None
+        for backend in backends:
+            parse = PARSER_BACKENDS[backend][source]
+            start = time.perf_counter()
+            for _ in range(repeat):
+                items = parse(html_content)
+            elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+
+            if baseline is None:
+                baseline = items
+                parity = "基准"
+            else:
+                parity = "一致" if items == baseline else "不一致"
+            print(f"  {backend:>5}: {elapsed_ms:8.2f} ms/页，{len(items)} 条，{parity}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML解析器性能对比")
+    parser.add_argument("source", choices=["tophub", "zqrb"], help="页面来源")
+    parser.add_argument(
+        "files", nargs="*", help="已保存的HTML页面，默认使用 tests/fixtures/html 中的页面"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="每个页面重复解析次数")
+    args = parser.parse_args()
+
+    files = args.files or sorted(str(path) for path in FIXTURE_DIR.glob(f"{args.source}_*.html"))
+    benchmark_parsers(files, args.source, args.repeat)
@@ -0,0 +1,143 @@
+﻿import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config_loader import CONFIG
+
+
+class HttpCache:
+    """磁盘HTTP响应缓存：记录 ETag/Last-Modified/正文哈希及解析结果，按LRU淘汰"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 20):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / self.INDEX_FILE
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.stats = {"not_modified": 0, "unchanged": 0, "misses": 0, "evictions": 0}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def from_config(cls) -> Optional["HttpCache"]:
+        """根据 CONFIG["HTTP_CACHE"] 创建缓存，未启用时返回None"""
+        cache_config = CONFIG["HTTP_CACHE"]
+        if not cache_config["ENABLED"]:
+            return None
+        return cls(cache_config["PATH"], cache_config["MAX_SIZE_MB"])
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None, variant: str = "") -> str:
+        """根据URL、请求参数和解析变体生成缓存键"""
+        params_text = json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+        raw_key = f"{url}|{params_text}|{variant}"
+        return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def hash_body(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def _load(self) -> None:
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"HTTP缓存索引读取失败，将重新建立: {e}")
+            return
+
+        # 按最近使用时间恢复LRU顺序
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["last_used"]):
+            self._entries[key] = entry
+            self._total_bytes += entry["size"]
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """生成条件请求头"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _touch(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry:
+            entry["last_used"] = time.time()
+            self._entries.move_to_end(key)
+        return entry
+
+    def get_not_modified(self, key: str) -> Optional[List[Dict]]:
+        """服务端返回304时取出缓存的解析结果"""
+        with self._lock:
+            entry = self._touch(key)
+            if entry is None:
+                return None
+            self.stats["not_modified"] += 1
+            return entry["items"]
+
+    def get_unchanged(self, key: str, body_hash: str) -> Optional[List[Dict]]:
+        """正文哈希与缓存一致时取出缓存的解析结果，否则记为未命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["body_hash"] == body_hash:
+                self._touch(key)
+                self.stats["unchanged"] += 1
+                return entry["items"]
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, key: str, headers, body_hash: str, items: List[Dict]) -> None:
+        """记录响应的校验信息和解析结果"""
+        entry = {
+            "etag": headers.get("ETag", ""),
+            "last_modified": headers.get("Last-Modified", ""),
+            "body_hash": body_hash,
+            "items": items,
+            "last_used": time.time(),
+        }
+        entry["size"] = len(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry:
+                self._total_bytes -= old_entry["size"]
+            self._entries[key] = entry
+            self._total_bytes += entry["size"]
+
+            # 超出容量时淘汰最久未使用的条目
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted["size"]
+                self.stats["evictions"] += 1
+
+    def save(self) -> None:
+        """将缓存索引原子写入磁盘"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def get_summary(self) -> str:
+        hits = self.stats["not_modified"] + self.stats["unchanged"]
+        return (
+            f"HTTP缓存: 命中 {hits}（304未修改 {self.stats['not_modified']}，"
+            f"正文未变化 {self.stats['unchanged']}），未命中 {self.stats['misses']}，"
+            f"淘汰 {self.stats['evictions']}，共 {len(self._entries)} 条 "
+            f"{self._total_bytes / 1024:.0f}KB"
+        )
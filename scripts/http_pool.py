@@ -0,0 +1,105 @@
+﻿import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from .config_loader import CONFIG
+
+if TYPE_CHECKING:
+    import requests
+
+
+class HttpSessionPool:
+    """按主机复用的 HTTP 会话池，保持长连接并统计连接复用情况"""
+
+    def __init__(
+        self,
+        proxy_url: Optional[str] = None,
+        pool_size: int = 4,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+    ):
+        self.proxy_url = proxy_url
+        self.pool_size = pool_size
+        self.host_pool_sizes = host_pool_sizes or {}
+        self._sessions: Dict[str, "requests.Session"] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, proxy_url: Optional[str] = None) -> "HttpSessionPool":
+        """根据 CONFIG["HTTP_POOL"] 创建会话池"""
+        pool_config = CONFIG["HTTP_POOL"]
+        return cls(
+            proxy_url=proxy_url,
+            pool_size=pool_config["POOL_SIZE"],
+            host_pool_sizes=pool_config["HOSTS"],
+        )
+
+    def get_session(self, url: str) -> "requests.Session":
+        """获取URL对应主机的会话，不存在时创建"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        host = urlparse(url).hostname or url
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                pool_size = self.host_pool_sizes.get(host, self.pool_size)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if self.proxy_url:
+                    session.proxies = {"http": self.proxy_url, "https": self.proxy_url}
+                self._sessions[host] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        return self.get_session(url).request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+    def _iter_connection_pools(self) -> Iterable:
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        for session in sessions:
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+                for manager in managers:
+                    for key in list(manager.pools.keys()):
+                        pool = manager.pools.get(key)
+                        if pool is not None:
+                            yield pool
+
+    def get_stats(self) -> Dict[str, int]:
+        """统计新建连接数与复用连接数"""
+        opened = 0
+        total_requests = 0
+        for pool in self._iter_connection_pools():
+            opened += pool.num_connections
+            total_requests += pool.num_requests
+
+        return {
+            "hosts": len(self._sessions),
+            "requests": total_requests,
+            "opened": opened,
+            "reused": max(0, total_requests - opened),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def http_client(session_pool: Optional[HttpSessionPool] = None):
+    """优先使用会话池，未提供时按需导入 requests 模块"""
+    if session_pool is not None:
+        return session_pool
+    import requests
+
+    return requests
@@ -0,0 +1,313 @@
+﻿import argparse
+import random
+import sys
+import tracemalloc
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config_loader import CONFIG
+
+
+class RankStats:
+    """排名累加器：按首次出现顺序记录不重复排名，并随观测实时维护统计量
+
+    兼容原有排名列表的常用操作（迭代、len、in、下标、append），
+    合并一个快照的排名只需 O(新排名数)，展示和权重计算直接读取统计字段。
+    """
+
+    __slots__ = (
+        "histogram",
+        "min_rank",
+        "max_rank",
+        "score_sum",
+        "high_count",
+        "threshold",
+    )
+
+    def __init__(self, ranks: Iterable[int] = (), threshold: Optional[int] = None):
+        # 排名 -> 被观测到的次数，dict 保持首次出现顺序
+        self.histogram: Dict[int, int] = {}
+        self.min_rank = 0
+        self.max_rank = 0
+        # Σ(11 - min(rank, 10))，与权重计算中的排名得分一致
+        self.score_sum = 0
+        self.high_count = 0
+        self.threshold = CONFIG["RANK_THRESHOLD"] if threshold is None else threshold
+        for rank in ranks:
+            self.append(rank)
+
+    @classmethod
+    def coerce(cls, ranks: Optional[Iterable[int]]) -> "RankStats":
+        """已经是 RankStats 时原样返回（共享同一累加器），否则按列表构建"""
+        if isinstance(ranks, RankStats):
+            return ranks
+        return cls(ranks or ())
+
+    def append(self, rank: int) -> None:
+        """记录一次排名观测"""
+        histogram = self.histogram
+        seen = histogram.get(rank)
+        if seen is not None:
+            histogram[rank] = seen + 1
+            return
+
+        histogram[rank] = 1
+        if len(histogram) == 1:
+            self.min_rank = self.max_rank = rank
+        elif rank < self.min_rank:
+            self.min_rank = rank
+        elif rank > self.max_rank:
+            self.max_rank = rank
+        self.score_sum += 11 - (rank if rank < 10 else 10)
+        if rank <= self.threshold:
+            self.high_count += 1
+
+    def merge(self, ranks: Iterable[int]) -> None:
+        """合并另一次快照的排名（就地更新）"""
+        for rank in ranks:
+            self.append(rank)
+
+    def copy(self) -> "RankStats":
+        other = RankStats((), self.threshold)
+        other.histogram = dict(self.histogram)
+        other.min_rank = self.min_rank
+        other.max_rank = self.max_rank
+        other.score_sum = self.score_sum
+        other.high_count = self.high_count
+        return other
+
+    def high_count_for(self, threshold: int) -> int:
+        """指定阈值下的高排名个数，阈值与累加器一致时直接读取"""
+        if threshold == self.threshold:
+            return self.high_count
+        return sum(1 for rank in self.histogram if rank <= threshold)
+
+    def to_list(self) -> List[int]:
+        return list(self.histogram)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.histogram)
+
+    def __len__(self) -> int:
+        return len(self.histogram)
+
+    def __contains__(self, rank: int) -> bool:
+        return rank in self.histogram
+
+    def __getitem__(self, index: int) -> int:
+        return self.to_list()[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RankStats):
+            return self.histogram.keys() == other.histogram.keys()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RankStats({self.to_list()!r})"
+
+
+class SlotRecord:
+    """基于 __slots__ 的轻量记录，兼容原有 dict 的下标/get/in 访问方式"""
+
+    __slots__ = ()
+
+    # 旧的 dict 键名 -> 属性名
+    KEY_ALIASES: Dict[str, str] = {}
+
+    def _attr_name(self, key: str) -> Optional[str]:
+        name = self.KEY_ALIASES.get(key, key)
+        return name if name in self.__slots__ else None
+
+    def __getitem__(self, key: str) -> Any:
+        name = self._attr_name(key)
+        if name is None:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        name = self._attr_name(key)
+        if name is None:
+            raise KeyError(key)
+        setattr(self, name, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self._attr_name(key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        name = self._attr_name(key)
+        return getattr(self, name) if name is not None else default
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((name, getattr(self, name)) for name in self.__slots__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def copy(self) -> "SlotRecord":
+        """浅拷贝，与 dict.copy 一致（排名等可变字段仍共享）"""
+        other = object.__new__(type(self))
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SlotRecord):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class TitleRecord(SlotRecord):
+    """某平台一次抓取（或当日合并）中的一条标题：排名列表和链接"""
+
+    __slots__ = ("ranks", "url", "mobile_url", "date")
+
+    KEY_ALIASES = {"mobileUrl": "mobile_url"}
+
+    def __init__(
+        self,
+        ranks: Iterable[int],
+        url: str = "",
+        mobile_url: str = "",
+        date: str = "",
+    ):
+        self.ranks = RankStats.coerce(ranks)
+        self.url = url
+        self.mobile_url = mobile_url
+        self.date = date
+
+
+class TitleStats(SlotRecord):
+    """标题的当日统计信息，也作为报告和推送中的标题条目"""
+
+    __slots__ = (
+        "title",
+        "source_name",
+        "first_time",
+        "last_time",
+        "time_display",
+        "count",
+        "ranks",
+        "rank_threshold",
+        "url",
+        "mobile_url",
+        "is_new",
+        "weight",
+        "min_rank",
+    )
+
+    KEY_ALIASES = {"mobileUrl": "mobile_url"}
+
+    def __init__(
+        self,
+        first_time: str = "",
+        last_time: str = "",
+        count: int = 1,
+        ranks: Optional[Iterable[int]] = None,
+        url: str = "",
+        mobile_url: str = "",
+        title: str = "",
+        source_name: str = "",
+        time_display: str = "",
+        rank_threshold: int = 0,
+        is_new: bool = False,
+    ):
+        self.title = title
+        self.source_name = source_name
+        self.first_time = first_time
+        self.last_time = last_time
+        self.time_display = time_display
+        self.count = count
+        self.ranks = RankStats.coerce(ranks)
+        self.rank_threshold = rank_threshold
+        self.url = url
+        self.mobile_url = mobile_url
+        self.is_new = is_new
+        self.weight = 0.0
+        self.min_rank = 999
+
+
+def intern_text(text: str) -> str:
+    """驻留平台ID、标题、时间标签等高度重复的字符串，多个结构共享同一对象"""
+    return sys.intern(text) if type(text) is str else text
+
+
+def _build_day(runs: int, platforms: int, titles: int, use_records: bool, seed: int):
+    """模拟一天的多批次抓取合并结果，返回 (all_results, title_info)
+
+    两种结构构建相同的对象图（同一标题的结果和统计共享一个 RankStats），只有容器不同
+    """
+    rng = random.Random(seed)
+    threshold = CONFIG["RANK_THRESHOLD"]
+    all_results: Dict[str, Dict] = {}
+    title_info: Dict[str, Dict] = {}
+    for run in range(runs):
+        time_label = f"{run // 2:02d}时{run % 2 * 30:02d}分"
+        if use_records:
+            time_label = intern_text(time_label)
+        for platform in range(platforms):
+            source_id = f"platform-{platform}"
+            if use_records:
+                source_id = intern_text(source_id)
+            source_results = all_results.setdefault(source_id, {})
+            source_info = title_info.setdefault(source_id, {})
+            for rank in range(1, titles + 1):
+                # 每批次约有 1/3 的标题是新的
+                title = f"{source_id} 新闻标题 {rng.randint(0, titles * runs // 3)}"
+                if use_records:
+                    title = intern_text(title)
+                url = f"https://example.com/{source_id}/{hash(title) & 0xFFFF}"
+                if title in source_results:
+                    if rank not in source_results[title]["ranks"]:
+                        source_results[title]["ranks"].append(rank)
+                    source_info[title]["last_time"] = time_label
+                    source_info[title]["count"] += 1
+                elif use_records:
+                    record = TitleRecord(RankStats([rank], threshold), url, url)
+                    source_results[title] = record
+                    source_info[title] = TitleStats(
+                        time_label, time_label, 1, record.ranks, url, url
+                    )
+                else:
+                    ranks = RankStats([rank], threshold)
+                    source_results[title] = {"ranks": ranks, "url": url, "mobileUrl": url}
+                    source_info[title] = {
+                        "first_time": time_label,
+                        "last_time": time_label,
+                        "count": 1,
+                        "ranks": ranks,
+                        "url": url,
+                        "mobileUrl": url,
+                    }
+    return all_results, title_info
+
+
+def benchmark_memory(runs: int = 48, platforms: int = 25, titles: int = 50) -> None:
+    """对比 dict 与 slotted 记录在模拟一天数据上的内存峰值"""
+    print(f"模拟 {runs} 个批次 × {platforms} 个平台 × {titles} 条标题")
+    # 配置在计时窗口外加载，避免计入 slots 一侧的峰值
+    CONFIG["RANK_THRESHOLD"]
+    for label, use_records in (("dict", False), ("slots", True)):
+        tracemalloc.start()
+        data = _build_day(runs, platforms, titles, use_records, seed=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        title_count = sum(len(source) for source in data[0].values())
+        print(f"  {label:>5}: 峰值 {peak / 1024 / 1024:6.2f} MB，{title_count} 条标题")
+        del data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="标题记录内存占用对比")
+    parser.add_argument("--runs", type=int, default=48, help="当日批次数")
+    parser.add_argument("--platforms", type=int, default=25, help="平台数")
+    parser.add_argument("--titles", type=int, default=50, help="每批次每平台标题数")
+    args = parser.parse_args()
+
+    benchmark_memory(args.runs, args.platforms, args.titles)
@@ -1,9 +1,10 @@
 ﻿import time
-import requests
 from typing import Dict, List, Optional
 from .config_loader import CONFIG
-from .data_processor import prepare_report_data
-from .report_generator import render_feishu_content, render_dingtalk_content, split_content_into_batches
+from .http_pool import HttpSessionPool, http_client
+from .data_processor import TitleClassification, prepare_report_data
+from .report_generator import render_feishu_content, render_dingtalk_content, split_content_into_batches, \
+    render_burst_alert
 from .utils import get_beijing_time
 
 
@@ -16,11 +17,36 @@ def send_to_webhooks(
     update_info: Optional[Dict] = None,
     proxy_url: Optional[str] = None,
     mode: str = "daily",
+    session_pool: Optional[HttpSessionPool] = None,
+    classification: Optional[TitleClassification] = None,
+    rising: Optional[Dict] = None,
 ) -> Dict[str, bool]:
-    """发送数据到多个webhook平台"""
+    """发送数据到多个webhook平台
+
+    rising 为热度速度引擎检测到的突发（含 alert 标记时先单独推送突发提醒）
+    """
     results = {}
 
-    report_data = prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode)
+    # 同一次推送的所有请求（含分批消息）复用长连接
+    if session_pool is None:
+        session_pool = HttpSessionPool.from_config(proxy_url)
+
+    if rising is not None:
+        has_burst = bool(rising.get("groups") or rising.get("stories"))
+        if has_burst and rising.get("alert"):
+            results.update(send_burst_alert(rising, proxy_url, session_pool))
+        if CONFIG["VELOCITY"]["BURST_ONLY_PUSH"] and not has_burst:
+            print(f"跳过{report_type}通知：未检测到突发热点")
+            return results
+
+    # 只推送每个词组权重最高的若干条（count_word_frequency 已按权重排序）
+    max_titles = CONFIG["MAX_TITLES_PER_GROUP"]
+    if max_titles > 0:
+        stats = [{**stat, "titles": stat["titles"][:max_titles]} for stat in stats]
+
+    report_data = prepare_report_data(
+        stats, failed_ids, new_titles, id_to_name, mode, classification
+    )
 
     feishu_url = CONFIG["FEISHU_WEBHOOK_URL"]
     dingtalk_url = CONFIG["DINGTALK_WEBHOOK_URL"]
@@ -33,19 +59,37 @@ def send_to_webhooks(
     # 发送到飞书
     if feishu_url:
         results["feishu"] = send_to_feishu(
-            feishu_url, report_data, report_type, update_info_to_send, proxy_url, mode
+            feishu_url,
+            report_data,
+            report_type,
+            update_info_to_send,
+            proxy_url,
+            mode,
+            session_pool,
         )
 
     # 发送到钉钉
     if dingtalk_url:
         results["dingtalk"] = send_to_dingtalk(
-            dingtalk_url, report_data, report_type, update_info_to_send, proxy_url, mode
+            dingtalk_url,
+            report_data,
+            report_type,
+            update_info_to_send,
+            proxy_url,
+            mode,
+            session_pool,
         )
 
     # 发送到企业微信
     if wework_url:
         results["wework"] = send_to_wework(
-            wework_url, report_data, report_type, update_info_to_send, proxy_url, mode
+            wework_url,
+            report_data,
+            report_type,
+            update_info_to_send,
+            proxy_url,
+            mode,
+            session_pool,
         )
 
     # 发送到 Telegram
@@ -58,6 +102,7 @@ def send_to_webhooks(
             update_info_to_send,
             proxy_url,
             mode,
+            session_pool,
         )
 
     if not results:
@@ -66,6 +111,98 @@ def send_to_webhooks(
     return results
 
 
+def send_burst_alert(
+    rising: Dict,
+    proxy_url: Optional[str] = None,
+    session_pool: Optional[HttpSessionPool] = None,
+) -> Dict[str, bool]:
+    """向所有已配置的webhook推送突发提醒（单条消息，不分批）"""
+    proxies = None
+    if proxy_url:
+        proxies = {"http": proxy_url, "https": proxy_url}
+    http = http_client(session_pool)
+
+    targets = []
+    if CONFIG["FEISHU_WEBHOOK_URL"]:
+        targets.append(
+            (
+                "feishu",
+                "飞书",
+                CONFIG["FEISHU_WEBHOOK_URL"],
+                {
+                    "msg_type": "text",
+                    "content": {"text": render_burst_alert(rising, "feishu")},
+                },
+            )
+        )
+    if CONFIG["DINGTALK_WEBHOOK_URL"]:
+        targets.append(
+            (
+                "dingtalk",
+                "钉钉",
+                CONFIG["DINGTALK_WEBHOOK_URL"],
+                {
+                    "msgtype": "markdown",
+                    "markdown": {
+                        "title": "TrendRadar 热点突发提醒",
+                        "text": render_burst_alert(rising, "dingtalk"),
+                    },
+                },
+            )
+        )
+    if CONFIG["WEWORK_WEBHOOK_URL"]:
+        targets.append(
+            (
+                "wework",
+                "企业微信",
+                CONFIG["WEWORK_WEBHOOK_URL"],
+                {
+                    "msgtype": "markdown",
+                    "markdown": {"content": render_burst_alert(rising, "wework")},
+                },
+            )
+        )
+    if CONFIG["TELEGRAM_BOT_TOKEN"] and CONFIG["TELEGRAM_CHAT_ID"]:
+        targets.append(
+            (
+                "telegram",
+                "Telegram",
+                f"https://api.telegram.org/bot{CONFIG['TELEGRAM_BOT_TOKEN']}/sendMessage",
+                {
+                    "chat_id": CONFIG["TELEGRAM_CHAT_ID"],
+                    "text": render_burst_alert(rising, "telegram"),
+                    "parse_mode": "HTML",
+                    "disable_web_page_preview": True,
+                },
+            )
+        )
+
+    results = {}
+    for key, name, url, payload in targets:
+        try:
+            response = http.post(
+                url,
+                headers={"Content-Type": "application/json"},
+                json=payload,
+                proxies=proxies,
+                timeout=30,
+            )
+            success = response.status_code == 200
+            if success and key in ("dingtalk", "wework"):
+                success = response.json().get("errcode") == 0
+            elif success and key == "telegram":
+                success = bool(response.json().get("ok"))
+            if success:
+                print(f"{name}突发提醒发送成功")
+            else:
+                print(f"{name}突发提醒发送失败，状态码：{response.status_code}")
+        except Exception as e:
+            print(f"{name}突发提醒发送出错：{e}")
+            success = False
+        results[f"{key}_burst_alert"] = success
+    return results
+
+
 def send_to_feishu(
     webhook_url: str,
     report_data: Dict,
@@ -73,6 +210,7 @@ def send_to_feishu(
     update_info: Optional[Dict] = None,
     proxy_url: Optional[str] = None,
     mode: str = "daily",
+    session_pool: Optional[HttpSessionPool] = None,
 ) -> bool:
     """发送到飞书"""
     headers = {"Content-Type": "application/json"}
@@ -96,9 +234,10 @@ def send_to_feishu(
     proxies = None
     if proxy_url:
         proxies = {"http": proxy_url, "https": proxy_url}
+    http = http_client(session_pool)
 
     try:
-        response = requests.post(
+        response = http.post(
             webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
         )
         if response.status_code == 200:
@@ -119,6 +258,7 @@ def send_to_dingtalk(
     update_info: Optional[Dict] = None,
     proxy_url: Optional[str] = None,
     mode: str = "daily",
+    session_pool: Optional[HttpSessionPool] = None,
 ) -> bool:
     """发送到钉钉"""
     headers = {"Content-Type": "application/json"}
@@ -136,9 +276,10 @@ def send_to_dingtalk(
     proxies = None
     if proxy_url:
         proxies = {"http": proxy_url, "https": proxy_url}
+    http = http_client(session_pool)
 
     try:
-        response = requests.post(
+        response = http.post(
             webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
         )
         if response.status_code == 200:
@@ -164,12 +305,14 @@ def send_to_wework(
     update_info: Optional[Dict] = None,
     proxy_url: Optional[str] = None,
     mode: str = "daily",
+    session_pool: Optional[HttpSessionPool] = None,
 ) -> bool:
     """发送到企业微信（支持分批发送）"""
     headers = {"Content-Type": "application/json"}
     proxies = None
     if proxy_url:
         proxies = {"http": proxy_url, "https": proxy_url}
+    http = http_client(session_pool)
 
     # 获取分批内容
     batches = split_content_into_batches(report_data, "wework", update_info, mode=mode)
@@ -191,7 +334,7 @@ def send_to_wework(
         payload = {"msgtype": "markdown", "markdown": {"content": batch_content}}
 
         try:
-            response = requests.post(
+            response = http.post(
                 webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -227,6 +370,7 @@ def send_to_telegram(
     update_info: Optional[Dict] = None,
     proxy_url: Optional[str] = None,
     mode: str = "daily",
+    session_pool: Optional[HttpSessionPool] = None,
 ) -> bool:
     """发送到Telegram（支持分批发送）"""
     headers = {"Content-Type": "application/json"}
@@ -235,6 +379,7 @@ def send_to_telegram(
     proxies = None
     if proxy_url:
         proxies = {"http": proxy_url, "https": proxy_url}
+    http = http_client(session_pool)
 
     # 获取分批内容
     batches = split_content_into_batches(
@@ -263,7 +408,7 @@ def send_to_telegram(
         }
 
         try:
-            response = requests.post(
+            response = http.post(
                 url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -0,0 +1,277 @@
+﻿import argparse
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from .config_loader import CONFIG
+from .storage import NewsRepository, get_repository, normalize_title_key
+
+
+POLLING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS poll_state (
+    platform_id TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    next_due REAL NOT NULL,
+    last_fetch REAL NOT NULL,
+    churn REAL NOT NULL,
+    churn_rate REAL NOT NULL,
+    fetches INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_STATE_COLUMNS = "interval, next_due, last_fetch, churn, churn_rate, fetches"
+
+
+class PollState:
+    """单个平台的轮询状态
+
+    - interval: 当前轮询间隔（分钟）
+    - churn: 最近一次抓取中新标题的比例
+    - churn_rate: EWMA 平滑后的每分钟新标题比例（变化速率），< 0 表示尚无估计
+    """
+
+    __slots__ = ("interval", "next_due", "last_fetch", "churn", "churn_rate", "fetches")
+
+    def __init__(
+        self,
+        interval: float,
+        next_due: float = 0.0,
+        last_fetch: float = 0.0,
+        churn: float = 0.0,
+        churn_rate: float = -1.0,
+        fetches: int = 0,
+    ):
+        self.interval = interval
+        self.next_due = next_due
+        self.last_fetch = last_fetch
+        self.churn = churn
+        self.churn_rate = churn_rate
+        self.fetches = fetches
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def allocate_intervals(
+    rates: Dict[str, float], budget: float, min_interval: float, max_interval: float
+) -> Dict[str, float]:
+    """按变化速率比例分配抓取频率（次/分钟），返回各平台的轮询间隔（分钟）
+
+    频率超出 [1/max_interval, 1/min_interval] 的平台固定在边界上，
+    剩余预算在其余平台间按比例重新分配，直到没有越界的平台。
+    """
+    low, high = 1 / max_interval, 1 / min_interval
+    frequencies: Dict[str, float] = {}
+    free = dict(rates)
+    remaining = budget
+    while free:
+        total = sum(free.values())
+        proposed = {
+            platform_id: (remaining * rate / total if total > 0 else remaining / len(free))
+            for platform_id, rate in free.items()
+        }
+        clamped = {
+            platform_id: min(max(frequency, low), high)
+            for platform_id, frequency in proposed.items()
+            if frequency < low or frequency > high
+        }
+        if not clamped:
+            frequencies.update(proposed)
+            break
+        for platform_id, frequency in clamped.items():
+            frequencies[platform_id] = frequency
+            remaining -= frequency
+            del free[platform_id]
+        remaining = max(remaining, 0.0)
+    return {platform_id: 1 / frequency for platform_id, frequency in frequencies.items()}
+
+
+class PollScheduler:
+    """按平台自适应的轮询调度（daemon 模式两次完整执行之间使用）
+
+    每次抓取后按新标题比例更新平台的变化速率，所有平台共享与统一调度相同的
+    请求预算（平台数 / base_interval 次每分钟），按变化速率比例分配抓取频率：
+    更新快的平台间隔缩短，几乎不变的平台间隔拉长，间隔限制在 [min, max] 内。
+    """
+
+    def __init__(self, repository: NewsRepository, polling_config: Optional[Dict] = None):
+        self.repository = repository
+        self._config = polling_config
+        with repository.lock:
+            repository.connection.executescript(POLLING_SCHEMA)
+
+    @property
+    def config(self) -> Dict:
+        """未显式传入时每次读取全局配置，配置热更新后立即生效"""
+        return self._config or CONFIG["POLLING"]
+
+    def _load_states(self) -> Dict[str, PollState]:
+        with self.repository.lock:
+            rows = self.repository.connection.execute(
+                f"SELECT platform_id, {_STATE_COLUMNS} FROM poll_state"
+            ).fetchall()
+        return {platform_id: PollState(*values) for platform_id, *values in rows}
+
+    def _save_states(self, states: Dict[str, PollState]) -> None:
+        conn = self.repository.connection
+        with self.repository.lock, conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO poll_state (platform_id, {_STATE_COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        platform_id,
+                        state.interval,
+                        state.next_due,
+                        state.last_fetch,
+                        state.churn,
+                        state.churn_rate,
+                        state.fetches,
+                    )
+                    for platform_id, state in states.items()
+                ],
+            )
+
+    def _previous_fetch(self, platform_id: str) -> Optional[tuple]:
+        """该平台最近一次成功抓取的 (时间戳, 标题键集合)"""
+        conn = self.repository.connection
+        with self.repository.lock:
+            row = conn.execute(
+                "SELECT r.id, r.created_at FROM run_platforms p JOIN runs r ON r.id = p.run_id"
+                " WHERE p.platform_id = ? AND p.failed = 0 ORDER BY r.id DESC LIMIT 1",
+                (platform_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            keys: Set[str] = {
+                normalize_title_key(title)
+                for (title,) in conn.execute(
+                    "SELECT title FROM titles WHERE run_id = ? AND platform_id = ?",
+                    (row[0], platform_id),
+                )
+            }
+        return row[1], keys
+
+    def due_platforms(self, platforms: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """到期需要轮询的平台（尚无状态的平台视为到期）"""
+        now = now or time.time()
+        states = self._load_states()
+        return [
+            platform
+            for platform in platforms
+            if platform["id"] not in states or states[platform["id"]].next_due <= now
+        ]
+
+    def next_due(self, platforms: List[Dict], now: Optional[float] = None) -> float:
+        """最早到期的轮询时间戳"""
+        now = now or time.time()
+        states = self._load_states()
+        return min(
+            (
+                states[platform["id"]].next_due if platform["id"] in states else now
+                for platform in platforms
+            ),
+            default=now + self.config["MAX_INTERVAL"] * 60,
+        )
+
+    def observe(
+        self,
+        platforms: List[Dict],
+        results: Dict,
+        failed_ids: Iterable[str] = (),
+        now: Optional[float] = None,
+    ) -> None:
+        """记录一次抓取（需在保存批次之前调用），更新变化速率并重新分配所有平台的间隔"""
+        now = now or time.time()
+        alpha = self.config["CHURN_ALPHA"]
+        base_interval = self.config["BASE_INTERVAL"]
+        states = self._load_states()
+
+        for platform_id, title_data in results.items():
+            state = states.setdefault(platform_id, PollState(base_interval))
+            previous = self._previous_fetch(platform_id)
+            if previous is not None and title_data:
+                previous_time, previous_keys = previous
+                current_keys = {normalize_title_key(title) for title in title_data}
+                churn = len(current_keys - previous_keys) / len(current_keys)
+                elapsed = max((now - previous_time) / 60, 1.0)
+                rate = churn / elapsed
+                state.churn = churn
+                state.churn_rate = (
+                    rate if state.churn_rate < 0 else alpha * rate + (1 - alpha) * state.churn_rate
+                )
+            state.last_fetch = now
+            state.fetches += 1
+
+        # 抓取失败的平台保持原间隔，到期后再试
+        for platform_id in failed_ids:
+            if platform_id not in results:
+                state = states.setdefault(platform_id, PollState(base_interval))
+                state.last_fetch = now
+
+        platform_ids = [platform["id"] for platform in platforms]
+        known_rates = [
+            states[platform_id].churn_rate
+            for platform_id in platform_ids
+            if platform_id in states and states[platform_id].churn_rate >= 0
+        ]
+        # 尚无估计的平台按已知平台的平均速率分配
+        default_rate = sum(known_rates) / len(known_rates) if known_rates else 1.0
+        rates = {
+            platform_id: (
+                states[platform_id].churn_rate
+                if platform_id in states and states[platform_id].churn_rate >= 0
+                else default_rate
+            )
+            for platform_id in platform_ids
+        }
+        intervals = allocate_intervals(
+            rates,
+            len(platform_ids) / base_interval,
+            self.config["MIN_INTERVAL"],
+            self.config["MAX_INTERVAL"],
+        )
+        for platform_id, interval in intervals.items():
+            state = states.get(platform_id)
+            if state is None:
+                continue
+            state.interval = interval
+            state.next_due = state.last_fetch + interval * 60
+
+        self._save_states(states)
+
+    def states(self) -> Dict[str, Dict]:
+        return {
+            platform_id: state.to_dict() for platform_id, state in self._load_states().items()
+        }
+
+
+_scheduler: Optional[PollScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_poll_scheduler() -> PollScheduler:
+    """获取全局平台轮询调度实例（与抓取结果共用同一个数据库）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PollScheduler(get_repository())
+    return _scheduler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="平台自适应轮询状态")
+    parser.parse_args()
+
+    now = time.time()
+    states = get_poll_scheduler().states()
+    if not states:
+        print("尚无轮询记录")
+    for platform_id, state in sorted(states.items(), key=lambda item: item[1]["interval"]):
+        due_in = (state["next_due"] - now) / 60
+        print(
+            f"{platform_id:24s} 间隔 {state['interval']:6.1f} 分钟"
+            f"  新标题比例 {state['churn']:.0%}"
+            f"  变化速率 {max(state['churn_rate'], 0):.4f}/分钟"
+            f"  {'已到期' if due_in <= 0 else f'{due_in:.0f} 分钟后到期'}"
+        )
@@ -0,0 +1,132 @@
+﻿import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """令牌桶，令牌数允许为负以便并发请求按顺序排队"""
+
+    def __init__(self, requests_per_second: float, burst: int):
+        self.rate = max(requests_per_second, 0.001)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        self.tokens -= 1
+
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    def block(self, seconds: float) -> None:
+        """在指定时间内暂停该桶的请求"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """按主机划分的限流器，空闲主机的请求立即发出"""
+
+    def __init__(
+        self,
+        requests_per_second: float = 1.0,
+        burst: int = 1,
+        jitter: float = 0.0,
+        host_overrides: Optional[Dict[str, Dict]] = None,
+        default_retry_after: float = 5.0,
+    ):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.jitter = jitter
+        self.host_overrides = host_overrides or {}
+        self.default_retry_after = default_retry_after
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, rate_limit_config: Dict) -> "HostRateLimiter":
+        """根据 CONFIG["RATE_LIMIT"] 创建限流器"""
+        return cls(
+            requests_per_second=rate_limit_config["REQUESTS_PER_SECOND"],
+            burst=rate_limit_config["BURST"],
+            jitter=rate_limit_config["JITTER"],
+            host_overrides=rate_limit_config["HOSTS"],
+        )
+
+    @staticmethod
+    def get_host(url_or_host: str) -> str:
+        """从URL中提取主机名"""
+        if "://" in url_or_host:
+            return urlparse(url_or_host).hostname or url_or_host
+        return url_or_host
+
+    def _get_bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            override = self.host_overrides.get(host, {})
+            bucket = TokenBucket(
+                override.get("requests_per_second", self.requests_per_second),
+                override.get("burst", self.burst),
+            )
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url_or_host: str) -> float:
+        """获取请求许可，必要时阻塞等待，返回实际等待秒数"""
+        host = self.get_host(url_or_host)
+        with self._lock:
+            wait = self._get_bucket(host).reserve()
+
+        if wait > 0:
+            if self.jitter > 0:
+                wait += random.uniform(0, self.jitter)
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, url_or_host: str, retry_after: Optional[float] = None) -> None:
+        """主机返回限流响应后暂停对其请求"""
+        host = self.get_host(url_or_host)
+        seconds = retry_after if retry_after is not None else self.default_retry_after
+        with self._lock:
+            self._get_bucket(host).block(seconds)
+        print(f"{host} 触发限流，{seconds:.1f} 秒内暂停请求")
+
+    def observe(self, url_or_host: str, response) -> bool:
+        """检查响应是否为限流响应（429 或带 Retry-After 的 503），是则记录暂停时间"""
+        if response.status_code == 429 or (
+            response.status_code == 503 and "Retry-After" in response.headers
+        ):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.penalize(url_or_host, retry_after)
+            return True
+        return False
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头，支持秒数和HTTP日期两种格式"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -1,9 +1,9 @@
 ﻿import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from .utils import get_beijing_time, html_escape, format_time_filename, format_date_folder, ensure_directory_exists, \
     get_output_path, clean_title
-from .data_processor import format_rank_display, prepare_report_data
+from .data_processor import TitleClassification, format_rank_display, prepare_report_data
 from .config_loader import CONFIG
 
 def format_title_for_platform(
@@ -140,6 +140,45 @@ def format_title_for_platform(
     else:
         return cleaned_title
 
+def format_trend_display(trend: Tuple[int, int]) -> str:
+    """词组环比显示：本期 / 上期 和变化幅度"""
+    current, previous = trend
+    if previous == 0:
+        return f"{current} / 0"
+    change = (current - previous) / previous * 100
+    arrow = "↑" if change > 0 else "↓" if change < 0 else "→"
+    return f"{current} / {previous} {arrow}{abs(change):.0f}%"
+
+
+def format_rising_item(item: Dict) -> str:
+    """突发上升条目：名称、当前值与基线、z 分数和每小时变化"""
+    return (
+        f"{item['label']}：当前 {item['value']:.0f}（基线 {item['baseline']:.1f}），"
+        f"z={item['zscore']:.1f}，{item['rate']:+.1f}/小时"
+    )
+
+
+def render_burst_alert(rising: Dict, platform: str) -> str:
+    """渲染突发提醒消息"""
+    now = get_beijing_time()
+    lines = []
+    for name, label in (("groups", "词组"), ("stories", "标题")):
+        for item in rising.get(name, []):
+            text = format_rising_item(item)
+            if platform == "telegram":
+                text = html_escape(text)
+            lines.append(f"• [{label}] {text}")
+
+    if platform == "telegram":
+        header = "<b>🚀 热点突发提醒</b>"
+    elif platform == "feishu":
+        header = "🚀 热点突发提醒"
+    else:
+        header = "**🚀 热点突发提醒**"
+    footer = f"检测时间：{now.strftime('%Y-%m-%d %H:%M:%S')}"
+    return "\n\n".join([header, "\n".join(lines), footer])
+
+
 def generate_html_report(
     stats: List[Dict],
     total_titles: int,
@@ -148,8 +187,10 @@ def generate_html_report(
     id_to_name: Optional[Dict] = None,
     mode: str = "daily",
     is_daily_summary: bool = False,
+    classification: Optional[TitleClassification] = None,
+    rising: Optional[Dict] = None,
 ) -> str:
-    """生成HTML报告"""
+    """生成HTML报告，传入 rising 时增加“快速上升”区域"""
     if is_daily_summary:
         if mode == "current":
             filename = "当前榜单汇总.html"
@@ -162,7 +203,11 @@ def generate_html_report(
 
     file_path = get_output_path("html", filename)
 
-    report_data = prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode)
+    report_data = prepare_report_data(
+        stats, failed_ids, new_titles, id_to_name, mode, classification
+    )
+    if rising:
+        report_data["rising"] = rising
 
     html_content = render_html_content(
         report_data, total_titles, is_daily_summary, mode
@@ -202,6 +247,7 @@ def render_html_content(
             .word { font-weight: bold; }
             .count { text-align: center; }
             .percentage { text-align: center; }
+            .trend { text-align: center; white-space: nowrap; }
             .titles { max-width: 500px; }
             .source { color: #666; font-style: italic; }
             .error { color: #d9534f; }
@@ -238,6 +284,17 @@ def render_html_content(
                 color: #0c5460;
                 margin-top: 0;
             }
+            .rising-section {
+                background-color: #f8d7da;
+                border: 1px solid #f5c6cb;
+                border-radius: 5px;
+                padding: 10px;
+                margin-top: 10px;
+            }
+            .rising-section h3 {
+                color: #721c24;
+                margin-top: 0;
+            }
         </style>
     </head>
     <body>
@@ -271,13 +328,32 @@ def render_html_content(
         </div>
         """
 
-    html += """
+    rising = report_data.get("rising") or {}
+    if rising.get("groups") or rising.get("stories"):
+        html += """
+        <div class="rising-section">
+            <h3>🚀 快速上升</h3>
+        """
+        for name, label in (("groups", "词组"), ("stories", "标题")):
+            if not rising.get(name):
+                continue
+            html += f"<h4>{label}</h4><ul>"
+            for item in rising[name]:
+                html += f"<li>{html_escape(format_rising_item(item))}</li>"
+            html += "</ul>"
+        html += "</div>"
+
+    show_trend = any("trend" in stat for stat in report_data["stats"])
+    trend_days = CONFIG["HISTORY"]["TREND_WINDOW_DAYS"]
+    trend_header = f"<th>近{trend_days}天 / 前{trend_days}天</th>" if show_trend else ""
+
+    html += f"""
         <table>
             <tr>
                 <th>排名</th>
                 <th>频率词</th>
                 <th>出现次数</th>
-                <th>占比</th>
+                <th>占比</th>{trend_header}
                 <th>相关标题</th>
             </tr>
     """
@@ -290,12 +366,18 @@ def render_html_content(
             formatted_titles.append(formatted_title)
 
         escaped_word = html_escape(stat["word"])
+        trend_cell = ""
+        if show_trend:
+            trend = stat.get("trend")
+            trend_cell = (
+                f'<td class="trend">{format_trend_display(trend) if trend else "-"}</td>'
+            )
         html += f"""
             <tr>
                 <td>{i}</td>
                 <td class="word">{escaped_word}</td>
                 <td class="count">{stat['count']}</td>
-                <td class="percentage">{stat.get('percentage', 0)}%</td>
+                <td class="percentage">{stat.get('percentage', 0)}%</td>{trend_cell}
                 <td class="titles">{"<br>".join(formatted_titles)}</td>
             </tr>
         """
@@ -518,10 +600,12 @@ def split_content_into_batches(
     report_data: Dict,
     format_type: str,
     update_info: Optional[Dict] = None,
-    max_bytes: int = CONFIG["MESSAGE_BATCH_SIZE"],
+    max_bytes: Optional[int] = None,
     mode: str = "daily",
 ) -> List[str]:
     """分批处理消息内容，确保词组标题+至少第一条新闻的完整性"""
+    if max_bytes is None:
+        max_bytes = CONFIG["MESSAGE_BATCH_SIZE"]
     batches = []
 
     total_titles = sum(
@@ -0,0 +1,281 @@
+﻿import argparse
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，仅依靠进程内的串行执行
+    fcntl = None
+
+
+DEFAULT_CRON_SCHEDULE = "*/30 * * * *"
+RUN_LOCK_PATH = Path("output/.run.lock")
+# 距离下一次完整执行不足该秒数时不再单独轮询（完整执行会抓取所有平台）
+POLL_GUARD_SECONDS = 60
+
+
+class CronSchedule:
+    """标准 5 段 cron 表达式（分 时 日 月 周），支持 *、*/n、a-b、a-b/n 和逗号列表
+
+    与 cron 一致：日和周同时受限时，满足其一即触发；周日可写作 0 或 7。
+    """
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式需要 5 段: {expression!r}")
+
+        fields = [
+            self._parse_field(part, low, high)
+            for part, (low, high) in zip(parts, self.FIELD_RANGES)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"cron 步长必须为正数: {field!r}")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_text, end_text = item.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron 字段超出范围 {low}-{high}: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # isoweekday: 周一=1 ... 周日=7，cron 中周日为 0
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """严格晚于 moment 的下一个触发时间（精确到分钟）"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 逐级跳过不匹配的月、日、时、分，最多搜索约 5 年
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"cron 表达式没有可触发的时间: {self.expression!r}")
+
+
+@contextmanager
+def run_lock(path: Path = RUN_LOCK_PATH) -> Iterator[bool]:
+    """跨进程的执行锁（守护进程与手动执行互斥），返回是否拿到锁"""
+    if fcntl is None:
+        yield True
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class Daemon:
+    """常驻进程：复用同一个 NewsAnalyzer，按 cron 表达式在进程内调度执行
+
+    - 执行串行进行，上一轮超时时跳过期间错过的触发点，不会重叠
+    - 收到 SIGTERM/SIGINT 后等待当前一轮完成再退出，再次收到信号立即退出
+    - 启用 polling 时，两次完整执行之间按各平台的自适应间隔补抓到期平台
+    - 每次执行前检查 config.yaml 和频率词文件，变化时热更新，无需重启
+    """
+
+    def __init__(self, schedule: CronSchedule, immediate: bool = False):
+        self.schedule = schedule
+        self.immediate = immediate
+        self._stop = threading.Event()
+        self._running = False
+        self.analyzer = None
+        self.reloader = None
+
+    def _handle_signal(self, signum, frame) -> None:
+        if self._stop.is_set():
+            print(f"再次收到信号 {signum}，立即退出")
+            raise SystemExit(1)
+        self._stop.set()
+        if self._running:
+            print(f"收到信号 {signum}，当前任务完成后退出")
+        else:
+            print(f"收到信号 {signum}，退出守护进程")
+
+    def install_signal_handlers(self) -> None:
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _reload_if_changed(self) -> None:
+        from .config_loader import CONFIG
+        from .hot_reload import ConfigReloader
+
+        if self.reloader is None:
+            self.reloader = ConfigReloader()
+            return
+        previous = CONFIG.snapshot()
+        config_changed, _ = self.reloader.check()
+        if config_changed and self.analyzer is not None:
+            self.analyzer.reload_config(previous)
+
+    def _execute(self, poll: bool = False) -> None:
+        from .analyzer import NewsAnalyzer
+
+        with run_lock() as acquired:
+            if not acquired:
+                print("另一个执行仍在进行，跳过本次调度")
+                return
+            self._running = True
+            started = time.monotonic()
+            try:
+                self._reload_if_changed()
+                if self.analyzer is None:
+                    self.analyzer = NewsAnalyzer()
+                if poll:
+                    self.analyzer.poll()
+                else:
+                    self.analyzer.run()
+            except Exception as e:
+                # 单次失败不影响后续调度
+                print(f"本次{'轮询' if poll else '执行'}失败: {e}")
+            finally:
+                self._running = False
+            if not poll:
+                print(f"本次执行耗时 {time.monotonic() - started:.1f} 秒")
+
+    def _tick(self) -> None:
+        self._execute()
+
+    def _next_poll(self, next_run: datetime) -> Optional[datetime]:
+        """下一次完整执行之前的最早轮询时间，临近完整执行时不再单独轮询"""
+        from .config_loader import CONFIG
+        from .polling import get_poll_scheduler
+
+        if not CONFIG["POLLING"]["ENABLED"]:
+            return None
+        due = datetime.fromtimestamp(get_poll_scheduler().next_due(CONFIG["PLATFORMS"]))
+        due = max(due, datetime.now())
+        if (next_run - due).total_seconds() < POLL_GUARD_SECONDS:
+            return None
+        return due
+
+    def run(self) -> None:
+        print(f"守护进程启动，调度: {self.schedule.expression}")
+        if self.immediate and not self._stop.is_set():
+            print("立即执行一次")
+            self._tick()
+
+        while not self._stop.is_set():
+            next_run = self.schedule.next_after(datetime.now())
+            print(f"下次执行时间: {next_run.strftime('%Y-%m-%d %H:%M')}")
+            # 分段等待，系统时间调整或休眠后按实际时间重新判断
+            next_poll = self._next_poll(next_run)
+            while not self._stop.is_set():
+                now = datetime.now()
+                if next_poll is not None and next_poll <= now:
+                    self._execute(poll=True)
+                    next_poll = self._next_poll(next_run)
+                    # 轮询失败时状态未更新，延后重试，避免连续请求
+                    if next_poll is not None and next_poll <= datetime.now():
+                        next_poll = datetime.now() + timedelta(seconds=POLL_GUARD_SECONDS)
+                    continue
+                remaining = (next_run - now).total_seconds()
+                if remaining <= 0:
+                    break
+                if next_poll is not None:
+                    remaining = min(remaining, (next_poll - now).total_seconds())
+                self._stop.wait(min(max(remaining, 0.1), 60))
+            if self._stop.is_set():
+                break
+
+            lateness = (datetime.now() - next_run).total_seconds()
+            if lateness > 60:
+                print(f"错过调度时间 {next_run.strftime('%H:%M')}（延迟 {lateness:.0f} 秒），跳过")
+                continue
+            self._tick()
+
+        if self.analyzer is not None:
+            self.analyzer.session_pool.close()
+        print("守护进程已退出")
+
+
+def run_daemon(
+    cron_expression: Optional[str] = None, immediate: Optional[bool] = None
+) -> None:
+    """按 CRON_SCHEDULE / IMMEDIATE_RUN 环境变量（或参数）启动守护进程"""
+    if cron_expression is None:
+        cron_expression = os.environ.get("CRON_SCHEDULE") or DEFAULT_CRON_SCHEDULE
+    if immediate is None:
+        immediate = os.environ.get("IMMEDIATE_RUN", "false").lower() == "true"
+
+    daemon = Daemon(CronSchedule(cron_expression), immediate)
+    daemon.install_signal_handlers()
+    daemon.run()
+
+
+def preview_schedule(cron_expression: str, count: int = 5) -> List[datetime]:
+    schedule = CronSchedule(cron_expression)
+    moment = datetime.now()
+    runs = []
+    for _ in range(count):
+        moment = schedule.next_after(moment)
+        runs.append(moment)
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="cron 表达式预览")
+    parser.add_argument(
+        "expression", nargs="?", default=os.environ.get("CRON_SCHEDULE", DEFAULT_CRON_SCHEDULE)
+    )
+    parser.add_argument("--count", type=int, default=5, help="预览的触发次数")
+    args = parser.parse_args()
+
+    for moment in preview_schedule(args.expression, args.count):
+        print(moment.strftime("%Y-%m-%d %H:%M %a"))
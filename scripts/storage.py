@@ -0,0 +1,563 @@
+﻿import argparse
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config_loader import CONFIG
+from .models import TitleRecord, TitleStats, intern_text
+from .utils import clean_title, format_date_folder, format_time_filename, get_beijing_time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    time_label TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (date, id);
+
+CREATE TABLE IF NOT EXISTS run_platforms (
+    run_id INTEGER NOT NULL,
+    platform_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    failed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, platform_id)
+);
+
+CREATE TABLE IF NOT EXISTS titles (
+    run_id INTEGER NOT NULL,
+    platform_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    ranks TEXT NOT NULL,
+    url TEXT NOT NULL DEFAULT '',
+    mobile_url TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (run_id, platform_id, title)
+);
+
+CREATE TABLE IF NOT EXISTS day_aggregates (
+    date TEXT PRIMARY KEY,
+    last_run_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS day_titles (
+    date TEXT NOT NULL,
+    platform_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    first_time TEXT NOT NULL,
+    last_time TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    ranks TEXT NOT NULL,
+    url TEXT NOT NULL DEFAULT '',
+    mobile_url TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (date, platform_id, title)
+);
+
+CREATE TABLE IF NOT EXISTS seen_titles (
+    date TEXT NOT NULL,
+    platform_id TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    first_run_id INTEGER NOT NULL,
+    PRIMARY KEY (platform_id, title_key, date)
+);
+"""
+
+# SQLite 单条语句的参数个数上限（旧版本为 999）
+QUERY_CHUNK_SIZE = 500
+
+
+def normalize_title_key(title: str) -> str:
+    """新标题判定使用的标题键：合并空白并忽略大小写"""
+    return " ".join(title.split()).casefold()
+
+
+def prepare_title_rows(source_id: str, title_data: Dict) -> List[Tuple]:
+    """单个平台待写入 titles 表的行（不含批次ID）"""
+    rows = []
+    for title, info in title_data.items():
+        ranks = list(info.get("ranks") or [1])
+        rows.append(
+            (
+                source_id,
+                clean_title(title),
+                min(ranks),
+                json.dumps(ranks),
+                info.get("url", ""),
+                info.get("mobileUrl", ""),
+                info.get("date", ""),
+            )
+        )
+    return rows
+
+
+class NewsRepository:
+    """基于 SQLite(WAL) 的抓取结果存储，每行对应一个 (批次, 平台, 标题)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function(
+            "normalize_title_key", 1, normalize_title_key, deterministic=True
+        )
+        self._conn.executescript(SCHEMA)
+        self._migrate_partial_runs()
+        self._backfill_seen_titles()
+        self._conn.commit()
+
+    def _migrate_partial_runs(self) -> None:
+        """旧数据库的 runs 表补充 partial 列（只抓取了部分平台的轮询批次）"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "partial" not in columns:
+            self._conn.execute(
+                "ALTER TABLE runs ADD COLUMN partial INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def _backfill_seen_titles(self) -> None:
+        """已有批次但索引为空时（旧数据库），从原始批次补建已见标题索引"""
+        has_index = self._conn.execute("SELECT 1 FROM seen_titles LIMIT 1").fetchone()
+        has_titles = self._conn.execute("SELECT 1 FROM titles LIMIT 1").fetchone()
+        if has_index or not has_titles:
+            return
+        self._conn.execute(
+            "INSERT OR IGNORE INTO seen_titles (date, platform_id, title_key, first_run_id)"
+            " SELECT r.date, t.platform_id, normalize_title_key(t.title), MIN(t.run_id)"
+            " FROM titles t JOIN runs r ON r.id = t.run_id"
+            " GROUP BY r.date, t.platform_id, normalize_title_key(t.title)"
+        )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """底层连接，供同库的其他存储（如趋势历史）复用，使用时需持有 lock"""
+        return self._conn
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save_run(
+        self,
+        results: Dict,
+        id_to_name: Dict,
+        failed_ids: List,
+        date: Optional[str] = None,
+        time_label: Optional[str] = None,
+        partial: bool = False,
+        prepared_rows: Optional[Dict[str, List[Tuple]]] = None,
+    ) -> int:
+        """保存一次抓取结果，返回批次ID；partial 表示只抓取了部分平台的轮询批次
+
+        prepared_rows 为已按平台生成的标题行（见 prepare_title_rows），缺少的平台现场生成
+        """
+        date = date or format_date_folder()
+        time_label = time_label or format_time_filename()
+
+        title_rows = []
+        platform_rows = []
+        for source_id, title_data in results.items():
+            platform_rows.append((source_id, id_to_name.get(source_id, source_id), 0))
+            rows = prepared_rows.get(source_id) if prepared_rows else None
+            title_rows.extend(
+                rows if rows is not None else prepare_title_rows(source_id, title_data)
+            )
+        for source_id in failed_ids:
+            if source_id not in results:
+                platform_rows.append(
+                    (source_id, id_to_name.get(source_id, source_id), 1)
+                )
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (date, time_label, created_at, partial)"
+                " VALUES (?, ?, ?, ?)",
+                (date, time_label, time.time(), int(partial)),
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_platforms (run_id, platform_id, name, failed)"
+                " VALUES (?, ?, ?, ?)",
+                [(run_id, *row) for row in platform_rows],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO titles"
+                " (run_id, platform_id, title, rank, ranks, url, mobile_url, date)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *row) for row in title_rows],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_titles (date, platform_id, title_key, first_run_id)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (date, row[0], normalize_title_key(row[1]), run_id)
+                    for row in title_rows
+                ],
+            )
+        return run_id
+
+    def get_runs(
+        self, date: Optional[str] = None, full_only: bool = False
+    ) -> List[Tuple[int, str]]:
+        """获取某天的所有批次 (批次ID, 时间标签)，按抓取顺序排列；full_only 时不含轮询批次"""
+        date = date or format_date_folder()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, time_label FROM runs WHERE date = ?"
+                + (" AND partial = 0" if full_only else "")
+                + " ORDER BY id",
+                (date,),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def load_run(
+        self, run_id: int, platform_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict]:
+        """读取一个批次的标题数据，返回 (titles_by_id, id_to_name)"""
+        with self._lock:
+            platform_rows = self._conn.execute(
+                "SELECT platform_id, name FROM run_platforms"
+                " WHERE run_id = ? AND failed = 0",
+                (run_id,),
+            ).fetchall()
+            title_rows = self._conn.execute(
+                "SELECT platform_id, title, ranks, url, mobile_url, date FROM titles"
+                " WHERE run_id = ? ORDER BY rowid",
+                (run_id,),
+            ).fetchall()
+
+        allowed = set(platform_ids) if platform_ids is not None else None
+        titles_by_id = {}
+        id_to_name = {}
+        for source_id, name in platform_rows:
+            if allowed is None or source_id in allowed:
+                source_id = intern_text(source_id)
+                id_to_name[source_id] = name
+                titles_by_id[source_id] = {}
+
+        for source_id, title, ranks, url, mobile_url, date in title_rows:
+            source_titles = titles_by_id.get(source_id)
+            if source_titles is None:
+                continue
+            source_titles[intern_text(title)] = TitleRecord(
+                json.loads(ranks), url, mobile_url, date
+            )
+
+        return titles_by_id, id_to_name
+
+    def update_day_aggregate(self, date: Optional[str] = None) -> int:
+        """把尚未汇总的批次合并进当日汇总，返回本次合并的批次数"""
+        date = date or format_date_folder()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_run_id FROM day_aggregates WHERE date = ?", (date,)
+            ).fetchone()
+            last_run_id = row[0] if row else 0
+
+            pending_runs = self._conn.execute(
+                "SELECT id, time_label, partial FROM runs"
+                " WHERE date = ? AND id > ? ORDER BY id",
+                (date, last_run_id),
+            ).fetchall()
+            if not pending_runs:
+                return 0
+
+            for run_id, time_label, partial in pending_runs:
+                self._absorb_run(date, run_id, time_label, bool(partial))
+
+            self._conn.execute(
+                "INSERT INTO day_aggregates (date, last_run_id) VALUES (?, ?)"
+                " ON CONFLICT(date) DO UPDATE SET last_run_id = excluded.last_run_id",
+                (date, pending_runs[-1][0]),
+            )
+        return len(pending_runs)
+
+    def _absorb_run(
+        self, date: str, run_id: int, time_label: str, partial: bool = False
+    ) -> None:
+        """按 process_source_data 的合并规则把一个批次并入当日汇总
+
+        轮询批次（partial）只更新排名和最后出现时间，不增加出现次数，
+        避免轮询更频繁的平台仅因抓取次数多而获得更高的频次权重。
+        """
+        from .data_processor import process_source_data
+
+        titles_by_id, _ = self.load_run(run_id)
+        all_results = {}
+        title_info = {}
+
+        for source_id, title_data in titles_by_id.items():
+            existing = self._load_day_titles(date, source_id, list(title_data))
+            if existing:
+                all_results[source_id] = {
+                    title: TitleRecord(info.ranks, info.url, info.mobile_url)
+                    for title, info in existing.items()
+                }
+                title_info[source_id] = existing
+
+            process_source_data(
+                source_id, title_data, time_label, all_results, title_info, partial
+            )
+
+        rows = [
+            (
+                date,
+                source_id,
+                title,
+                info["first_time"],
+                info["last_time"],
+                info["count"],
+                json.dumps(list(info["ranks"])),
+                info.get("url", ""),
+                info.get("mobileUrl", ""),
+            )
+            for source_id, source_titles in title_info.items()
+            for title, info in source_titles.items()
+        ]
+        # 使用 UPSERT 保留 rowid，汇总结果的顺序与首次出现顺序一致
+        self._conn.executemany(
+            "INSERT INTO day_titles"
+            " (date, platform_id, title, first_time, last_time, count, ranks, url, mobile_url)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(date, platform_id, title) DO UPDATE SET"
+            " last_time = excluded.last_time, count = excluded.count,"
+            " ranks = excluded.ranks, url = excluded.url, mobile_url = excluded.mobile_url",
+            rows,
+        )
+
+    def _load_day_titles(self, date: str, source_id: str, titles: List[str]) -> Dict:
+        """读取当日汇总中指定标题的统计信息"""
+        existing = {}
+        for start in range(0, len(titles), QUERY_CHUNK_SIZE):
+            chunk = titles[start : start + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._conn.execute(
+                "SELECT title, first_time, last_time, count, ranks, url, mobile_url"
+                " FROM day_titles WHERE date = ? AND platform_id = ?"
+                f" AND title IN ({placeholders})",
+                (date, source_id, *chunk),
+            ).fetchall()
+            for title, first_time, last_time, count, ranks, url, mobile_url in rows:
+                existing[title] = TitleStats(
+                    first_time=first_time,
+                    last_time=last_time,
+                    count=count,
+                    ranks=json.loads(ranks),
+                    url=url,
+                    mobile_url=mobile_url,
+                )
+        return existing
+
+    def load_day_aggregate(
+        self, date: Optional[str] = None, platform_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict, Dict]:
+        """读取当日汇总，返回 (all_results, id_to_name, title_info)"""
+        date = date or format_date_folder()
+        self.update_day_aggregate(date)
+
+        with self._lock:
+            name_rows = self._conn.execute(
+                "SELECT p.platform_id, p.name FROM run_platforms p"
+                " JOIN runs r ON r.id = p.run_id"
+                " WHERE r.date = ? AND p.failed = 0 ORDER BY p.run_id",
+                (date,),
+            ).fetchall()
+            title_rows = self._conn.execute(
+                "SELECT platform_id, title, first_time, last_time, count, ranks, url, mobile_url"
+                " FROM day_titles WHERE date = ? ORDER BY rowid",
+                (date,),
+            ).fetchall()
+
+        allowed = set(platform_ids) if platform_ids is not None else None
+        id_to_name = {}
+        for source_id, name in name_rows:
+            if allowed is None or source_id in allowed:
+                id_to_name[source_id] = name
+
+        all_results = {}
+        title_info = {}
+        for (
+            source_id,
+            title,
+            first_time,
+            last_time,
+            count,
+            ranks,
+            url,
+            mobile_url,
+        ) in title_rows:
+            if allowed is not None and source_id not in allowed:
+                continue
+            source_id = intern_text(source_id)
+            title = intern_text(title)
+            ranks = json.loads(ranks)
+            all_results.setdefault(source_id, {})[title] = TitleRecord(
+                ranks, url, mobile_url
+            )
+            title_info.setdefault(source_id, {})[title] = TitleStats(
+                first_time=intern_text(first_time),
+                last_time=intern_text(last_time),
+                count=count,
+                ranks=ranks,
+                url=url,
+                mobile_url=mobile_url,
+            )
+
+        return all_results, id_to_name, title_info
+
+    def rebuild_day_aggregate(self, date: Optional[str] = None) -> int:
+        """丢弃当日汇总并从原始批次重新计算，返回合并的批次数"""
+        date = date or format_date_folder()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM day_titles WHERE date = ?", (date,))
+            self._conn.execute("DELETE FROM day_aggregates WHERE date = ?", (date,))
+        return self.update_day_aggregate(date)
+
+    def detect_new_titles(
+        self, platform_ids: Optional[List[str]] = None, window_days: int = 1
+    ) -> Dict:
+        """检测今天最新批次中，在最近 window_days 天的更早批次里从未出现过的标题
+
+        以上一个完整批次为基准：两次完整批次之间的轮询批次（partial）抓到的标题
+        一并参与判定，不会因为先被轮询看到而错过新增推送。
+        """
+        runs = self.get_runs()
+        if not runs:
+            return {}
+        latest_run_id = runs[-1][0]
+
+        today = get_beijing_time()
+        dates = [
+            (today - timedelta(days=offset)).strftime("%Y年%m月%d日")
+            for offset in range(max(window_days, 1))
+        ]
+        date_placeholders = ", ".join("?" * len(dates))
+
+        with self._lock:
+            earlier_run = self._conn.execute(
+                f"SELECT 1 FROM runs WHERE date IN ({date_placeholders}) AND id < ? LIMIT 1",
+                (*dates, latest_run_id),
+            ).fetchone()
+        # 窗口内没有更早的批次时不做新增判定（与首次抓取不推送新增一致）
+        if not earlier_run:
+            return {}
+
+        with self._lock:
+            baseline_run_id = self._conn.execute(
+                f"SELECT COALESCE(MAX(CASE WHEN partial = 0 THEN id END), MAX(id)) FROM runs"
+                f" WHERE date IN ({date_placeholders}) AND id < ?",
+                (*dates, latest_run_id),
+            ).fetchone()[0]
+            polled_run_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM runs WHERE id > ? AND id < ? AND partial = 1"
+                    " ORDER BY id DESC",
+                    (baseline_run_id, latest_run_id),
+                )
+            ]
+
+        latest_titles, _ = self.load_run(latest_run_id, platform_ids)
+        for run_id in polled_run_ids:
+            polled_titles, _ = self.load_run(run_id, platform_ids)
+            for source_id, title_data in polled_titles.items():
+                source_titles = latest_titles.setdefault(source_id, {})
+                for title, data in title_data.items():
+                    source_titles.setdefault(title, data)
+
+        new_titles = {}
+        for source_id, title_data in latest_titles.items():
+            keys = {title: normalize_title_key(title) for title in title_data}
+            key_list = list(set(keys.values()))
+            seen_keys = set()
+            with self._lock:
+                for start in range(0, len(key_list), QUERY_CHUNK_SIZE):
+                    chunk = key_list[start : start + QUERY_CHUNK_SIZE]
+                    key_placeholders = ", ".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        "SELECT DISTINCT title_key FROM seen_titles"
+                        f" WHERE platform_id = ? AND title_key IN ({key_placeholders})"
+                        f" AND date IN ({date_placeholders}) AND first_run_id <= ?",
+                        (source_id, *chunk, *dates, baseline_run_id),
+                    ).fetchall()
+                    seen_keys.update(row[0] for row in rows)
+
+            source_new_titles = {
+                title: data
+                for title, data in title_data.items()
+                if keys[title] not in seen_keys
+            }
+            if source_new_titles:
+                new_titles[source_id] = source_new_titles
+
+        return new_titles
+
+    def import_txt_snapshots(self, date: Optional[str] = None) -> int:
+        """导入旧版 txt 快照（仅当该日期尚无批次记录时），返回导入的文件数"""
+        from .data_processor import parse_file_titles
+
+        date = date or format_date_folder()
+        txt_dir = Path("output") / date / "txt"
+        if not txt_dir.exists() or self.get_runs(date):
+            return 0
+
+        files = sorted([f for f in txt_dir.iterdir() if f.suffix == ".txt"])
+        for file_path in files:
+            titles_by_id, id_to_name = parse_file_titles(file_path)
+            self.save_run(titles_by_id, id_to_name, [], date, file_path.stem)
+
+        if files:
+            print(f"已导入 {len(files)} 个 txt 快照到存储: {date}")
+        return len(files)
+
+
+_repository: Optional[NewsRepository] = None
+_repository_lock = threading.Lock()
+_imported_dates = set()
+
+
+def get_repository() -> NewsRepository:
+    """获取全局存储实例，首次访问当天数据时导入旧版 txt 快照"""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = NewsRepository(CONFIG["STORAGE"]["PATH"])
+            atexit.register(_repository.close)
+
+        date = format_date_folder()
+        if date not in _imported_dates:
+            _imported_dates.add(date)
+            _repository.import_txt_snapshots(date)
+
+    return _repository
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="抓取结果存储维护")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="从原始批次重新计算当日汇总"
+    )
+    parser.add_argument("--date", help="日期目录名，如 2025年01月01日，默认今天")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        repository = get_repository()
+        date = args.date or format_date_folder()
+        repository.import_txt_snapshots(date)
+        count = repository.rebuild_day_aggregate(date)
+        print(f"已重建 {date} 的当日汇总，共合并 {count} 个批次")
+    else:
+        parser.print_help()
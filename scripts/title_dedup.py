@@ -0,0 +1,268 @@
+﻿import argparse
+import random
+import re
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from .utils import optional_import
+from .word_matcher import BENCHMARK_CHARS
+
+
+# MinHash 签名长度（哈希函数个数）
+NUM_PERM = 64
+# 标题数不少于该值时才使用 MinHash + LSH 分桶，更少时两两比较更快且不会漏掉相似对
+LSH_MIN_TITLES = 1000
+# 安装了 numpy 且标题数不少于该值时，批量计算签名（numpy 在首次用到时才导入）
+VECTORIZE_THRESHOLD = 500
+# 批量计算时每块的标题数，限制中间矩阵的内存占用
+SIGNATURE_CHUNK_SIZE = 2000
+
+_MASK64 = (1 << 64) - 1
+_NON_WORD_PATTERN = re.compile(r"[\W_]+")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def title_shingles(title: str, ngram: int = 2) -> FrozenSet[str]:
+    """标题的字符 n-gram 集合，忽略大小写、空白和标点"""
+    text = _NON_WORD_PATTERN.sub("", title.lower())
+    if len(text) <= ngram:
+        return frozenset((text,)) if text else frozenset()
+    return frozenset(text[i : i + ngram] for i in range(len(text) - ngram + 1))
+
+
+def title_numbers(title: str) -> FrozenSet[str]:
+    """标题中出现的数字（按多重集记录），期数、涨跌幅、伤亡人数不同的标题不是同一事件"""
+    occurrences: Dict[str, int] = {}
+    for number in _NUMBER_PATTERN.findall(title):
+        occurrences[number] = occurrences.get(number, 0) + 1
+    return frozenset(
+        (number, nth) for number, count in occurrences.items() for nth in range(count)
+    )
+
+
+def numbers_compatible(left: FrozenSet[str], right: FrozenSet[str]) -> bool:
+    """一方的数字都出现在另一方中（允许一方省略数字）"""
+    return left <= right or right <= left
+
+
+def jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left or not right:
+        return 0.0
+    intersection = len(left & right)
+    return intersection / (len(left) + len(right) - intersection)
+
+
+def choose_bands(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """选择 LSH 的 (band 数, 每个 band 的行数)
+
+    取 S 曲线拐点 (1/b)^(1/r) 不超过阈值的最严格组合：桶更少、候选对更少，
+    相似度在阈值附近的标题仍有较高概率落入同一个桶，最终由精确 Jaccard 确认。
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """基于 multiply-shift 哈希族的 MinHash，签名只取决于种子，跨进程稳定"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params: List[Tuple[int, int]] = [
+            (rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)
+        ]
+
+    @staticmethod
+    def _base_hashes(shingles: FrozenSet[str]) -> List[int]:
+        return [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+
+    def signature(self, shingles: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = self._base_hashes(shingles)
+        return tuple(
+            min(((a * h + b) & _MASK64) >> 32 for h in hashes) for a, b in self.params
+        )
+
+    def signatures(self, shingle_sets: Sequence[FrozenSet[str]]) -> List[Tuple[int, ...]]:
+        """批量计算签名，numpy 路径与逐条计算结果逐位相同"""
+        np = optional_import("numpy") if len(shingle_sets) >= VECTORIZE_THRESHOLD else None
+        if np is None:
+            return [self.signature(shingles) for shingles in shingle_sets]
+
+        multipliers = np.array([a for a, _ in self.params], dtype=np.uint64)[:, None]
+        increments = np.array([b for _, b in self.params], dtype=np.uint64)[:, None]
+        result: List[Tuple[int, ...]] = []
+        for start in range(0, len(shingle_sets), SIGNATURE_CHUNK_SIZE):
+            chunk = shingle_sets[start : start + SIGNATURE_CHUNK_SIZE]
+            hash_lists = [self._base_hashes(shingles) for shingles in chunk]
+            lengths = np.fromiter(
+                (len(hashes) for hashes in hash_lists), dtype=np.int64, count=len(chunk)
+            )
+            flat = np.fromiter(
+                (h for hashes in hash_lists for h in hashes),
+                dtype=np.uint64,
+                count=int(lengths.sum()),
+            )
+            offsets = np.zeros(len(chunk), dtype=np.int64)
+            np.cumsum(lengths[:-1], out=offsets[1:])
+            # uint64 乘加按 2^64 取模回绕，与纯 Python 的掩码运算一致
+            mixed = (multipliers * flat + increments) >> np.uint64(32)
+            minimums = np.minimum.reduceat(mixed, offsets, axis=1)
+            result.extend(tuple(row) for row in minimums.T.tolist())
+        return result
+
+
+def cluster_titles(
+    titles: Sequence[str], threshold: float = 0.6, ngram: int = 2
+) -> List[List[int]]:
+    """把近似重复的标题聚类，返回下标分组（含单条分组），按组内最小下标排序
+
+    相似度不低于 threshold 且数字不冲突的标题用并查集合并为一组。标题数少于
+    LSH_MIN_TITLES 时两两计算精确 Jaccard，更多时先用 MinHash + LSH 筛选候选对。
+    """
+    if len(titles) < LSH_MIN_TITLES:
+        return _pairwise_cluster_titles(titles, threshold, ngram)
+    return _lsh_cluster_titles(titles, threshold, ngram)
+
+
+def _lsh_cluster_titles(
+    titles: Sequence[str], threshold: float = 0.6, ngram: int = 2
+) -> List[List[int]]:
+    """MinHash 签名按 band 分桶，只有落入同一个桶的标题才计算精确 Jaccard
+
+    相似度接近阈值的少量标题对可能落不进同一个桶（召回率约 98.5%）。
+    """
+    shingle_sets = [title_shingles(title, ngram) for title in titles]
+    number_sets = [title_numbers(title) for title in titles]
+    candidates = [index for index, shingles in enumerate(shingle_sets) if shingles]
+
+    parent = list(range(len(titles)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    if len(candidates) > 1:
+        hasher = MinHasher()
+        signatures = hasher.signatures([shingle_sets[index] for index in candidates])
+        bands, rows = choose_bands(threshold, hasher.num_perm)
+
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        for index, signature in zip(candidates, signatures):
+            for band in range(bands):
+                buckets[(band, signature[band * rows : (band + 1) * rows])].append(index)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for position, left in enumerate(members):
+                for right in members[position + 1 :]:
+                    left_root, right_root = find(left), find(right)
+                    if left_root == right_root:
+                        continue
+                    if not numbers_compatible(number_sets[left], number_sets[right]):
+                        continue
+                    if jaccard(shingle_sets[left], shingle_sets[right]) >= threshold:
+                        parent[max(left_root, right_root)] = min(left_root, right_root)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(titles)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def _pairwise_cluster_titles(
+    titles: Sequence[str], threshold: float = 0.6, ngram: int = 2
+) -> List[List[int]]:
+    """两两计算精确 Jaccard，标题较少时使用，也作为 LSH 聚类的正确性对照"""
+    shingle_sets = [title_shingles(title, ngram) for title in titles]
+    number_sets = [title_numbers(title) for title in titles]
+    parent = list(range(len(titles)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for left in range(len(titles)):
+        for right in range(left + 1, len(titles)):
+            if not numbers_compatible(number_sets[left], number_sets[right]):
+                continue
+            if jaccard(shingle_sets[left], shingle_sets[right]) >= threshold:
+                left_root, right_root = find(left), find(right)
+                if left_root != right_root:
+                    parent[max(left_root, right_root)] = min(left_root, right_root)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(titles)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def _pair_set(clusters: List[List[int]]) -> set:
+    return {
+        (left, right)
+        for cluster in clusters
+        for position, left in enumerate(cluster)
+        for right in cluster[position + 1 :]
+    }
+
+
+def benchmark_clustering(
+    story_count: int = 1000, variants: int = 3, threshold: float = 0.6, seed: int = 0
+) -> None:
+    """在随机生成的“同一事件多种写法”标题上对比两两比较与 LSH 聚类"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(story_count):
+        base = "".join(rng.choice(BENCHMARK_CHARS) for _ in range(rng.randint(12, 30)))
+        titles.append(base)
+        for _ in range(rng.randint(0, variants)):
+            chars = list(base)
+            # 少量替换字符，并随机追加后缀，模拟不同平台的改写
+            for _ in range(rng.randint(0, 2)):
+                chars[rng.randrange(len(chars))] = rng.choice(BENCHMARK_CHARS)
+            variant = "".join(chars)
+            if rng.random() < 0.5:
+                variant += rng.choice(["", "：最新进展", "，官方回应", "!"])
+            titles.append(variant)
+    rng.shuffle(titles)
+
+    print(f"{len(titles)} 条标题（{story_count} 个事件），阈值 {threshold}")
+
+    # 预先导入 numpy（如已安装），导入耗时不计入 LSH 聚类
+    optional_import("numpy")
+
+    start = time.perf_counter()
+    naive_clusters = _pairwise_cluster_titles(titles, threshold)
+    naive_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lsh_clusters = _lsh_cluster_titles(titles, threshold)
+    lsh_elapsed = time.perf_counter() - start
+
+    naive_pairs = _pair_set(naive_clusters)
+    lsh_pairs = _pair_set(lsh_clusters)
+    recall = len(naive_pairs & lsh_pairs) / len(naive_pairs) if naive_pairs else 1.0
+    print(f"  两两比较: {naive_elapsed * 1000:8.1f} ms，{len(naive_clusters)} 个分组")
+    print(f"  LSH 聚类: {lsh_elapsed * 1000:8.1f} ms，{len(lsh_clusters)} 个分组")
+    print(f"  相似对召回率: {recall:.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="近似重复标题聚类性能对比")
+    parser.add_argument("--stories", type=int, default=1000, help="事件数量")
+    parser.add_argument("--variants", type=int, default=3, help="每个事件最多的改写数")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Jaccard 相似度阈值")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    benchmark_clustering(args.stories, args.variants, args.threshold, args.seed)
@@ -1,10 +1,11 @@
-﻿import os
+﻿import importlib
+import os
 import re
 import random
 import time
 import pytz
-import requests
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -35,10 +36,20 @@ def get_output_path(subfolder: str, filename: str) -> str:
     ensure_directory_exists(str(output_dir))
     return str(output_dir / filename)
 
+@lru_cache(maxsize=None)
+def optional_import(module_name: str):
+    """首次使用时导入可选依赖（如 numpy、lxml），未安装时返回 None"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
 def check_version_update(
     current_version: str, version_url: str, proxy_url: Optional[str] = None
 ) -> Tuple[bool, Optional[str]]:
     """检查版本更新"""
+    import requests
+
     try:
         proxies = None
         if proxy_url:
@@ -80,15 +91,10 @@ def check_version_update(
 
 
 def is_first_crawl_today() -> bool:
-    """检测是否是当天第一次爬取"""
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-
-    if not txt_dir.exists():
-        return True
+    """检测是否是当天第一次完整爬取（轮询批次不计入）"""
+    from .storage import get_repository
 
-    files = sorted([f for f in txt_dir.iterdir() if f.suffix == ".txt"])
-    return len(files) <= 1
+    return len(get_repository().get_runs(full_only=True)) <= 1
 
 
 def html_escape(text: str) -> str:
@@ -0,0 +1,374 @@
+﻿import argparse
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .config_loader import CONFIG
+from .storage import NewsRepository, QUERY_CHUNK_SIZE, get_repository, normalize_title_key
+
+
+VELOCITY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS velocity_meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS velocity_series (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    group_key TEXT NOT NULL DEFAULT '',
+    last_seq INTEGER NOT NULL,
+    last_time REAL NOT NULL,
+    last_value REAL NOT NULL,
+    ewma REAL NOT NULL,
+    ewmvar REAL NOT NULL,
+    baseline REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    rate REAL NOT NULL,
+    zscore REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_velocity_series_seq ON velocity_series (kind, last_seq);
+"""
+
+GROUP = "group"
+STORY = "story"
+
+# 首次启用时只回放最近的若干个批次作为基线
+BOOTSTRAP_RUNS = 48
+# 标题缺席期间按 0 值补记衰减，最多补记的快照数（此后基线已基本衰减为 0）
+MAX_GAP_SNAPSHOTS = 32
+# 超过该快照数未再出现的标题序列被清理
+STORY_TTL_SNAPSHOTS = 96
+
+_SERIES_COLUMNS = (
+    "label, group_key, last_seq, last_time, last_value, ewma, ewmvar, baseline,"
+    " samples, rate, zscore"
+)
+
+
+class SeriesState:
+    """单条时间序列（词组或标题）的增量统计：EWMA 基线、方差、变化速率和 z 分数"""
+
+    __slots__ = (
+        "label",
+        "group_key",
+        "last_seq",
+        "last_time",
+        "last_value",
+        "ewma",
+        "ewmvar",
+        "baseline",
+        "samples",
+        "rate",
+        "zscore",
+    )
+
+    def __init__(
+        self,
+        label: str = "",
+        group_key: str = "",
+        last_seq: int = 0,
+        last_time: float = 0.0,
+        last_value: float = 0.0,
+        ewma: float = 0.0,
+        ewmvar: float = 0.0,
+        baseline: float = 0.0,
+        samples: int = 0,
+        rate: float = 0.0,
+        zscore: float = 0.0,
+    ):
+        self.label = label
+        self.group_key = group_key
+        self.last_seq = last_seq
+        self.last_time = last_time
+        self.last_value = last_value
+        self.ewma = ewma
+        self.ewmvar = ewmvar
+        # 本次观测之前的 EWMA，z 分数相对于它计算
+        self.baseline = baseline
+        self.samples = samples
+        self.rate = rate
+        self.zscore = zscore
+
+    def decay(self, snapshots: int, alpha: float) -> None:
+        """补记缺席的快照（观测值为 0），最多 MAX_GAP_SNAPSHOTS 次，O(1)"""
+        for _ in range(min(snapshots, MAX_GAP_SNAPSHOTS)):
+            delta = -self.ewma
+            self.ewma += alpha * delta
+            self.ewmvar = (1 - alpha) * (self.ewmvar + alpha * delta * delta)
+        if snapshots > 0:
+            self.last_value = 0.0
+
+    def observe(
+        self, value: float, timestamp: float, seq: int, alpha: float, min_std: float
+    ) -> None:
+        """记录一个快照的观测值，O(1) 更新速率、z 分数和 EWMA 基线
+
+        z 分数以更新前的基线衡量本次观测，标准差不低于 min_std，避免平稳序列上的微小波动被放大。
+        """
+        self.baseline = self.ewma
+        if self.samples == 0:
+            self.baseline = value
+            self.ewma = value
+            self.ewmvar = 0.0
+            self.rate = 0.0
+            self.zscore = 0.0
+        else:
+            hours = max((timestamp - self.last_time) / 3600, 1 / 60)
+            self.rate = (value - self.last_value) / hours
+            delta = value - self.ewma
+            self.zscore = delta / max(math.sqrt(self.ewmvar), min_std)
+            self.ewma += alpha * delta
+            self.ewmvar = (1 - alpha) * (self.ewmvar + alpha * delta * delta)
+        self.last_value = value
+        self.last_time = timestamp
+        self.last_seq = seq
+        self.samples += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "label": self.label,
+            "group_key": self.group_key,
+            "value": self.last_value,
+            "baseline": self.baseline,
+            "rate": self.rate,
+            "zscore": self.zscore,
+            "samples": self.samples,
+        }
+
+
+class VelocityEngine:
+    """按抓取批次（快照）流式更新词组和标题的热度序列，检测突发上升
+
+    - 词组序列：每个快照中命中该词组的标题条数
+    - 标题序列：每个快照中该标题（按标题键合并各平台）的热度 Σ(11 - min(排名, 10))
+
+    每个新快照只更新本快照涉及的序列，不回扫历史。
+    """
+
+    def __init__(self, repository: NewsRepository, velocity_config: Optional[Dict] = None):
+        self.repository = repository
+        self._config = velocity_config
+        with repository.lock:
+            repository.connection.executescript(VELOCITY_SCHEMA)
+
+    @property
+    def config(self) -> Dict:
+        """未显式传入时每次读取全局配置，配置热更新后立即生效"""
+        return self._config or CONFIG["VELOCITY"]
+
+    def _meta(self, name: str) -> int:
+        row = self.repository.connection.execute(
+            "SELECT value FROM velocity_meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _load_states(self, kind: str, keys: List[str]) -> Dict[str, SeriesState]:
+        states = {}
+        conn = self.repository.connection
+        for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[start : start + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for key, *values in conn.execute(
+                f"SELECT key, {_SERIES_COLUMNS} FROM velocity_series"
+                f" WHERE kind = ? AND key IN ({placeholders})",
+                (kind, *chunk),
+            ):
+                states[key] = SeriesState(*values)
+        return states
+
+    def _save_states(self, kind: str, states: Dict[str, SeriesState]) -> None:
+        self.repository.connection.executemany(
+            f"INSERT OR REPLACE INTO velocity_series (kind, key, {_SERIES_COLUMNS})"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    kind,
+                    key,
+                    state.label,
+                    state.group_key,
+                    state.last_seq,
+                    state.last_time,
+                    state.last_value,
+                    state.ewma,
+                    state.ewmvar,
+                    state.baseline,
+                    state.samples,
+                    state.rate,
+                    state.zscore,
+                )
+                for key, state in states.items()
+            ],
+        )
+
+    def update(
+        self,
+        word_groups: List[Dict],
+        filter_words: List[str],
+        classification=None,
+    ) -> int:
+        """处理尚未纳入的批次，返回处理的快照数"""
+        from .data_processor import get_title_classification
+
+        if not word_groups:
+            word_groups = [{"required": [], "normal": [], "group_key": "全部新闻"}]
+            filter_words = []
+        classification = get_title_classification(word_groups, filter_words, classification)
+
+        repository = self.repository
+        conn = repository.connection
+        with repository.lock:
+            last_run_id = self._meta("last_run_id")
+            if last_run_id == 0:
+                latest = conn.execute("SELECT MAX(id) FROM runs").fetchone()[0] or 0
+                last_run_id = max(latest - BOOTSTRAP_RUNS, 0)
+            pending_runs = conn.execute(
+                # 轮询批次只含部分平台，不作为快照，避免其余平台被记为 0
+                "SELECT id, created_at FROM runs WHERE id > ? AND partial = 0 ORDER BY id",
+                (last_run_id,),
+            ).fetchall()
+
+        for run_id, created_at in pending_runs:
+            titles_by_id, _ = repository.load_run(run_id)
+            self._absorb_snapshot(titles_by_id, created_at, word_groups, classification)
+            with repository.lock, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO velocity_meta (name, value) VALUES ('last_run_id', ?)",
+                    (run_id,),
+                )
+        return len(pending_runs)
+
+    def _absorb_snapshot(
+        self,
+        titles_by_id: Dict,
+        timestamp: float,
+        word_groups: List[Dict],
+        classification,
+    ) -> None:
+        alpha = self.config["EWMA_ALPHA"]
+        min_std = self.config["MIN_STD"]
+        group_keys = [group["group_key"] for group in word_groups]
+
+        group_values = dict.fromkeys(group_keys, 0.0)
+        story_values: Dict[str, float] = {}
+        story_labels: Dict[str, Tuple[str, str]] = {}
+        for title_data in titles_by_id.values():
+            for title, info in title_data.items():
+                group_index = classification.group_index(title)
+                if group_index is None:
+                    continue
+                group_key = group_keys[group_index]
+                group_values[group_key] += 1
+                key = normalize_title_key(title)
+                best_rank = min(info["ranks"]) if info["ranks"] else 99
+                story_values[key] = story_values.get(key, 0.0) + 11 - min(best_rank, 10)
+                story_labels.setdefault(key, (title, group_key))
+
+        repository = self.repository
+        conn = repository.connection
+        with repository.lock, conn:
+            seq = self._meta("seq") + 1
+            for kind, values in ((GROUP, group_values), (STORY, story_values)):
+                states = self._load_states(kind, list(values))
+                for key, value in values.items():
+                    state = states.get(key)
+                    if state is None:
+                        label, group_key = story_labels.get(key, (key, key))
+                        state = states[key] = SeriesState(label, group_key)
+                    else:
+                        state.decay(seq - state.last_seq - 1, alpha)
+                    state.observe(value, timestamp, seq, alpha, min_std)
+                self._save_states(kind, states)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO velocity_meta (name, value) VALUES ('seq', ?)",
+                (seq,),
+            )
+            conn.execute(
+                "DELETE FROM velocity_series WHERE kind = ? AND last_seq < ?",
+                (STORY, seq - STORY_TTL_SNAPSHOTS),
+            )
+
+    def rising(self, limit: int = 10) -> Dict:
+        """最新快照中突发上升的词组和标题 {"seq", "groups", "stories"}，按 z 分数降序
+
+        条件：z 分数不低于阈值、观测次数足够、当前值不低于下限且较上一快照上升。
+        """
+        config = self.config
+        conn = self.repository.connection
+        with self.repository.lock:
+            seq = self._meta("seq")
+            result = {"seq": seq}
+            for kind, name in ((GROUP, "groups"), (STORY, "stories")):
+                rows = conn.execute(
+                    f"SELECT {_SERIES_COLUMNS} FROM velocity_series"
+                    " WHERE kind = ? AND last_seq = ? AND zscore >= ? AND samples >= ?"
+                    " AND last_value >= ? AND rate > 0"
+                    " ORDER BY zscore DESC LIMIT ?",
+                    (
+                        kind,
+                        seq,
+                        config["Z_THRESHOLD"],
+                        config["MIN_SAMPLES"],
+                        config["MIN_VALUE"],
+                        limit,
+                    ),
+                ).fetchall()
+                result[name] = [SeriesState(*row).to_dict() for row in rows]
+        return result
+
+    def claim_alert(self, seq: int) -> bool:
+        """同一快照的突发只提醒一次（跨进程），首次认领返回 True"""
+        conn = self.repository.connection
+        with self.repository.lock, conn:
+            if self._meta("alerted_seq") >= seq:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO velocity_meta (name, value) VALUES ('alerted_seq', ?)",
+                (seq,),
+            )
+        return True
+
+    def series(self, kind: str, key: str) -> Optional[Dict]:
+        """某条序列的当前统计，标题按标题键查询"""
+        if kind == STORY:
+            key = normalize_title_key(key)
+        with self.repository.lock:
+            states = self._load_states(kind, [key])
+        return states[key].to_dict() if key in states else None
+
+
+_engine: Optional[VelocityEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_velocity_engine() -> VelocityEngine:
+    """获取全局热度速度引擎实例（与抓取结果共用同一个数据库）"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = VelocityEngine(get_repository())
+    return _engine
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="词组/标题热度速度引擎")
+    parser.add_argument("--update", action="store_true", help="处理尚未纳入的批次")
+    parser.add_argument("--limit", type=int, default=10, help="输出的突发条数")
+    args = parser.parse_args()
+
+    engine = get_velocity_engine()
+    if args.update:
+        from .data_processor import load_frequency_words
+
+        print(f"已处理 {engine.update(*load_frequency_words())} 个快照")
+    signals = engine.rising(args.limit)
+    for name, label in (("groups", "词组"), ("stories", "标题")):
+        print(f"突发{label}: {len(signals[name])} 个")
+        for item in signals[name]:
+            print(
+                f"  {item['label']}: 当前 {item['value']:.0f}，基线 {item['baseline']:.1f}，"
+                f"z={item['zscore']:.1f}，速率 {item['rate']:+.1f}/小时"
+            )
@@ -0,0 +1,209 @@
+﻿import argparse
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+# 基准测试用的常用汉字，随机组合成标题和关键词
+BENCHMARK_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处府研越"
+
+
+class AhoCorasick:
+    """多模式子串匹配自动机，一次扫描返回命中的模式位掩码"""
+
+    def __init__(self, patterns: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        # 空模式是任何字符串的子串，始终命中
+        self._always = 0
+
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                self._always |= 1 << pattern_id
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(0)
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state] |= 1 << pattern_id
+
+        self._build_fail_links()
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> int:
+        """返回 text 中出现的所有模式的位掩码"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        hits = self._always
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hits |= output[state]
+        return hits
+
+
+class WordGroupMatcher:
+    """把 load_frequency_words 的词组编译为单个自动机，按位掩码判定过滤词和词组"""
+
+    def __init__(self, word_groups: List[Dict], filter_words: List[str]):
+        self.word_groups = word_groups
+        pattern_ids: Dict[str, int] = {}
+
+        def mask_of(words: List[str]) -> int:
+            mask = 0
+            for word in words:
+                word = word.lower()
+                if word not in pattern_ids:
+                    pattern_ids[word] = len(pattern_ids)
+                mask |= 1 << pattern_ids[word]
+            return mask
+
+        self.filter_mask = mask_of(filter_words)
+        # (必须词掩码, 普通词掩码)，顺序与 word_groups 一致
+        self.group_masks: List[Tuple[int, int]] = [
+            (mask_of(group["required"]), mask_of(group["normal"]))
+            for group in word_groups
+        ]
+        self.automaton = AhoCorasick(list(pattern_ids))
+
+    def classify(self, title: str) -> Tuple[bool, Optional[int]]:
+        """返回 (是否命中过滤词, 命中的第一个词组下标)，未命中词组时下标为 None"""
+        if not self.word_groups:
+            return False, None
+
+        hits = self.automaton.search(title.lower())
+        if hits & self.filter_mask:
+            return True, None
+
+        for index, (required_mask, normal_mask) in enumerate(self.group_masks):
+            if hits & required_mask != required_mask:
+                continue
+            if normal_mask and not hits & normal_mask:
+                continue
+            return False, index
+
+        return False, None
+
+    def match_group(self, title: str) -> Optional[int]:
+        """返回标题命中的第一个词组下标，被过滤或未命中返回 None"""
+        return self.classify(title)[1]
+
+    def matches(self, title: str) -> bool:
+        """与 matches_word_groups 规则一致：未配置词组时匹配所有标题"""
+        if not self.word_groups:
+            return True
+        return self.match_group(title) is not None
+
+
+def _naive_match_group(
+    title: str, word_groups: List[Dict], filter_words: List[str]
+) -> Optional[int]:
+    """逐词子串扫描的原始实现，作为基准和正确性对照"""
+    title_lower = title.lower()
+    if any(filter_word.lower() in title_lower for filter_word in filter_words):
+        return None
+    for index, group in enumerate(word_groups):
+        if group["required"] and not all(
+            word.lower() in title_lower for word in group["required"]
+        ):
+            continue
+        if group["normal"] and not any(
+            word.lower() in title_lower for word in group["normal"]
+        ):
+            continue
+        return index
+    return None
+
+
+def benchmark_matchers(title_count: int = 10000, word_count: int = 500, seed: int = 0) -> None:
+    """在随机生成的标题和词组上对比逐词扫描与自动机匹配的耗时和结果"""
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choice(BENCHMARK_CHARS) for _ in range(rng.randint(2, 3)))
+        for _ in range(word_count)
+    ] + [f"AI{i}" for i in range(word_count // 20)]
+    rng.shuffle(words)
+    words = words[:word_count]
+
+    word_groups = []
+    filter_words = []
+    position = 0
+    while position < len(words):
+        size = rng.randint(2, 6)
+        group_words = words[position : position + size]
+        position += size
+        if rng.random() < 0.1:
+            filter_words.append(group_words[0])
+            continue
+        required = group_words[:1] if rng.random() < 0.3 else []
+        normal = group_words[len(required) :]
+        word_groups.append(
+            {
+                "required": required,
+                "normal": normal,
+                "group_key": " ".join(normal or required),
+            }
+        )
+
+    titles = [
+        "".join(rng.choice(BENCHMARK_CHARS) for _ in range(rng.randint(12, 36)))
+        + rng.choice(["", " ai1", " Ai3 发布", ""])
+        for _ in range(title_count)
+    ]
+
+    print(
+        f"{len(titles)} 条标题，{len(words)} 个词（{len(word_groups)} 个词组，"
+        f"{len(filter_words)} 个过滤词）"
+    )
+
+    start = time.perf_counter()
+    naive_result = [_naive_match_group(t, word_groups, filter_words) for t in titles]
+    naive_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = WordGroupMatcher(word_groups, filter_words)
+    build_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    matcher_result = [matcher.match_group(t) for t in titles]
+    matcher_elapsed = time.perf_counter() - start
+
+    matched = sum(1 for index in matcher_result if index is not None)
+    parity = "一致" if matcher_result == naive_result else "不一致"
+    print(f"  逐词扫描: {naive_elapsed * 1000:8.1f} ms")
+    print(
+        f"    自动机: {matcher_elapsed * 1000:8.1f} ms（编译 {build_elapsed * 1000:.1f} ms）"
+    )
+    print(f"  命中 {matched} 条，结果{parity}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="频率词匹配性能对比")
+    parser.add_argument("--titles", type=int, default=10000, help="标题数量")
+    parser.add_argument("--words", type=int, default=500, help="词数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    benchmark_matchers(args.titles, args.words, args.seed)
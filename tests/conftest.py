@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CONFIG_PATH", str(ROOT / "config" / "config.yaml"))
+os.environ.setdefault("FREQUENCY_WORDS_PATH", str(ROOT / "config" / "frequency_words.txt"))
@@ -0,0 +1,88 @@
+import json
+
+from scripts.data_fetcher import DataFetcher
+from scripts.http_cache import HttpCache
+from scripts.rate_limiter import HostRateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = payload
+        self.content = json.dumps(payload).encode("utf-8") if payload is not None else b""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSessionPool:
+    """按顺序返回预设响应，并记录每次请求的参数"""
+
+    def __init__(self, responses, on_request=None):
+        self.responses = list(responses)
+        self.on_request = on_request
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(kwargs)
+        if self.on_request:
+            self.on_request(len(self.calls))
+        return self.responses.pop(0)
+
+
+def make_fetcher(tmp_path, responses, on_request=None):
+    cache = HttpCache(str(tmp_path / "http"))
+    pool = FakeSessionPool(responses, on_request)
+    fetcher = DataFetcher(
+        rate_limiter=HostRateLimiter(requests_per_second=1000, burst=100),
+        session_pool=pool,
+        http_cache=cache,
+    )
+    return fetcher, cache, pool
+
+
+def test_not_modified_without_cache_entry_retries_with_caller_headers(tmp_path):
+    payload = {"status": "success", "items": [{"title": "标题", "url": "https://a"}]}
+    url = "https://newsnow.busiyi.world/api/s?id=zhihu&latest"
+
+    fetcher, cache, pool = make_fetcher(
+        tmp_path,
+        [FakeResponse(304), FakeResponse(200, payload)],
+        # 条件请求发出后缓存条目被淘汰，304 时已取不到解析结果
+        on_request=lambda n: cache._entries.clear() if n == 1 else None,
+    )
+    key = cache.make_key(url)
+    cache.store(key, {"ETag": '"v1"'}, "hash", payload["items"])
+
+    caller_headers = {"User-Agent": "test-agent", "Accept": "application/json"}
+    items = fetcher._fetch_parsed(
+        url, lambda response: response.json()["items"], headers=caller_headers, timeout=10
+    )
+
+    assert items == payload["items"]
+    assert len(pool.calls) == 2
+    conditional, retry = pool.calls
+    assert conditional["headers"]["If-None-Match"] == '"v1"'
+    assert conditional["headers"]["User-Agent"] == "test-agent"
+    assert retry["headers"] == caller_headers
+    assert retry["timeout"] == 10
+    # 调用方传入的请求头不被修改
+    assert caller_headers == {"User-Agent": "test-agent", "Accept": "application/json"}
+
+
+def test_not_modified_returns_cached_items(tmp_path):
+    items = [{"title": "标题", "url": "https://a"}]
+    url = "https://newsnow.busiyi.world/api/s?id=zhihu&latest"
+
+    fetcher, cache, pool = make_fetcher(tmp_path, [FakeResponse(304)])
+    cache.store(cache.make_key(url), {"ETag": '"v1"'}, "hash", items)
+
+    result = fetcher._fetch_parsed(url, lambda response: [], headers={"User-Agent": "a"})
+
+    assert result == items
+    assert len(pool.calls) == 1
@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+
+from scripts import frequency_rules
+from scripts.frequency_rules import FrequencyRuleSet, load_frequency_rules
+
+CONTENT = "降息\n+央行\n\n加息\n!广告\n"
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(frequency_rules, "RULES_CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "frequency_words.txt"
+    path.write_text(CONTENT, encoding="utf-8")
+    return path
+
+
+def test_loaded_rules_are_read_only(rules_file):
+    rules = load_frequency_rules(str(rules_file))
+
+    with pytest.raises(TypeError):
+        rules.word_groups[0]["normal"] = []
+    with pytest.raises(AttributeError):
+        rules.word_groups[0]["normal"].append("新词")
+    with pytest.raises(AttributeError):
+        rules.filter_words.append("新词")
+    assert load_frequency_rules(str(rules_file)).word_groups[0]["normal"] == ("降息",)
+
+
+def test_disk_cache_round_trip(rules_file):
+    rules = load_frequency_rules(str(rules_file))
+    restored = pickle.loads(pickle.dumps(rules))
+
+    assert isinstance(restored, FrequencyRuleSet)
+    assert restored.word_groups == rules.word_groups
+    assert restored.filter_words == ("广告",)
+    assert restored.match_group("央行宣布降息") == 0
+    assert restored.match_group("加息广告") is None
+
+
+def test_cache_key_includes_source(rules_file, monkeypatch):
+    key = frequency_rules._rules_cache_key("content")
+    monkeypatch.setattr(frequency_rules, "_source_hash", "changed")
+    assert frequency_rules._rules_cache_key("content") != key
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from scripts.history import DATE_FOLDER_FORMAT, TrendHistory
+from scripts.models import TitleRecord
+from scripts.storage import NewsRepository
+from scripts.utils import get_beijing_time
+
+
+def folder_days_ago(days: int) -> str:
+    return (get_beijing_time() - timedelta(days=days)).strftime(DATE_FOLDER_FORMAT)
+
+
+def save_run(repository, date):
+    results = {"zhihu": {f"{date} 标题": TitleRecord([1], "https://a", "https://a")}}
+    repository.save_run(results, {"zhihu": "知乎"}, [], date=date, time_label="08时00分")
+
+
+def test_compact_all_skips_days_outside_retention(tmp_path):
+    repository = NewsRepository(str(tmp_path / "news.db"))
+    history = TrendHistory(repository)
+    old_dates = [folder_days_ago(days) for days in (400, 300, 200)]
+    recent_dates = [folder_days_ago(days) for days in (2, 1)]
+    for date in old_dates + recent_dates:
+        save_run(repository, date)
+
+    assert history.compact_all() == len(recent_dates)
+    # 已压缩且没有新批次时不重写，超出保留期的日期也不会被反复压缩
+    assert history.compact_all() == 0
+
+    compacted = {
+        row[0] for row in repository.connection.execute("SELECT date FROM history_days")
+    }
+    assert compacted == set(recent_dates)
+
+    save_run(repository, recent_dates[-1])
+    assert history.compact_all() == 1
+    repository.close()
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from scripts.html_parser import (
+    FIXTURE_DIR,
+    PARSER_BACKENDS,
+    parse_tophub_items_bs4,
+    parse_zqrb_items_bs4,
+)
+
+pytest.importorskip("lxml.html")
+
+TOPHUB_PAGES = sorted(FIXTURE_DIR.glob("tophub_*.html"))
+ZQRB_PAGES = sorted(FIXTURE_DIR.glob("zqrb_*.html"))
+
+
+def read_page(path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def test_fixtures_present():
+    assert TOPHUB_PAGES and ZQRB_PAGES
+
+
+@pytest.mark.parametrize("path", TOPHUB_PAGES, ids=lambda path: path.name)
+def test_tophub_backends_agree(path):
+    html_content = read_page(path)
+    expected = PARSER_BACKENDS["bs4"]["tophub"](html_content)
+    assert expected
+    assert PARSER_BACKENDS["lxml"]["tophub"](html_content) == expected
+
+
+@pytest.mark.parametrize("cutoff_date", [None, datetime(2099, 1, 1)])
+@pytest.mark.parametrize("path", ZQRB_PAGES, ids=lambda path: path.name)
+def test_zqrb_backends_agree(path, cutoff_date):
+    html_content = read_page(path)
+    expected = PARSER_BACKENDS["bs4"]["zqrb"](html_content, cutoff_date)
+    assert expected
+    assert PARSER_BACKENDS["lxml"]["zqrb"](html_content, cutoff_date) == expected
+
+
+def test_tophub_edge_cases():
+    items = parse_tophub_items_bs4(read_page(FIXTURE_DIR / "tophub_home.html"))
+    by_title = {item["title"]: item for item in items}
+
+    # 实体解码、去除首尾空白、内嵌标签取文本
+    assert "如何看待 <某大模型> 发布 & 开源？" in by_title
+    assert "标题前后有空格" in by_title
+    assert "带加粗和斜体的标题" in by_title
+    # 没有 nofollow 的链接和 class 仅前缀相同的卡片不解析
+    assert "没有 nofollow 的链接不计入" not in by_title
+    assert "class 仅前缀相同的卡片不解析" not in by_title
+    # 排名为空或缺失时使用序号，缺少标题节点时为“无标题”
+    assert by_title["排名为空时使用序号"]["rank"] == 4
+    assert by_title["缺少排名节点"]["rank"] == 5
+    assert by_title["无标题"]["source"] == "微博"
+    assert by_title["缺少 href 的条目"]["url"] == ""
+    assert by_title["来源名称为空"]["source"] == ""
+
+
+def test_zqrb_cutoff_and_dates():
+    html_content = read_page(FIXTURE_DIR / "zqrb_search.html")
+    all_items = parse_zqrb_items_bs4(html_content)
+    recent_items = parse_zqrb_items_bs4(html_content, datetime(2099, 1, 1))
+
+    assert [item["rank"] for item in all_items] == [1, 2, 4, 5, 6, 7]
+    assert [item["rank"] for item in recent_items] == [1, 2, 5, 6, 7]
+    assert all_items[0]["title"] == "新五丰发布三季度业绩预告"
+    assert all_items[0]["date"] == "2099-01-05"
+    # 缺少或无法解析的时间不参与过滤
+    assert [item["date"] for item in recent_items[2:]] == ["未知", "未知", "未知"]
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 导入 scripts.analyzer 的累计耗时上限（微秒），当前约 70ms，留足 CI 波动余量
+IMPORT_BUDGET_US = 300_000
+# 只在实际抓取、解析或去重时才需要的重依赖
+DEFERRED_MODULES = ("requests", "lxml", "numpy")
+
+
+def import_times(module: str) -> dict:
+    """在子进程中用 -X importtime 导入模块，返回 {模块名: 累计耗时(微秒)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_analyzer_import_defers_heavy_dependencies():
+    times = import_times("scripts.analyzer")
+    loaded = {name.split(".")[0] for name in times}
+    assert not loaded & set(DEFERRED_MODULES)
+
+
+def test_analyzer_import_within_budget():
+    times = import_times("scripts.analyzer")
+    assert times["scripts.analyzer"] < IMPORT_BUDGET_US
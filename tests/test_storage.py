@@ -0,0 +1,87 @@
+from pathlib import Path
+
+from scripts import data_processor
+from scripts.data_processor import parse_file_titles, save_titles_to_file
+from scripts.models import TitleRecord
+from scripts.storage import NewsRepository
+
+DATE = "2025年01月01日"
+
+
+def save_run(repository, time_label, titles, partial=False):
+    results = {
+        "zhihu": {
+            title: TitleRecord([rank], "https://a", "https://a")
+            for title, rank in titles.items()
+        }
+    }
+    repository.save_run(
+        results, {"zhihu": "知乎"}, [], date=DATE, time_label=time_label, partial=partial
+    )
+
+
+def test_partial_runs_do_not_inflate_count(tmp_path):
+    repository = NewsRepository(str(tmp_path / "news.db"))
+    save_run(repository, "08时00分", {"旧闻": 3})
+    for minute, rank in (("05", 2), ("10", 1), ("15", 1)):
+        save_run(repository, f"08时{minute}分", {"旧闻": rank}, partial=True)
+    save_run(repository, "08时30分", {"旧闻": 4})
+
+    _, _, title_info = repository.load_day_aggregate(DATE)
+    stats = title_info["zhihu"]["旧闻"]
+    # 轮询批次只更新排名和最后出现时间，出现次数只按完整批次计
+    assert stats["count"] == 2
+    assert stats["last_time"] == "08时30分"
+    assert sorted(stats["ranks"]) == [1, 2, 3, 4]
+
+    # 逐批增量汇总与整体重建结果一致
+    repository.rebuild_day_aggregate(DATE)
+    _, _, rebuilt = repository.load_day_aggregate(DATE)
+    assert rebuilt == title_info
+    repository.close()
+
+
+def test_partial_run_first_seen_title_counts_once(tmp_path):
+    repository = NewsRepository(str(tmp_path / "news.db"))
+    save_run(repository, "08时00分", {"旧闻": 1})
+    save_run(repository, "08时05分", {"旧闻": 1, "新闻": 2}, partial=True)
+    save_run(repository, "08时10分", {"新闻": 2}, partial=True)
+
+    _, _, title_info = repository.load_day_aggregate(DATE)
+    assert title_info["zhihu"]["新闻"]["count"] == 1
+    assert title_info["zhihu"]["新闻"]["first_time"] == "08时05分"
+    assert title_info["zhihu"]["新闻"]["last_time"] == "08时10分"
+    repository.close()
+
+
+def test_get_runs_full_only_skips_partial_runs(tmp_path):
+    repository = NewsRepository(str(tmp_path / "news.db"))
+    save_run(repository, "08时00分", {"旧闻": 1})
+    save_run(repository, "08时05分", {"旧闻": 1}, partial=True)
+
+    assert [label for _, label in repository.get_runs(DATE)] == ["08时00分", "08时05分"]
+    assert [label for _, label in repository.get_runs(DATE, full_only=True)] == ["08时00分"]
+    repository.close()
+
+
+def test_txt_export_round_trips_title_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        data_processor,
+        "get_output_path",
+        lambda subfolder, filename: str(tmp_path / filename),
+    )
+    results = {
+        "zhihu": {
+            "多排名": TitleRecord([3, 5], "https://a/1", "https://m/1", "2025-01-01"),
+            "单排名": TitleRecord([1], "https://a/2", "", ""),
+        },
+        "legacy": {
+            "旧格式": {"ranks": [2], "url": "https://b", "mobileUrl": "https://mb"},
+        },
+    }
+    file_path = save_titles_to_file(results, {"zhihu": "知乎"}, ["failed"])
+
+    titles_by_id, id_to_name = parse_file_titles(Path(file_path))
+    assert id_to_name == {"zhihu": "知乎", "legacy": "legacy"}
+    assert titles_by_id["zhihu"] == results["zhihu"]
+    assert titles_by_id["legacy"]["旧格式"] == TitleRecord([2], "https://b", "https://mb")
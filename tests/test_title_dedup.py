@@ -0,0 +1,36 @@
+import pytest
+
+from scripts import title_dedup
+from scripts.title_dedup import cluster_titles
+
+TITLES = [
+    "央行宣布下调存款准备金率0.5个百分点",
+    "央行宣布下调存款准备金率0.5个百分点：最新进展",
+    "央行宣布下调存款准备金率0.25个百分点",
+    "台风海葵今晚登陆福建",
+    "台风“海葵”今晚登陆福建，官方回应",
+    "新能源车9月销量同比增长35%",
+]
+
+
+def test_small_inputs_use_exact_pairwise(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("LSH path used below LSH_MIN_TITLES")
+
+    monkeypatch.setattr(title_dedup, "_lsh_cluster_titles", fail)
+    clusters = cluster_titles(TITLES, threshold=0.6)
+
+    # 数字不同的标题不合并
+    assert clusters == [[0, 1], [2], [3, 4], [5]]
+
+
+def test_large_inputs_use_lsh(monkeypatch):
+    monkeypatch.setattr(title_dedup, "LSH_MIN_TITLES", 4)
+    pairwise = title_dedup._pairwise_cluster_titles(TITLES, 0.6)
+
+    assert cluster_titles(TITLES, threshold=0.6) == pairwise
+
+
+@pytest.mark.parametrize("titles", [[], ["只有一条"], ["", "！！"]])
+def test_degenerate_inputs(titles):
+    assert cluster_titles(titles) == [[index] for index in range(len(titles))]